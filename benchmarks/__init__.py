@@ -0,0 +1,3 @@
+"""
+Offline benchmarks: a stub OpenAI-compatible server, synthetic projects and the microbenchmark suite.
+"""
@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List
+
+from orchestrator.codegen.task import CodegenTask
+from orchestrator.engine import Engine
+from orchestrator.metrics import RUN_REPORT_KEY, RunReport
+from orchestrator.steps.llm_step import LLMStep
+from tasks import TASK_BUILDERS
+
+from .stub_server import StubLLMServer
+
+
+DEFAULT_SYSTEM_PROMPT = "You are a helpful assistant. Answer concisely."
+PERCENTILES = (50, 95, 99)
+# Histogram bucket upper bounds in seconds (log-spaced), plus +Inf
+HISTOGRAM_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_TARGET_SUFFIX = re.compile(r"\[[^\]]*\]$")
+
+
+@dataclass
+class Job:
+    """
+    One workload entry.
+
+    kind is "prompt" (a single-step LLM engine over the text), "task" (a
+    registered task from tasks.TASK_BUILDERS over an input file) or "codegen"
+    (a CodegenTask run).
+    """
+
+    kind: str
+    payload: Dict[str, Any]
+    line: int
+
+
+@dataclass
+class JobResult:
+    index: int
+    kind: str
+    ok: bool
+    # Arrival -> start (open-loop queueing), start -> end, arrival -> end
+    queued_seconds: float
+    service_seconds: float
+    latency_seconds: float
+    phases: Dict[str, float] = field(default_factory=dict)
+    error: str | None = None
+
+
+def load_workload(path: Path) -> List[Job]:
+    """
+    Read a JSONL workload. Each line is one of:
+      {"kind": "prompt", "prompt": "..."}                       (also: any line with title/body, e.g. requests.jsonl)
+      {"kind": "task", "task": "code_explainer", "input": "path"}
+      {"kind": "codegen", "project": "dir", "spec": "spec.md", "targets": ["src/App.tsx"]}
+    The kind is inferred when omitted.
+    """
+    jobs: List[Job] = []
+    for line_no, raw in enumerate(path.read_text(encoding="utf-8").splitlines(), start=1):
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        entry = json.loads(line)
+        kind = entry.get("kind")
+        if kind is None:
+            if "task" in entry:
+                kind = "task"
+            elif "spec" in entry:
+                kind = "codegen"
+            else:
+                kind = "prompt"
+        if kind == "prompt" and "prompt" not in entry:
+            text = "\n\n".join(str(entry[k]) for k in ("title", "body") if entry.get(k))
+            if not text:
+                raise ValueError(f"{path}:{line_no}: prompt job needs 'prompt' or 'title'/'body'")
+            entry = {**entry, "prompt": text}
+        if kind not in ("prompt", "task", "codegen"):
+            raise ValueError(f"{path}:{line_no}: unknown job kind '{kind}'")
+        jobs.append(Job(kind=kind, payload=entry, line=line_no))
+    return jobs
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """
+    Nearest-rank percentile; 0.0 for no values.
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def histogram(values: List[float], buckets: tuple[float, ...] = HISTOGRAM_BUCKETS) -> List[tuple[str, int]]:
+    """
+    Non-cumulative counts per latency bucket, as (upper bound label, count).
+    """
+    counts = [0] * (len(buckets) + 1)
+    for v in values:
+        for i, bound in enumerate(buckets):
+            if v <= bound:
+                counts[i] += 1
+                break
+        else:
+            counts[-1] += 1
+    labels = [f"<={b:g}s" for b in buckets] + ["+Inf"]
+    return list(zip(labels, counts))
+
+
+class LoadGenerator:
+    """
+    Replays a workload through the real Engine / CodegenTask code paths.
+
+    Closed loop (concurrency=N): N workers each run jobs back to back.
+    Open loop (rate=R): jobs arrive at R per second (Poisson or uniform
+    spacing) whatever the backlog, and latency is measured from arrival, so
+    queueing under overload shows up in the tail instead of being hidden.
+    """
+
+    def __init__(
+        self,
+        jobs: List[Job],
+        output_dir: Path,
+        concurrency: int = 4,
+        rate: float | None = None,
+        poisson: bool = True,
+        max_inflight: int = 64,
+        stream: bool = False,
+        system_prompt: str = DEFAULT_SYSTEM_PROMPT,
+        seed: int = 0,
+    ) -> None:
+        if not jobs:
+            raise ValueError("Workload is empty.")
+        self.jobs = jobs
+        self.output_dir = output_dir
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.poisson = poisson
+        self.max_inflight = max(1, max_inflight)
+        self.stream = stream
+        self.system_prompt = system_prompt
+        self._random = random.Random(seed)
+        self._results: List[JobResult] = []
+        self._lock = threading.Lock()
+
+    def _run_job(self, index: int, job: Job) -> RunReport | None:
+        if job.kind == "prompt":
+            engine = Engine([LLMStep(self.system_prompt, stream=self.stream)], name="prompt")
+            context = engine.run({"input_text": job.payload["prompt"]})
+            return context[RUN_REPORT_KEY]
+
+        if job.kind == "task":
+            builder = TASK_BUILDERS[job.payload["task"]]
+            output_path = self.output_dir / f"job{index:06d}.out"
+            engine = builder(input_path=job.payload["input"], output_path=output_path, stream=self.stream)
+            engine.run()
+            return engine.last_report
+
+        task = CodegenTask(
+            project_path=Path(job.payload["project"]).resolve(),
+            spec_path=Path(job.payload["spec"]).resolve(),
+            target_files=[Path(t) for t in job.payload.get("targets") or ["src/App.tsx"]],
+            stream=self.stream,
+        )
+        task.run()
+        return task.report
+
+    @staticmethod
+    def _phases(report: RunReport | None) -> Dict[str, float]:
+        phases: Dict[str, float] = {}
+        if report is None:
+            return phases
+        for step in report.steps:
+            # "GenerateComponentStep[src/App.tsx]" -> "GenerateComponentStep"
+            name = _TARGET_SUFFIX.sub("", step.step)
+            phases[name] = phases.get(name, 0.0) + step.wall_seconds
+            if step.llm_calls:
+                phases["llm"] = phases.get("llm", 0.0) + step.llm_seconds
+        return phases
+
+    def _execute(self, index: int, job: Job, arrived_at: float) -> None:
+        started = time.perf_counter()
+        report: RunReport | None = None
+        error: str | None = None
+        try:
+            report = self._run_job(index, job)
+        except Exception as exc:
+            error = f"{type(exc).__name__}: {exc}"
+        finished = time.perf_counter()
+        result = JobResult(
+            index=index,
+            kind=job.kind,
+            ok=error is None,
+            queued_seconds=started - arrived_at,
+            service_seconds=finished - started,
+            latency_seconds=finished - arrived_at,
+            phases=self._phases(report),
+            error=error,
+        )
+        with self._lock:
+            self._results.append(result)
+
+    def run(self, total_jobs: int | None = None, duration_seconds: float | None = None) -> Dict[str, Any]:
+        total = total_jobs if total_jobs is not None else (None if duration_seconds else len(self.jobs))
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self._results = []
+        started = time.perf_counter()
+        deadline = started + duration_seconds if duration_seconds else None
+
+        if self.rate:
+            self._run_open_loop(total, deadline)
+        else:
+            self._run_closed_loop(total, deadline)
+
+        return self.summary(time.perf_counter() - started)
+
+    def _run_closed_loop(self, total: int | None, deadline: float | None) -> None:
+        counter = itertools.count()
+
+        def worker() -> None:
+            while True:
+                index = next(counter)
+                if (total is not None and index >= total) or (deadline is not None and time.perf_counter() >= deadline):
+                    return
+                self._execute(index, self.jobs[index % len(self.jobs)], time.perf_counter())
+
+        threads = [threading.Thread(target=worker, name=f"load-{i}") for i in range(self.concurrency)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+    def _run_open_loop(self, total: int | None, deadline: float | None) -> None:
+        interval = 1.0 / float(self.rate or 1.0)
+        next_arrival = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.max_inflight, thread_name_prefix="load") as pool:
+            for index in itertools.count():
+                if total is not None and index >= total:
+                    break
+                if deadline is not None and next_arrival >= deadline:
+                    break
+                delay = next_arrival - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self._execute, index, self.jobs[index % len(self.jobs)], next_arrival)
+                next_arrival += self._random.expovariate(1.0 / interval) if self.poisson else interval
+
+    def summary(self, wall_seconds: float) -> Dict[str, Any]:
+        results = sorted(self._results, key=lambda r: r.index)
+        ok = [r for r in results if r.ok]
+        latencies = [r.latency_seconds for r in ok]
+
+        def stats(values: List[float]) -> Dict[str, float]:
+            out = {f"p{p}": percentile(values, p) for p in PERCENTILES}
+            out["max"] = max(values) if values else 0.0
+            out["mean"] = sum(values) / len(values) if values else 0.0
+            return out
+
+        phase_names = sorted({name for r in ok for name in r.phases})
+        errors: Dict[str, int] = {}
+        for r in results:
+            if r.error:
+                errors[r.error] = errors.get(r.error, 0) + 1
+
+        return {
+            "mode": "open" if self.rate else "closed",
+            "rate": self.rate,
+            "concurrency": None if self.rate else self.concurrency,
+            "jobs": len(results),
+            "succeeded": len(ok),
+            "failed": len(results) - len(ok),
+            "error_rate": (len(results) - len(ok)) / len(results) if results else 0.0,
+            "wall_seconds": wall_seconds,
+            "throughput_jobs_per_second": len(ok) / wall_seconds if wall_seconds > 0 else 0.0,
+            "latency": stats(latencies),
+            "queued": stats([r.queued_seconds for r in ok]),
+            "service": stats([r.service_seconds for r in ok]),
+            "phases": {name: stats([r.phases[name] for r in ok if name in r.phases]) for name in phase_names},
+            "histogram": histogram(latencies),
+            "errors": errors,
+            "results": [asdict(r) for r in results],
+        }
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    def row(label: str, s: Dict[str, float]) -> str:
+        return (
+            f"[load] {label:<28} p50={s['p50'] * 1000:9.1f}ms p95={s['p95'] * 1000:9.1f}ms "
+            f"p99={s['p99'] * 1000:9.1f}ms max={s['max'] * 1000:9.1f}ms"
+        )
+
+    mode = f"rate={summary['rate']}/s" if summary["mode"] == "open" else f"concurrency={summary['concurrency']}"
+    lines = [
+        f"[load] {summary['jobs']} jobs ({mode}): {summary['succeeded']} ok, {summary['failed']} failed "
+        f"({summary['error_rate'] * 100:.1f}%) in {summary['wall_seconds']:.2f}s "
+        f"({summary['throughput_jobs_per_second']:.2f} jobs/s)",
+        row("end-to-end", summary["latency"]),
+    ]
+    if summary["mode"] == "open":
+        lines.append(row("queued", summary["queued"]))
+    for name, s in summary["phases"].items():
+        lines.append(row(f"phase {name}", s))
+
+    total = sum(count for _, count in summary["histogram"]) or 1
+    lines.append("[load] end-to-end latency histogram:")
+    for label, count in summary["histogram"]:
+        if count:
+            lines.append(f"[load]   {label:>8} {count:6d} {'#' * max(1, round(40 * count / total))}")
+    for error, count in summary["errors"].items():
+        lines.append(f"[load] ERROR x{count}: {error}")
+    return "\n".join(lines)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Replay a JSONL workload through the orchestrator under load.")
+    parser.add_argument("--workload", default="requests.jsonl", help="JSONL workload file. Default: requests.jsonl")
+    parser.add_argument("--base-url", help="OpenAI-compatible base URL (sets LMSTUDIO_BASE_URL).")
+    parser.add_argument("--concurrency", type=int, default=4, help="Closed loop: jobs in flight. Default: 4")
+    parser.add_argument("--rate", type=float, help="Open loop: job arrivals per second (overrides --concurrency).")
+    parser.add_argument("--uniform", action="store_true", help="Open loop: evenly spaced instead of Poisson arrivals.")
+    parser.add_argument("--max-inflight", type=int, default=64, help="Open loop: worker threads. Default: 64")
+    parser.add_argument("--jobs", type=int, help="Number of jobs to run (the workload is cycled). Default: one pass")
+    parser.add_argument("--duration", type=float, help="Stop starting new jobs after this many seconds.")
+    parser.add_argument("--stream", action="store_true", help="Use streaming completions.")
+    parser.add_argument("--use-cache", action="store_true", help="Allow response cache hits (off by default).")
+    parser.add_argument("--output-dir", default=".orchestrator_cache/loadgen", help="Where task outputs are written.")
+    parser.add_argument("--output", help="Write the summary (with per-job results) as JSON to this file.")
+    parser.add_argument("--stub", action="store_true", help="Start an in-process stub server and target it.")
+    parser.add_argument("--stub-latency-ms", type=float, default=200.0, help="Stub prefill latency. Default: 200")
+    parser.add_argument("--stub-tokens-per-second", type=float, default=50.0, help="Stub decode rate. Default: 50")
+    parser.add_argument("--stub-completion-tokens", type=int, default=64, help="Stub completion length. Default: 64")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+
+    stub: StubLLMServer | None = None
+    if args.stub:
+        stub = StubLLMServer(
+            latency_seconds=args.stub_latency_ms / 1000.0,
+            tokens_per_second=args.stub_tokens_per_second,
+            completion_tokens=args.stub_completion_tokens,
+        ).start()
+        os.environ["LMSTUDIO_BASE_URL"] = stub.base_url
+    elif args.base_url:
+        os.environ["LMSTUDIO_BASE_URL"] = args.base_url
+    if not args.use_cache:
+        # Every job must reach the server to measure it
+        os.environ["ORCHESTRATOR_CACHE_BYPASS"] = "1"
+
+    jobs = load_workload(Path(args.workload))
+    generator = LoadGenerator(
+        jobs,
+        output_dir=Path(args.output_dir),
+        concurrency=args.concurrency,
+        rate=args.rate,
+        poisson=not args.uniform,
+        max_inflight=args.max_inflight,
+        stream=args.stream,
+    )
+    try:
+        summary = generator.run(total_jobs=args.jobs, duration_seconds=args.duration)
+    finally:
+        if stub is not None:
+            stub.stop()
+
+    print(format_summary(summary))
+    if args.output:
+        Path(args.output).write_text(json.dumps(summary, indent=2), encoding="utf-8")
+        print(f"[load] Summary written to {args.output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
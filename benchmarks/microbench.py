@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from orchestrator.backend import LLMBackend
+from orchestrator.cache import ResponseCache
+from orchestrator.codegen.context import CodegenContext
+from orchestrator.codegen.path_index import PathIndex
+from orchestrator.codegen.postprocess import PostProcessor
+from orchestrator.codegen.project_index import INDEX_DIR_NAME
+from orchestrator.codegen.steps import (
+    GenerateComponentStep,
+    ImportValidationStep,
+    ProjectScanningStep,
+    _extract_relative_imports,
+)
+from orchestrator.engine import Engine
+from orchestrator.steps.base import Context, Step
+from orchestrator.steps.llm_step import LLMStep
+
+from .stub_server import StubLLMServer
+from .synthetic import make_large_tsx, make_project_tree
+
+
+DEFAULT_WORKDIR = Path(".orchestrator_cache") / "bench"
+DEFAULT_SCAN_SIZES = (1_000, 10_000, 100_000)
+DEFAULT_THRESHOLD = 0.15
+# Differences below this are treated as noise, whatever the ratio
+MIN_REGRESSION_SECONDS = 0.0005
+
+
+@dataclass
+class Case:
+    """
+    One prepared benchmark: fn is timed, reset (if any) runs untimed before each call.
+    """
+
+    fn: Callable[[], Any]
+    reset: Callable[[], None] | None = None
+    teardown: Callable[[], None] | None = None
+
+
+@dataclass
+class Benchmark:
+    name: str
+    setup: Callable[["BenchEnv"], Case]
+    repeat: int = 20
+
+
+@dataclass
+class BenchEnv:
+    workdir: Path
+    scan_sizes: tuple[int, ...] = DEFAULT_SCAN_SIZES
+    _stub: StubLLMServer | None = field(default=None, repr=False)
+
+    def stub(self) -> StubLLMServer:
+        if self._stub is None:
+            self._stub = StubLLMServer(completion_tokens=32).start()
+        return self._stub
+
+    def backend(self) -> LLMBackend:
+        return LLMBackend(
+            base_url=self.stub().base_url,
+            cache=ResponseCache(self.workdir / "cache", bypass=True),
+        )
+
+    def close(self) -> None:
+        if self._stub is not None:
+            self._stub.stop()
+            self._stub = None
+
+
+class _NoopStep(Step):
+    def __init__(self, key: str) -> None:
+        super().__init__(name=f"noop-{key}")
+        self.key = key
+
+    def reads(self) -> set[str]:
+        return set()
+
+    def writes(self) -> set[str]:
+        return {self.key}
+
+    def run(self, context: Context) -> Context:
+        context[self.key] = True
+        return context
+
+
+def _engine_case(max_workers: int) -> Callable[[BenchEnv], Case]:
+    def setup(env: BenchEnv) -> Case:
+        engine = Engine([_NoopStep(f"k{i}") for i in range(100)], max_workers=max_workers)
+        return Case(fn=lambda: engine.run({}))
+
+    return setup
+
+
+def _llm_step_case(env: BenchEnv) -> Case:
+    backend = env.backend()
+    step = LLMStep("You are a benchmark.", backend=backend)
+    return Case(fn=lambda: step.run({"input_text": "hello"}), teardown=backend.close)
+
+
+def _llm_stream_case(env: BenchEnv) -> Case:
+    backend = env.backend()
+    messages = [{"role": "user", "content": "hello"}]
+
+    def fn() -> None:
+        for _ in backend.stream_chat_completion(messages, model="stub-model", use_cache=False):
+            pass
+
+    return Case(fn=fn, teardown=backend.close)
+
+
+def _scan_case(n_files: int, warm: bool) -> Callable[[BenchEnv], Case]:
+    def setup(env: BenchEnv) -> Case:
+        root = make_project_tree(env.workdir / f"tree_{n_files}", n_files)
+        ctx = CodegenContext(project_path=root, spec_path=root / "spec.md", target_file=Path("src/App.tsx"))
+        step = ProjectScanningStep()
+
+        def drop_index() -> None:
+            shutil.rmtree(root / INDEX_DIR_NAME, ignore_errors=True)
+
+        if warm:
+            step.run(ctx)  # build the persisted index once
+            return Case(fn=lambda: step.run(ctx))
+        return Case(fn=lambda: step.run(ctx), reset=drop_index)
+
+    return setup
+
+
+def _sanitize_case(env: BenchEnv) -> Case:
+    source = make_large_tsx()
+    return Case(fn=lambda: GenerateComponentStep._sanitize_tailwind(source))
+
+
+def _extract_imports_case(env: BenchEnv) -> Case:
+    source = make_large_tsx()
+    return Case(fn=lambda: _extract_relative_imports(source))
+
+
+def _streaming_cleaner_case(env: BenchEnv) -> Case:
+    source = "```tsx\n" + make_large_tsx() + "```\n"
+    chunks = [source[i : i + 16] for i in range(0, len(source), 16)]
+
+    def fn() -> None:
+        processor = PostProcessor()
+        for chunk in chunks:
+            processor.feed(chunk)
+        processor.finish()
+
+    return Case(fn=fn)
+
+
+def _postprocess_case(env: BenchEnv) -> Case:
+    source = "```tsx\n" + make_large_tsx() + "```\n"
+    return Case(fn=lambda: PostProcessor().process(source))
+
+
+def _import_validation_case(env: BenchEnv) -> Case:
+    source = make_large_tsx()
+    n_widgets = source.count("./widgets/Widget")
+    paths = [f"src/widgets/Widget{i}.tsx" for i in range(n_widgets)]
+    paths += [f"src/other/File{i}.ts" for i in range(10_000)]
+    ctx = CodegenContext(project_path=env.workdir, spec_path=env.workdir / "spec.md", target_file=Path("src/App.tsx"))
+    ctx.generated_code = source
+    step = ImportValidationStep()
+
+    def fresh_index() -> None:
+        # Memoized resolutions would make every run after the first trivial
+        ctx.path_index = PathIndex(paths)
+
+    return Case(fn=lambda: step.run(ctx), reset=fresh_index)
+
+
+def build_suite(scan_sizes: tuple[int, ...]) -> List[Benchmark]:
+    suite = [
+        Benchmark("engine.sequential_100_steps", _engine_case(1)),
+        Benchmark("engine.graph_100_steps", _engine_case(8)),
+        Benchmark("llm_step.stub_request", _llm_step_case, repeat=50),
+        Benchmark("backend.stub_stream_32_tokens", _llm_stream_case, repeat=50),
+        Benchmark("codegen.sanitize_tailwind_large", _sanitize_case),
+        Benchmark("codegen.extract_relative_imports_large", _extract_imports_case),
+        Benchmark("codegen.streaming_cleaner_large", _streaming_cleaner_case),
+        Benchmark("codegen.postprocess_large", _postprocess_case),
+        Benchmark("codegen.import_validation_2k_imports", _import_validation_case),
+    ]
+    for n in scan_sizes:
+        # Fewer repetitions for the big trees
+        repeat = 10 if n <= 10_000 else 3
+        suite.append(Benchmark(f"scan.cold_{n}_files", _scan_case(n, warm=False), repeat=repeat))
+        suite.append(Benchmark(f"scan.warm_{n}_files", _scan_case(n, warm=True), repeat=repeat))
+    return suite
+
+
+def time_case(case: Case, repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    for _ in range(warmup):
+        if case.reset is not None:
+            case.reset()
+        case.fn()
+
+    samples: List[float] = []
+    for _ in range(repeat):
+        if case.reset is not None:
+            case.reset()
+        started = time.perf_counter()
+        case.fn()
+        samples.append(time.perf_counter() - started)
+
+    return {
+        "median_s": statistics.median(samples),
+        "min_s": min(samples),
+        "max_s": max(samples),
+        "mean_s": statistics.fmean(samples),
+        "repeat": repeat,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return out.stdout.strip() or None
+
+
+def run_suite(
+    env: BenchEnv,
+    only: List[str] | None = None,
+    repeat: int | None = None,
+) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for bench in build_suite(env.scan_sizes):
+        if only and not any(pattern in bench.name for pattern in only):
+            continue
+        case = bench.setup(env)
+        try:
+            results[bench.name] = time_case(case, repeat or bench.repeat)
+        finally:
+            if case.teardown is not None:
+                case.teardown()
+        r = results[bench.name]
+        print(f"[bench] {bench.name:<44} median={r['median_s'] * 1000:9.3f}ms min={r['min_s'] * 1000:9.3f}ms")
+
+    return {
+        "meta": {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[str]:
+    """
+    Print a per-benchmark comparison of median times and return the names that
+    regressed by more than threshold (e.g. 0.15 = 15% slower).
+    """
+    regressions: List[str] = []
+    base_results = baseline.get("results") or {}
+    for name, cur in (current.get("results") or {}).items():
+        base = base_results.get(name)
+        if base is None:
+            print(f"[bench] {name:<44} (new)")
+            continue
+        ratio = cur["median_s"] / base["median_s"] if base["median_s"] > 0 else float("inf")
+        slower = cur["median_s"] - base["median_s"]
+        regressed = ratio > 1 + threshold and slower > MIN_REGRESSION_SECONDS
+        flag = "REGRESSION" if regressed else ("faster" if ratio < 1 - threshold else "")
+        print(
+            f"[bench] {name:<44} {base['median_s'] * 1000:9.3f}ms -> {cur['median_s'] * 1000:9.3f}ms "
+            f"({ratio:5.2f}x) {flag}"
+        )
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline microbenchmarks for ai-orchestrator.")
+    parser.add_argument("--output", help="Write results as JSON to this file.")
+    parser.add_argument("--compare", help="Baseline results JSON; exit with status 1 on regressions.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Relative slowdown of the median flagged as a regression. Default: {DEFAULT_THRESHOLD}",
+    )
+    parser.add_argument("--only", nargs="*", help="Run only benchmarks whose name contains one of these strings.")
+    parser.add_argument("--repeat", type=int, help="Override the number of timed runs per benchmark.")
+    parser.add_argument(
+        "--sizes",
+        default=",".join(str(n) for n in DEFAULT_SCAN_SIZES),
+        help="Comma-separated file counts of the synthetic scan trees. Default: 1000,10000,100000",
+    )
+    parser.add_argument(
+        "--workdir",
+        default=str(DEFAULT_WORKDIR),
+        help=f"Where synthetic trees are created (and reused). Default: {DEFAULT_WORKDIR}",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    sizes = tuple(int(s) for s in args.sizes.split(",") if s.strip())
+    env = BenchEnv(workdir=Path(args.workdir).resolve(), scan_sizes=sizes)
+    env.workdir.mkdir(parents=True, exist_ok=True)
+
+    try:
+        current = run_suite(env, only=args.only, repeat=args.repeat)
+    finally:
+        env.close()
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(current, indent=2), encoding="utf-8")
+        print(f"[bench] Results written to {args.output}")
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"[bench] {len(regressions)} regression(s): {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
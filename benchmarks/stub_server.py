@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+
+class StubLLMServer:
+    """
+    Local stand-in for the LM Studio OpenAI-compatible API, for offline benchmarks.
+
+    Serves POST /v1/chat/completions (plain and stream=True) and GET /v1/models.
+    Every completion waits latency_seconds before the first token (prefill) and
+    then emits completion_tokens tokens at tokens_per_second (decode);
+    tokens_per_second=0 sends them all at once. The completion text is
+    response_text if given, else completion_tokens copies of "tok ".
+
+    Runs on a background thread; port=0 picks a free port (see base_url).
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_seconds: float = 0.0,
+        tokens_per_second: float = 0.0,
+        completion_tokens: int = 32,
+        response_text: str | None = None,
+        model: str = "stub-model",
+    ) -> None:
+        self.latency_seconds = latency_seconds
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.response_text = response_text
+        self.model = model
+        self.requests_served = 0
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; Nagle + delayed ACK would add ~40ms per response
+            disable_nagle_algorithm = True
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def do_GET(self) -> None:
+                if self.path.rstrip("/") not in ("/v1/models", "/models"):
+                    self._send_json(404, {"error": "not found"})
+                    return
+                self._send_json(200, {"object": "list", "data": [{"id": server.model, "object": "model"}]})
+
+            def do_POST(self) -> None:
+                if self.path.rstrip("/") not in ("/v1/chat/completions", "/chat/completions"):
+                    self._send_json(404, {"error": "not found"})
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                except ValueError:
+                    self._send_json(400, {"error": "invalid JSON"})
+                    return
+                with server._lock:
+                    server.requests_served += 1
+
+                tokens = server._tokens()
+                prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in body.get("messages") or [])
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": len(tokens),
+                    "total_tokens": prompt_tokens + len(tokens),
+                }
+
+                if server.latency_seconds > 0:
+                    time.sleep(server.latency_seconds)
+
+                if body.get("stream"):
+                    self._stream(tokens, usage)
+                    return
+
+                server._decode_delay(len(tokens))
+                self._send_json(
+                    200,
+                    {
+                        "id": "chatcmpl-stub",
+                        "object": "chat.completion",
+                        "model": server.model,
+                        "choices": [
+                            {
+                                "index": 0,
+                                "message": {"role": "assistant", "content": "".join(tokens)},
+                                "finish_reason": "stop",
+                            }
+                        ],
+                        "usage": usage,
+                    },
+                )
+
+            def _stream(self, tokens: List[str], usage: Dict[str, int]) -> None:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                delay = 1.0 / server.tokens_per_second if server.tokens_per_second > 0 else 0.0
+                try:
+                    for token in tokens:
+                        event = {"choices": [{"index": 0, "delta": {"content": token}}]}
+                        self.wfile.write(b"data: " + json.dumps(event).encode("utf-8") + b"\n\n")
+                        self.wfile.flush()
+                        if delay:
+                            time.sleep(delay)
+                    final = {"choices": [], "usage": usage}
+                    self.wfile.write(b"data: " + json.dumps(final).encode("utf-8") + b"\n\n")
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.wfile.flush()
+                except (BrokenPipeError, ConnectionResetError):
+                    # Client cancelled the generation
+                    pass
+                self.close_connection = True
+
+            def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+                out = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(out)))
+                self.end_headers()
+                self.wfile.write(out)
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread: threading.Thread | None = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def _tokens(self) -> List[str]:
+        if self.response_text is not None:
+            # Split into roughly word-sized tokens, keeping whitespace
+            words = self.response_text.split(" ")
+            return [w + " " for w in words[:-1]] + [words[-1]]
+        return ["tok "] * self.completion_tokens
+
+    def _decode_delay(self, n_tokens: int) -> None:
+        if self.tokens_per_second > 0:
+            time.sleep(n_tokens / self.tokens_per_second)
+
+    def start(self) -> "StubLLMServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="stub-llm", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc: Any) -> None:
+        self.stop()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Stub OpenAI-compatible chat completions server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1234)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Delay before the first token.")
+    parser.add_argument("--tokens-per-second", type=float, default=0.0, help="Decode rate; 0 = instant.")
+    parser.add_argument("--completion-tokens", type=int, default=32)
+    parser.add_argument("--response-file", help="Serve this file's contents as every completion.")
+    args = parser.parse_args(argv)
+
+    response_text = None
+    if args.response_file:
+        with open(args.response_file, encoding="utf-8") as fh:
+            response_text = fh.read()
+
+    server = StubLLMServer(
+        host=args.host,
+        port=args.port,
+        latency_seconds=args.latency_ms / 1000.0,
+        tokens_per_second=args.tokens_per_second,
+        completion_tokens=args.completion_tokens,
+        response_text=response_text,
+    )
+    print(f"[stub] Serving {server.base_url} (Ctrl+C to stop)")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server._httpd.server_close()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import List
+
+
+FILES_PER_DIR = 50
+DIRS_PER_LEVEL = 20
+
+
+def make_project_tree(root: Path, n_files: int) -> Path:
+    """
+    Create (once) a Vite-style project with n_files small source files under src/.
+
+    Files are spread FILES_PER_DIR per directory, DIRS_PER_LEVEL directories
+    per level, with some excluded noise (node_modules, a lockfile) that the
+    scanner must skip. An existing tree with a matching marker is reused.
+    """
+    marker = root / ".synthetic.json"
+    if marker.is_file():
+        try:
+            if json.loads(marker.read_text(encoding="utf-8")).get("n_files") == n_files:
+                return root
+        except ValueError:
+            pass
+
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "package.json").write_text('{"name": "synthetic", "private": true}\n', encoding="utf-8")
+    (root / "tsconfig.json").write_text(
+        '{"compilerOptions": {"baseUrl": ".", "paths": {"@/*": ["src/*"]}}}\n', encoding="utf-8"
+    )
+    (root / "package-lock.json").write_text("{}\n", encoding="utf-8")
+    noise = root / "node_modules" / "react"
+    noise.mkdir(parents=True, exist_ok=True)
+    (noise / "index.js").write_text("module.exports = {};\n", encoding="utf-8")
+
+    for i in range(n_files):
+        dir_index = i // FILES_PER_DIR
+        parts: List[str] = []
+        while True:
+            parts.append(f"d{dir_index % DIRS_PER_LEVEL}")
+            dir_index //= DIRS_PER_LEVEL
+            if not dir_index:
+                break
+        directory = root / "src" / Path(*reversed(parts))
+        directory.mkdir(parents=True, exist_ok=True)
+        name = f"Component{i}"
+        (directory / f"{name}.tsx").write_text(
+            f"export interface {name}Props {{ id: number; label: string }}\n"
+            f"export function {name}({{ id, label }}: {name}Props) {{\n"
+            f"  return <div data-id={{id}}>{{label}}</div>;\n"
+            "}\n",
+            encoding="utf-8",
+        )
+
+    marker.write_text(json.dumps({"n_files": n_files}), encoding="utf-8")
+    return root
+
+
+def make_large_tsx(n_components: int = 2000) -> str:
+    """
+    A large generated-looking TSX module with many relative imports and Tailwind
+    classes, some with invalid shades (e.g. bg-slate-750).
+    """
+    lines: List[str] = ['import React, { useState } from "react";']
+    for i in range(n_components):
+        lines.append(f'import {{ Widget{i} }} from "./widgets/Widget{i}";')
+    lines.append("")
+    lines.append("export default function App() {")
+    lines.append("  const [selected, setSelected] = useState<number | null>(null);")
+    lines.append("  return (")
+    lines.append('    <div className="min-h-screen bg-slate-900 text-slate-100">')
+    for i in range(n_components):
+        shade = (i * 37) % 1000
+        lines.append(
+            f'      <div className="flex gap-2 p-4 bg-slate-{shade} text-blue-{(shade + 50) % 1000} '
+            f'border-red-{(shade + 5) % 1000} hover:bg-emerald-{shade}" onClick={{() => setSelected({i})}}>'
+        )
+        lines.append(f"        <Widget{i} active={{selected === {i}}} />")
+        lines.append("      </div>")
+    lines.append("    </div>")
+    lines.append("  );")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
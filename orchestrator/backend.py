@@ -0,0 +1,525 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .cache import ResponseCache, get_default_cache
+from .endpoints import Endpoint, EndpointPool
+from .metrics import record_llm
+from .tracing import current_tracer, span
+
+
+DEFAULT_BASE_URL = "http://localhost:1234/v1"
+DEFAULT_POOL_SIZE = 8
+HEALTH_CHECK_TIMEOUT = (2, 5)
+
+
+def resolve_base_urls(base_url: str | None = None) -> List[str]:
+    """
+    Endpoint URLs to use: an explicit base_url, else LMSTUDIO_BASE_URLS
+    (comma-separated), else LMSTUDIO_BASE_URL, else the local default.
+    """
+    raw = base_url or os.getenv("LMSTUDIO_BASE_URLS") or os.getenv("LMSTUDIO_BASE_URL", DEFAULT_BASE_URL)
+    urls = [u.strip().rstrip("/") for u in raw.split(",") if u.strip()]
+    if not urls:
+        raise ValueError("No LM Studio endpoint configured.")
+    return urls
+
+
+@dataclass
+class StreamStats:
+    """
+    Latency figures for one streamed completion.
+
+    tokens is the server-reported completion token count when the server sends
+    a usage block, otherwise the number of content chunks (LM Studio emits
+    roughly one token per chunk).
+    """
+
+    started_at: float = field(default_factory=time.perf_counter)
+    first_token_at: float | None = None
+    finished_at: float | None = None
+    chunks: int = 0
+    prompt_tokens: int | None = None
+    completion_tokens: int | None = None
+    cached: bool = False
+
+    @property
+    def tokens(self) -> int:
+        return self.completion_tokens if self.completion_tokens is not None else self.chunks
+
+    @property
+    def ttft_seconds(self) -> float | None:
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+    @property
+    def tokens_per_second(self) -> float | None:
+        # Decode rate: tokens after the first one over the time spent producing them
+        if self.first_token_at is None or self.finished_at is None:
+            return None
+        decode_seconds = self.finished_at - self.first_token_at
+        if decode_seconds <= 0 or self.tokens <= 1:
+            return None
+        return (self.tokens - 1) / decode_seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        total = None if self.finished_at is None else self.finished_at - self.started_at
+        return {
+            "ttft_seconds": self.ttft_seconds,
+            "tokens": self.tokens,
+            "tokens_per_second": self.tokens_per_second,
+            "total_seconds": total,
+            "cached": self.cached,
+        }
+
+    def summary(self) -> str:
+        ttft = self.ttft_seconds
+        tps = self.tokens_per_second
+        return (
+            f"ttft={'n/a' if ttft is None else f'{ttft:.2f}s'} "
+            f"tokens={self.tokens} "
+            f"tok/s={'n/a' if tps is None else f'{tps:.1f}'}"
+            + (" (cached)" if self.cached else "")
+        )
+
+
+class LLMBackend:
+    """
+    Shared, connection-pooled transport for the LM Studio OpenAI-compatible API.
+
+    One backend owns one requests.Session with a keep-alive connection pool, so
+    consecutive LLM steps (and tasks running in the same process) reuse TCP
+    connections instead of paying connection setup on every call.
+
+    pool_size bounds both the number of pooled connections and the number of
+    in-flight requests per server; extra callers wait for a free slot.
+
+    With several servers (base_urls, or LMSTUDIO_BASE_URLS="url1,url2"),
+    requests go to the server with the fewest in-flight requests. Servers that
+    time out, refuse connections or answer 5xx are ejected until a GET /models
+    health check succeeds (see orchestrator.endpoints.EndpointPool), and a
+    refused connection is retried on another server. With
+    hedge_after_seconds (LMSTUDIO_HEDGE_AFTER_SEC) set, a non-streaming
+    request still running after that long is duplicated onto an idle server
+    and the first answer wins.
+
+    Every request reports its token usage to the running step's metrics
+    (see orchestrator.metrics). When tracing is active, each request is
+    recorded as trace spans: waiting for a free slot (llm.queue), the request
+    itself (llm.request) and, when streaming, time to first token
+    (llm.prefill) and generation (llm.decode).
+    """
+
+    def __init__(
+        self,
+        base_url: str | None = None,
+        api_key: str | None = None,
+        timeout_seconds: int | None = None,
+        pool_size: int | None = None,
+        cache: ResponseCache | None = None,
+        base_urls: List[str] | None = None,
+        hedge_after_seconds: float | None = None,
+    ) -> None:
+        self.base_urls = [u.rstrip("/") for u in base_urls] if base_urls else resolve_base_urls(base_url)
+        self.base_url = self.base_urls[0]
+        self.api_key = api_key or os.getenv("LMSTUDIO_API_KEY", "lm-studio")
+        self.timeout_seconds = timeout_seconds or int(os.getenv("LMSTUDIO_TIMEOUT_SEC", "600"))
+        self.pool_size = pool_size or int(os.getenv("LMSTUDIO_POOL_SIZE", str(DEFAULT_POOL_SIZE)))
+        self.cache = cache or get_default_cache()
+        if hedge_after_seconds is None:
+            hedge_after_seconds = float(os.getenv("LMSTUDIO_HEDGE_AFTER_SEC", "0"))
+        self.hedge_after_seconds = hedge_after_seconds
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=max(self.pool_size, len(self.base_urls)), pool_maxsize=self.pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(
+            {
+                "Content-Type": "application/json",
+                "Authorization": f"Bearer {self.api_key}",
+            }
+        )
+
+        self.pool = EndpointPool(self.base_urls, max_outstanding=self.pool_size, probe=self._probe)
+        # Worker threads for the async API; sized to the pool so every worker has a connection
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.pool_size * len(self.base_urls), thread_name_prefix="llm-backend"
+        )
+        self._hedge_executor: ThreadPoolExecutor | None = None
+        if self.hedge_after_seconds > 0 and len(self.base_urls) > 1:
+            self._hedge_executor = ThreadPoolExecutor(
+                max_workers=self.pool_size * len(self.base_urls), thread_name_prefix="llm-hedge"
+            )
+
+    def chat_completion(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str,
+        temperature: float = 0.0,
+        max_tokens: int | None = 4096,
+        use_cache: bool = True,
+        cache: ResponseCache | None = None,
+    ) -> str:
+        response_cache = (cache or self.cache) if use_cache else None
+        cache_key = None
+        if response_cache is not None:
+            cache_key = response_cache.make_key(model, messages, temperature, max_tokens)
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                record_llm(None, None, 0.0, cached=True)
+                tracer = current_tracer()
+                if tracer is not None:
+                    tracer.instant("llm.cache_hit", "llm", {"model": model})
+                return cached
+
+        payload: Dict[str, Any] = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+        }
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+
+        started = time.perf_counter()
+        data = self._post_json("/chat/completions", payload)
+
+        try:
+            content = data["choices"][0]["message"]["content"] or ""
+        except (KeyError, IndexError, TypeError) as exc:
+            raise RuntimeError(f"Unexpected LM Studio response: {data}") from exc
+
+        usage = data.get("usage") or {}
+        record_llm(usage.get("prompt_tokens"), usage.get("completion_tokens"), time.perf_counter() - started)
+
+        if response_cache is not None and cache_key is not None:
+            response_cache.put(cache_key, content)
+
+        return content
+
+    async def achat_completion(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str,
+        temperature: float = 0.0,
+        max_tokens: int | None = 4096,
+        use_cache: bool = True,
+        cache: ResponseCache | None = None,
+    ) -> str:
+        """
+        Awaitable chat_completion(): the blocking HTTP call runs on the backend's
+        worker threads, so the event loop stays free while the model decodes.
+        """
+        loop = asyncio.get_running_loop()
+        # Carry the caller's context (e.g. the running step's metrics) to the worker
+        call_context = contextvars.copy_context()
+        return await loop.run_in_executor(
+            self._executor,
+            call_context.run,
+            lambda: self.chat_completion(
+                messages=messages,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                use_cache=use_cache,
+                cache=cache,
+            ),
+        )
+
+    def stream_chat_completion(
+        self,
+        messages: List[Dict[str, Any]],
+        model: str,
+        temperature: float = 0.0,
+        max_tokens: int | None = 4096,
+        use_cache: bool = True,
+        cache: ResponseCache | None = None,
+        stats: StreamStats | None = None,
+    ) -> Iterator[str]:
+        """
+        Yield content deltas as the server produces them (OpenAI-compatible stream=True).
+
+        Closing the generator early (or raising from the consuming loop) closes
+        the HTTP response, which cancels the generation on the server. Only fully
+        received completions are written to the response cache.
+        """
+        stats = stats if stats is not None else StreamStats()
+
+        response_cache = (cache or self.cache) if use_cache else None
+        cache_key = None
+        if response_cache is not None:
+            cache_key = response_cache.make_key(model, messages, temperature, max_tokens)
+            cached = response_cache.get(cache_key)
+            if cached is not None:
+                stats.first_token_at = time.perf_counter()
+                stats.chunks = 1
+                stats.cached = True
+                stats.finished_at = stats.first_token_at
+                record_llm(None, None, 0.0, cached=True)
+                tracer = current_tracer()
+                if tracer is not None:
+                    tracer.instant("llm.cache_hit", "llm", {"model": model, "stream": True})
+                yield cached
+                return
+
+        payload: Dict[str, Any] = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "stream": True,
+            "stream_options": {"include_usage": True},
+        }
+        if max_tokens is not None:
+            payload["max_tokens"] = max_tokens
+
+        parts: List[str] = []
+        # Only a stream that ended properly is a complete answer worth caching
+        completed = False
+        tracer = current_tracer()
+
+        endpoint, resp, _, sent_at = self._send("/chat/completions", payload, stream=True)
+        # 4xx means the server is up and rejected this request
+        healthy = resp.status_code < 500
+        try:
+            resp.raise_for_status()
+            for line in resp.iter_lines(decode_unicode=True):
+                # Server-sent events: "data: {...}" lines, terminated by "data: [DONE]"
+                if not line or not line.startswith("data:"):
+                    continue
+                data_str = line[len("data:"):].strip()
+                if data_str == "[DONE]":
+                    completed = True
+                    break
+
+                try:
+                    event = json.loads(data_str)
+                except ValueError as exc:
+                    raise RuntimeError(f"Unexpected LM Studio stream event: {data_str}") from exc
+
+                usage = event.get("usage")
+                if usage and usage.get("completion_tokens") is not None:
+                    stats.completion_tokens = int(usage["completion_tokens"])
+                if usage and usage.get("prompt_tokens") is not None:
+                    stats.prompt_tokens = int(usage["prompt_tokens"])
+
+                choices = event.get("choices") or []
+                if not choices:
+                    continue
+                if choices[0].get("finish_reason"):
+                    completed = True
+                delta = (choices[0].get("delta") or {}).get("content")
+                if not delta:
+                    continue
+
+                if stats.first_token_at is None:
+                    stats.first_token_at = time.perf_counter()
+                stats.chunks += 1
+                parts.append(delta)
+                yield delta
+        except requests.exceptions.RequestException:
+            healthy = False
+            raise
+        finally:
+            stats.finished_at = time.perf_counter()
+            resp.close()
+            self.pool.release(endpoint, healthy, stats.finished_at - sent_at)
+            # Aborted streams still used the server
+            record_llm(stats.prompt_tokens, stats.tokens, stats.finished_at - stats.started_at)
+            if tracer is not None:
+                self._trace_stream(tracer, model, endpoint.url, stats, sent_at)
+
+        if completed and response_cache is not None and cache_key is not None:
+            response_cache.put(cache_key, "".join(parts))
+
+    @staticmethod
+    def _trace_stream(
+        tracer: Any, model: str, endpoint_url: str, stats: StreamStats, sent_at: float
+    ) -> None:
+        # llm.queue is recorded by _send(), like for non-streamed requests
+        finished_at = stats.finished_at or time.perf_counter()
+        tracer.complete(
+            "llm.request",
+            "llm",
+            sent_at,
+            finished_at,
+            {
+                "model": model,
+                "endpoint": endpoint_url,
+                "stream": True,
+                "prompt_tokens": stats.prompt_tokens,
+                "completion_tokens": stats.tokens,
+            },
+        )
+        if stats.first_token_at is not None:
+            tracer.complete("llm.prefill", "llm", sent_at, stats.first_token_at)
+            tracer.complete("llm.decode", "llm", stats.first_token_at, finished_at, {"tokens": stats.tokens})
+
+    def _timeout_error(self) -> RuntimeError:
+        return RuntimeError(
+            f"LM Studio timed out after {self.timeout_seconds}s. "
+            "The local model may be too slow or still loading. "
+            "Try lowering model size, ensuring the model is fully loaded, "
+            "or increasing LMSTUDIO_TIMEOUT_SEC."
+        )
+
+    def _send(
+        self,
+        path: str,
+        payload: Dict[str, Any],
+        stream: bool = False,
+        endpoint: Endpoint | None = None,
+    ) -> Tuple[Endpoint, requests.Response, float, float]:
+        """
+        POST payload to the least loaded endpoint (or the given, already
+        acquired one). Returns (endpoint, response, queued_at, sent_at); the
+        caller owns the endpoint slot and must release it.
+
+        A refused connection never reached the server, so it is retried on
+        another endpoint; a read timeout is not, since the server may still be
+        generating.
+        """
+        tracer = current_tracer()
+        attempts = 1 if endpoint is not None else len(self.pool)
+        for attempt in range(attempts):
+            queued_at = time.perf_counter()
+            if endpoint is None or attempt > 0:
+                endpoint = self.pool.acquire()
+            sent_at = time.perf_counter()
+            if tracer is not None:
+                tracer.complete("llm.queue", "llm", queued_at, sent_at)
+            try:
+                # timeout=(connect_timeout, read_timeout)
+                resp = self.session.post(
+                    f"{endpoint.url}{path}", json=payload, timeout=(10, self.timeout_seconds), stream=stream
+                )
+            except requests.exceptions.ReadTimeout as e:
+                self.pool.release(endpoint, ok=False)
+                raise self._timeout_error() from e
+            except requests.exceptions.ConnectionError:
+                self.pool.release(endpoint, ok=False)
+                if attempt == attempts - 1:
+                    raise
+                continue
+            return endpoint, resp, queued_at, sent_at
+        raise AssertionError("unreachable")
+
+    def _post_once(self, path: str, payload: Dict[str, Any], endpoint: Endpoint | None = None) -> Dict[str, Any]:
+        endpoint, resp, _, sent_at = self._send(path, payload, endpoint=endpoint)
+        healthy = resp.status_code < 500
+        try:
+            with span(
+                "llm.request", "llm", {"model": payload.get("model"), "path": path, "endpoint": endpoint.url}
+            ) as trace_args:
+                resp.raise_for_status()
+                data = resp.json()
+                usage = (data.get("usage") if isinstance(data, dict) else None) or {}
+                trace_args["prompt_tokens"] = usage.get("prompt_tokens")
+                trace_args["completion_tokens"] = usage.get("completion_tokens")
+                return data
+        except requests.exceptions.RequestException:
+            healthy = False
+            raise
+        finally:
+            self.pool.release(endpoint, healthy, time.perf_counter() - sent_at)
+
+    def _post_json(self, path: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        if self._hedge_executor is None:
+            return self._post_once(path, payload)
+
+        primary_endpoint = self.pool.acquire()
+        primary = self._hedge_executor.submit(
+            contextvars.copy_context().run, self._post_once, path, payload, primary_endpoint
+        )
+        try:
+            return primary.result(timeout=self.hedge_after_seconds)
+        except FutureTimeoutError:
+            pass
+
+        backup_endpoint = self.pool.try_acquire_idle(exclude=[primary_endpoint])
+        if backup_endpoint is None:
+            return primary.result()
+
+        tracer = current_tracer()
+        if tracer is not None:
+            tracer.instant("llm.hedge", "llm", {"primary": primary_endpoint.url, "backup": backup_endpoint.url})
+        backup = self._hedge_executor.submit(
+            contextvars.copy_context().run, self._post_once, path, payload, backup_endpoint
+        )
+        # First successful answer wins; the loser finishes in the background and frees its slot
+        pending: set[Future[Dict[str, Any]]] = {primary, backup}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    return future.result()
+        return primary.result()
+
+    def _probe(self, url: str) -> bool:
+        try:
+            resp = self.session.get(f"{url}/models", timeout=HEALTH_CHECK_TIMEOUT)
+        except requests.exceptions.RequestException:
+            return False
+        return resp.status_code < 500
+
+    def run_in_worker(self, fn, *args: Any) -> "asyncio.Future[Any]":
+        """
+        Run a blocking callable on the backend's worker threads from async code.
+        """
+        call_context = contextvars.copy_context()
+        return asyncio.get_running_loop().run_in_executor(self._executor, call_context.run, fn, *args)
+
+    def close(self) -> None:
+        self.pool.close()
+        self._executor.shutdown(wait=False)
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+        self.session.close()
+
+
+_backends: Dict[tuple, LLMBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def get_backend(
+    base_url: str | None = None,
+    api_key: str | None = None,
+    timeout_seconds: int | None = None,
+    pool_size: int | None = None,
+) -> LLMBackend:
+    """
+    Return the process-wide backend for the given endpoint(s), creating it on first use.
+
+    Every LLMStep and GenerateComponentStep pointing at the same server (or
+    LMSTUDIO_BASE_URLS pool) shares one backend, and therefore one connection pool.
+    """
+    # Resolve env defaults first so equivalent configurations share one backend
+    key = (
+        tuple(resolve_base_urls(base_url)),
+        api_key or os.getenv("LMSTUDIO_API_KEY", "lm-studio"),
+        timeout_seconds or int(os.getenv("LMSTUDIO_TIMEOUT_SEC", "600")),
+        pool_size or int(os.getenv("LMSTUDIO_POOL_SIZE", str(DEFAULT_POOL_SIZE))),
+    )
+    with _backends_lock:
+        backend = _backends.get(key)
+        if backend is None:
+            backend = LLMBackend(
+                base_urls=list(key[0]),
+                api_key=key[1],
+                timeout_seconds=key[2],
+                pool_size=key[3],
+            )
+            _backends[key] = backend
+        return backend
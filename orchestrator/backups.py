@@ -0,0 +1,370 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+from .metrics import record_bytes_read, record_bytes_written
+from .tracing import span
+
+
+BACKUP_DIR_NAME = ".orchestrator_backups"
+INDEX_FILE_NAME = "index.jsonl"
+LOCK_FILE_NAME = "index.lock"
+OBJECTS_DIR_NAME = "objects"
+DEFAULT_KEEP_PER_PATH = 20
+# Linux FICLONE ioctl: copy-on-write clone on btrfs / XFS / overlayfs over them
+FICLONE = 0x40049409
+
+
+@dataclass
+class BackupEntry:
+    """
+    One backup of one file: (path, time) -> blob.
+
+    size / mtime_ns / ino are the source file's stat at backup time, so an
+    unchanged file can be recognized without reading it. link is the
+    browsable .bak hardlink (relative to the backup root), if one was made.
+    """
+
+    path: str
+    time: float
+    blob: str
+    size: int
+    mtime_ns: int
+    ino: int
+    compressed: bool = False
+    link: str | None = None
+
+
+def _clone_file(src: Path, dst: Path) -> bool:
+    """
+    Reflink src to dst where the filesystem supports it (no data is copied).
+    """
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        with open(src, "rb") as fin, open(dst, "wb") as fout:
+            fcntl.ioctl(fout.fileno(), FICLONE, fin.fileno())
+        return True
+    except OSError:
+        dst.unlink(missing_ok=True)
+        return False
+
+
+class BackupStore:
+    """
+    Content-addressed, deduplicated backups under <project>/.orchestrator_backups/.
+
+    Each distinct content is stored once as objects/<sha[:2]>/<sha> (gzip'd as
+    <sha>.gz with compress=True), reflinked from the source where the
+    filesystem supports it. index.jsonl maps (path, time) to blobs, one JSON
+    line per backup. Other processes (CLI runs next to a daemon) may append
+    to or rewrite the index at any time: the in-memory copy is re-read when
+    the file's inode, size or mtime changed, and every change to the index
+    re-reads it under an exclusive flock on index.lock first. Uncompressed backups also get a browsable
+    <rel_path>.<timestamp>.bak hardlink to their blob, as before.
+
+    backup() skips files unchanged since their last backup; an unchanged
+    size/mtime/inode is recognized without reading the file. Retention keeps
+    the newest keep entries per path and, with max_age_days, drops older ones;
+    blobs no entry refers to are deleted.
+
+    Config: ORCHESTRATOR_BACKUP_COMPRESS (default off), ORCHESTRATOR_BACKUP_KEEP
+    (default 20, 0 = unlimited), ORCHESTRATOR_BACKUP_MAX_AGE_DAYS (default 0 = off).
+    """
+
+    def __init__(
+        self,
+        project_path: Path,
+        compress: bool | None = None,
+        keep: int | None = None,
+        max_age_days: float | None = None,
+    ) -> None:
+        self.root = project_path / BACKUP_DIR_NAME
+        if compress is None:
+            compress = os.getenv("ORCHESTRATOR_BACKUP_COMPRESS", "") not in ("", "0", "false", "False")
+        self.compress = compress
+        self.keep = keep if keep is not None else int(os.getenv("ORCHESTRATOR_BACKUP_KEEP", str(DEFAULT_KEEP_PER_PATH)))
+        self.max_age_days = (
+            max_age_days if max_age_days is not None else float(os.getenv("ORCHESTRATOR_BACKUP_MAX_AGE_DAYS", "0"))
+        )
+        self._lock = threading.Lock()
+        self._entries: List[BackupEntry] | None = None
+        # (inode, size, mtime_ns) of index.jsonl when _entries was read
+        self._index_stat: Tuple[int, int, int] | None = None
+
+    @property
+    def index_path(self) -> Path:
+        return self.root / INDEX_FILE_NAME
+
+    # --- index ---
+
+    def _stat_index(self) -> Tuple[int, int, int] | None:
+        try:
+            st = self.index_path.stat()
+        except OSError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def _load(self) -> List[BackupEntry]:
+        """
+        The index entries, re-read if index.jsonl changed since the last read.
+        Caller must hold self._lock.
+        """
+        # Stat before reading: a write in between only causes one more re-read
+        index_stat = self._stat_index()
+        if self._entries is None or index_stat != self._index_stat:
+            entries: List[BackupEntry] = []
+            try:
+                raw = self.index_path.read_bytes()
+            except OSError:
+                raw = b""
+            record_bytes_read(len(raw))
+            for line in raw.decode("utf-8").splitlines():
+                try:
+                    entries.append(BackupEntry(**json.loads(line)))
+                except (ValueError, TypeError):
+                    continue
+            self._entries = entries
+            self._index_stat = index_stat
+        return self._entries
+
+    @contextmanager
+    def _locked_index(self) -> Iterator[List[BackupEntry]]:
+        """
+        Hold self._lock and an exclusive flock on index.lock (where fcntl
+        exists), and yield the index as currently on disk.
+        """
+        try:
+            import fcntl
+        except ImportError:
+            fcntl = None  # type: ignore[assignment]
+        with self._lock:
+            self.root.mkdir(parents=True, exist_ok=True)
+            with open(self.root / LOCK_FILE_NAME, "a+b") as lock_file:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+                try:
+                    yield self._load()
+                finally:
+                    if fcntl is not None:
+                        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+    def _append(self, entry: BackupEntry) -> None:
+        """
+        Caller must hold _locked_index().
+        """
+        line = (json.dumps(asdict(entry), separators=(",", ":")) + "\n").encode("utf-8")
+        with open(self.index_path, "ab") as fh:
+            fh.write(line)
+        record_bytes_written(len(line))
+        # _entries was read under the same lock, so it is the index minus this line
+        assert self._entries is not None
+        self._entries.append(entry)
+        self._index_stat = self._stat_index()
+
+    def _rewrite(self, entries: List[BackupEntry]) -> None:
+        """
+        Caller must hold _locked_index() and pass entries derived from it.
+        """
+        raw = "".join(json.dumps(asdict(e), separators=(",", ":")) + "\n" for e in entries).encode("utf-8")
+        tmp_path = self.index_path.with_name(f"{INDEX_FILE_NAME}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(raw)
+        os.replace(tmp_path, self.index_path)
+        record_bytes_written(len(raw))
+        self._entries = entries
+        self._index_stat = self._stat_index()
+
+    def entries(self, rel_path: str | None = None) -> List[BackupEntry]:
+        """
+        Backups, oldest first; only those of rel_path if given.
+        """
+        with self._lock:
+            return [e for e in self._load() if rel_path is None or e.path == rel_path]
+
+    # --- blobs ---
+
+    def _blob_path(self, digest: str, compressed: bool) -> Path:
+        return self.root / OBJECTS_DIR_NAME / digest[:2] / (f"{digest}.gz" if compressed else digest)
+
+    def _store_blob(self, source: Path, data: bytes, digest: str) -> bool:
+        """
+        Store data under its digest unless an identical blob exists. Returns
+        whether the stored blob is compressed.
+        """
+        for compressed in (False, True):
+            if self._blob_path(digest, compressed).is_file():
+                return compressed
+
+        blob = self._blob_path(digest, self.compress)
+        blob.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = blob.with_name(f"{blob.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        if self.compress:
+            payload = gzip.compress(data, compresslevel=6)
+            tmp_path.write_bytes(payload)
+            record_bytes_written(len(payload))
+        elif not _clone_file(source, tmp_path):
+            tmp_path.write_bytes(data)
+            record_bytes_written(len(data))
+        os.chmod(tmp_path, 0o444)
+        os.replace(tmp_path, blob)
+        return self.compress
+
+    def read(self, entry: BackupEntry) -> bytes:
+        data = self._blob_path(entry.blob, entry.compressed).read_bytes()
+        record_bytes_read(len(data))
+        return gzip.decompress(data) if entry.compressed else data
+
+    # --- backup / restore / retention ---
+
+    def backup(self, source: Path, rel_path: str) -> BackupEntry | None:
+        """
+        Back up source (stored as rel_path). Returns the new entry, or None
+        when source is missing or unchanged since its last backup.
+        """
+        try:
+            st = source.stat()
+        except OSError:
+            return None
+
+        source_stat = (st.st_size, st.st_mtime_ns, st.st_ino)
+
+        def latest(entries: List[BackupEntry]) -> BackupEntry | None:
+            return next((e for e in reversed(entries) if e.path == rel_path), None)
+
+        def unchanged(entry: BackupEntry | None) -> bool:
+            return entry is not None and (entry.size, entry.mtime_ns, entry.ino) == source_stat
+
+        with self._lock:
+            if unchanged(latest(self._load())):
+                return None
+
+        with span("file.backup", "file", {"path": rel_path}) as trace_args:
+            data = source.read_bytes()
+            record_bytes_read(len(data))
+            digest = hashlib.sha256(data).hexdigest()
+
+            with self._locked_index() as entries:
+                # Another process may have backed the file up in the meantime
+                previous = latest(entries)
+                if unchanged(previous):
+                    return None
+                if previous is not None and previous.blob == digest:
+                    # Touched but identical: remember the new stat, keep the old backup
+                    previous.size, previous.mtime_ns, previous.ino = source_stat
+                    self._rewrite(entries)
+                    trace_args.update(deduplicated=True)
+                    return None
+
+                compressed = self._store_blob(source, data, digest)
+                now = time.time()
+                link = None if compressed else self._link(digest, rel_path, now)
+                entry = BackupEntry(
+                    path=rel_path,
+                    time=now,
+                    blob=digest,
+                    size=st.st_size,
+                    mtime_ns=st.st_mtime_ns,
+                    ino=st.st_ino,
+                    compressed=compressed,
+                    link=link,
+                )
+                self._append(entry)
+                self._prune_locked(rel_path)
+                trace_args.update(blob=digest[:12])
+        return entry
+
+    def _link(self, digest: str, rel_path: str, when: float) -> str | None:
+        # .orchestrator_backups/src/App.tsx.20251205-132045-123456.bak
+        stamp = datetime.fromtimestamp(when).strftime("%Y%m%d-%H%M%S-%f")
+        link = self.root / f"{rel_path}.{stamp}.bak"
+        try:
+            link.parent.mkdir(parents=True, exist_ok=True)
+            os.link(self._blob_path(digest, False), link)
+        except OSError:
+            # No hardlinks here (or a name clash): the index entry is enough
+            return None
+        return link.relative_to(self.root).as_posix()
+
+    def restore(self, rel_path: str, target: Path, before: float | None = None) -> BackupEntry:
+        """
+        Write the newest backup of rel_path (taken at or before `before`, if
+        given) back to target.
+        """
+        from .fileio import write_bytes_atomic
+
+        candidates = [e for e in self.entries(rel_path) if before is None or e.time <= before]
+        if not candidates:
+            raise KeyError(f"No backup of '{rel_path}'")
+        entry = candidates[-1]
+        write_bytes_atomic(target, self.read(entry))
+        return entry
+
+    def prune(self, rel_path: str | None = None) -> int:
+        """
+        Apply the retention policy (to one path, or all). Returns the number of
+        entries removed.
+        """
+        with self._locked_index():
+            return self._prune_locked(rel_path)
+
+    def _prune_locked(self, rel_path: str | None) -> int:
+        """
+        Caller must hold _locked_index().
+        """
+        entries = self._load()
+        cutoff = time.time() - self.max_age_days * 86400 if self.max_age_days > 0 else None
+
+        by_path: Dict[str, List[BackupEntry]] = {}
+        for e in entries:
+            if rel_path is None or e.path == rel_path:
+                by_path.setdefault(e.path, []).append(e)
+
+        doomed: List[BackupEntry] = []
+        for path_entries in by_path.values():
+            for i, e in enumerate(reversed(path_entries)):
+                # The newest backup of a path is always kept
+                if i > 0 and ((self.keep > 0 and i >= self.keep) or (cutoff is not None and e.time < cutoff)):
+                    doomed.append(e)
+        if not doomed:
+            return 0
+
+        doomed_ids = {id(e) for e in doomed}
+        kept = [e for e in entries if id(e) not in doomed_ids]
+        self._rewrite(kept)
+
+        referenced = {(e.blob, e.compressed) for e in kept}
+        for e in doomed:
+            if e.link:
+                (self.root / e.link).unlink(missing_ok=True)
+            if (e.blob, e.compressed) not in referenced:
+                self._blob_path(e.blob, e.compressed).unlink(missing_ok=True)
+        return len(doomed)
+
+
+_stores: Dict[Path, BackupStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_backup_store(project_path: Path) -> BackupStore:
+    """
+    The process-wide BackupStore of a project, shared so that concurrent
+    steps append to (and prune) one in-memory index.
+    """
+    key = project_path.resolve()
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = _stores[key] = BackupStore(key)
+        return store
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import contextvars
+import glob
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, List
+
+from .checkpoint import CheckpointStore
+from .engine import Engine
+from .tracing import Tracer, activated, span
+
+
+@dataclass
+class BatchItem:
+    input_path: Path
+    output_path: Path
+
+
+@dataclass
+class BatchItemResult:
+    item: BatchItem
+    ok: bool
+    seconds: float
+    error: str | None = None
+    files_written: int = 0
+    files_unchanged: int = 0
+
+
+@dataclass
+class BatchSummary:
+    results: List[BatchItemResult] = field(default_factory=list)
+    wall_seconds: float = 0.0
+
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for r in self.results if r.ok)
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for r in self.results if not r.ok)
+
+    @property
+    def throughput(self) -> float:
+        return len(self.results) / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    def latency_percentile(self, pct: float) -> float:
+        latencies = sorted(r.seconds for r in self.results)
+        if not latencies:
+            return 0.0
+        index = min(len(latencies) - 1, max(0, int(round(pct / 100.0 * len(latencies))) - 1))
+        return latencies[index]
+
+    def format(self) -> str:
+        lines = [
+            f"[batch] {len(self.results)} items: {self.succeeded} ok, {self.failed} failed "
+            f"in {self.wall_seconds:.2f}s ({self.throughput:.2f} items/s)",
+            f"[batch] latency p50={self.latency_percentile(50):.2f}s "
+            f"p95={self.latency_percentile(95):.2f}s "
+            f"max={self.latency_percentile(100):.2f}s",
+            f"[batch] files: {sum(r.files_written for r in self.results)} written, "
+            f"{sum(r.files_unchanged for r in self.results)} unchanged",
+        ]
+        for r in self.results:
+            if not r.ok:
+                lines.append(f"[batch] FAILED {r.item.input_path}: {r.error}")
+        return "\n".join(lines)
+
+
+def collect_inputs(patterns: Iterable[str]) -> List[Path]:
+    """
+    Expand glob patterns (recursive ** supported) into a sorted, de-duplicated file list.
+    """
+    paths: set[Path] = set()
+    for pattern in patterns:
+        for match in glob.glob(pattern, recursive=True):
+            p = Path(match)
+            if p.is_file():
+                paths.add(p)
+    return sorted(paths)
+
+
+def plan_items(inputs: List[Path], output_dir: Path, suffix: str | None = None) -> List[BatchItem]:
+    """
+    Map each input to output_dir, preserving its path relative to the inputs' common parent.
+    """
+    if not inputs:
+        return []
+    base = Path(os.path.commonpath([str(p.resolve().parent) for p in inputs]))
+
+    items: List[BatchItem] = []
+    for p in inputs:
+        rel = p.resolve().relative_to(base)
+        out = output_dir / rel
+        if suffix:
+            out = out.with_name(out.name + suffix)
+        items.append(BatchItem(input_path=p, output_path=out))
+    return items
+
+
+def load_manifest(manifest_path: Path, output_dir: Path | None = None, suffix: str | None = None) -> List[BatchItem]:
+    """
+    Read a manifest of inputs.
+
+    Each non-empty line is either a plain input path, or a JSON object
+    {"input": "...", "output": "..."}. Plain paths (and objects without
+    "output") get an output path under output_dir.
+    """
+    explicit: List[BatchItem] = []
+    implicit: List[Path] = []
+
+    for raw in manifest_path.read_text(encoding="utf-8").splitlines():
+        line = raw.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("{"):
+            entry = json.loads(line)
+            if entry.get("output"):
+                explicit.append(BatchItem(Path(entry["input"]), Path(entry["output"])))
+                continue
+            implicit.append(Path(entry["input"]))
+        else:
+            implicit.append(Path(line))
+
+    if implicit and output_dir is None:
+        raise ValueError("Manifest entries without an output path require an output directory.")
+
+    return explicit + (plan_items(implicit, output_dir, suffix) if implicit else [])
+
+
+class BatchRunner:
+    """
+    Runs one engine per input on a bounded worker pool.
+
+    build_engine(input_path=..., output_path=...) must return a fresh Engine for
+    the item. A failing item is recorded in the summary and does not stop the batch.
+
+    With a tracer, every item and everything its engine does is recorded as
+    trace spans on one timeline.
+
+    With a checkpoint store, every item's engine checkpoints its steps, and
+    resume=True continues failed items from their last finished step.
+    """
+
+    def __init__(
+        self,
+        build_engine: Callable[..., Engine],
+        max_workers: int = 4,
+        progress: bool = True,
+        tracer: Tracer | None = None,
+        checkpoints: CheckpointStore | None = None,
+        resume: bool = False,
+    ) -> None:
+        self.build_engine = build_engine
+        self.max_workers = max(1, max_workers)
+        self.progress = progress
+        self.tracer = tracer
+        self.checkpoints = checkpoints
+        self.resume = resume
+        self._print_lock = threading.Lock()
+
+    def _run_item(self, item: BatchItem) -> BatchItemResult:
+        started = time.perf_counter()
+        try:
+            with span("batch item", "batch", {"input": str(item.input_path)}):
+                engine = self.build_engine(input_path=item.input_path, output_path=item.output_path)
+                if self.checkpoints is not None and engine.checkpoints is None:
+                    engine.checkpoints = self.checkpoints
+                engine.run(resume=self.resume)
+        except Exception as exc:
+            return BatchItemResult(item, ok=False, seconds=time.perf_counter() - started, error=f"{type(exc).__name__}: {exc}")
+        totals = engine.last_report.totals() if engine.last_report is not None else {}
+        return BatchItemResult(
+            item,
+            ok=True,
+            seconds=time.perf_counter() - started,
+            files_written=totals.get("files_written", 0),
+            files_unchanged=totals.get("files_unchanged", 0),
+        )
+
+    def run(self, items: List[BatchItem]) -> BatchSummary:
+        summary = BatchSummary()
+        started = time.perf_counter()
+        total = len(items)
+
+        with activated(self.tracer), ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="batch") as pool:
+            # Workers inherit the caller's context (active tracer)
+            futures = [pool.submit(contextvars.copy_context().run, self._run_item, item) for item in items]
+            for fut in as_completed(futures):
+                result = fut.result()
+                summary.results.append(result)
+                if self.progress:
+                    status = "ok" if result.ok else "FAILED"
+                    if result.ok and result.files_unchanged and not result.files_written:
+                        status = "ok, unchanged"
+                    with self._print_lock:
+                        print(
+                            f"[batch] {len(summary.results)}/{total} {status} "
+                            f"{result.item.input_path} ({result.seconds:.2f}s)"
+                        )
+
+        summary.wall_seconds = time.perf_counter() - started
+        return summary
@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List
+
+
+DEFAULT_CACHE_DIR = ".orchestrator_cache/llm"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MiB
+
+
+class ResponseCache:
+    """
+    Persistent, content-addressed cache of LLM responses.
+
+    Each entry is keyed by a SHA-256 of (model, messages, temperature, max_tokens)
+    and stored as one small JSON file under <cache_dir>/<key[:2]>/<key>.json.
+
+    Eviction is LRU by file mtime: a hit touches the entry, and when the total
+    size exceeds max_bytes the least recently used entries are deleted.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str | Path | None = None,
+        max_bytes: int | None = None,
+        bypass: bool | None = None,
+    ) -> None:
+        self.cache_dir = Path(cache_dir or os.getenv("ORCHESTRATOR_CACHE_DIR", DEFAULT_CACHE_DIR))
+        self.max_bytes = max_bytes or int(os.getenv("ORCHESTRATOR_CACHE_MAX_BYTES", str(DEFAULT_MAX_BYTES)))
+        if bypass is None:
+            bypass = os.getenv("ORCHESTRATOR_CACHE_BYPASS", "") not in ("", "0", "false", "False")
+        # bypass=True: never read or write the cache, always call the model
+        self.bypass = bypass
+
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._total_bytes: int | None = None  # computed lazily on first put
+
+    @staticmethod
+    def make_key(
+        model: str,
+        messages: List[Dict[str, Any]],
+        temperature: float,
+        max_tokens: int | None,
+    ) -> str:
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        }
+        # sort_keys + compact separators -> byte-identical prompts map to the same key
+        raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> str | None:
+        if self.bypass:
+            return None
+
+        path = self._entry_path(key)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            content = data["content"]
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+
+        try:
+            # Mark as recently used for LRU eviction
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        with self._lock:
+            self.hits += 1
+        return content
+
+    def put(self, key: str, content: str) -> None:
+        if self.bypass:
+            return
+
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        raw = json.dumps({"key": key, "content": content}, ensure_ascii=False)
+
+        # Write to a temp file and swap in, so concurrent readers never see a partial entry
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.write_text(raw, encoding="utf-8")
+        new_size = tmp_path.stat().st_size
+
+        with self._lock:
+            # Overwriting an entry only grows the cache by the size difference
+            try:
+                old_size = path.stat().st_size
+            except OSError:
+                old_size = 0
+            os.replace(tmp_path, path)
+
+            if self._total_bytes is None:
+                self._total_bytes = self._scan_size()
+            else:
+                self._total_bytes += new_size - old_size
+            if self._total_bytes > self.max_bytes:
+                self._evict()
+
+    def _entries(self) -> list[tuple[float, int, Path]]:
+        entries: list[tuple[float, int, Path]] = []
+        if not self.cache_dir.is_dir():
+            return entries
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> None:
+        """
+        Delete least recently used entries until the cache is at most 90% of max_bytes.
+        Caller must hold self._lock.
+        """
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                continue
+            total -= size
+
+        self._total_bytes = total
+
+    def clear(self) -> None:
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses}
+
+
+_default_cache: ResponseCache | None = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_cache() -> ResponseCache:
+    """
+    Return the process-wide response cache shared by all LLM call paths.
+    """
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache()
+        return _default_cache
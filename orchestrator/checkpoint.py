@@ -0,0 +1,241 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Set, Tuple
+
+from .metrics import RUN_REPORT_KEY
+from .tracing import span
+from .steps.base import Context, Step
+
+
+DEFAULT_CHECKPOINT_DIR = ".orchestrator_cache/checkpoints"
+# Restored values larger than this are read from disk only when a step uses them
+DEFAULT_LAZY_BYTES = 64 * 1024
+CHECKPOINT_VERSION = 1
+
+
+def _value_digest(value: Any) -> str:
+    try:
+        raw = json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    except (TypeError, ValueError):
+        try:
+            raw = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        except Exception:
+            return f"<{type(value).__qualname__}>"
+    return hashlib.sha256(raw).hexdigest()
+
+
+def pipeline_key(steps: Iterable[Step], initial_context: Context) -> str:
+    """
+    Hash of the pipeline definition (every step's fingerprint(), in order) and
+    its inputs (the initial context). Any change starts a fresh checkpoint set.
+    """
+    payload = {
+        "version": CHECKPOINT_VERSION,
+        "steps": [step.fingerprint() for step in steps],
+        "inputs": {str(k): _value_digest(v) for k, v in sorted(initial_context.items()) if k != RUN_REPORT_KEY},
+    }
+    raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LazyContext(dict):
+    """
+    Context dict whose restored large values are unpickled on first access.
+
+    Lazy keys behave like ordinary keys for lookups, membership, iteration and
+    len(); item/values views load every pending value first.
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._lazy: Dict[str, Callable[[], Any]] = {}
+        self._lazy_lock = threading.Lock()
+
+    def add_lazy(self, key: str, loader: Callable[[], Any]) -> None:
+        super().pop(key, None)
+        self._lazy[key] = loader
+
+    def _load(self, key: str) -> bool:
+        with self._lazy_lock:
+            loader = self._lazy.pop(key, None)
+            if loader is None:
+                return dict.__contains__(self, key)
+            dict.__setitem__(self, key, loader())
+            return True
+
+    def _load_all(self) -> None:
+        for key in list(self._lazy):
+            self._load(key)
+
+    def __missing__(self, key: str) -> Any:
+        if key in self._lazy and self._load(key):
+            return dict.__getitem__(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._lazy.pop(key, None)
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key: str) -> None:
+        if self._lazy.pop(key, None) is not None and not dict.__contains__(self, key):
+            return
+        super().__delitem__(key)
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._lazy or super().__contains__(key)
+
+    def __iter__(self) -> Iterator[str]:
+        yield from list(super().keys()) + list(self._lazy)
+
+    def __len__(self) -> int:
+        return super().__len__() + len(self._lazy)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def pop(self, key: str, *default: Any) -> Any:
+        if key in self._lazy:
+            self._load(key)
+        return super().pop(key, *default)
+
+    def keys(self):  # type: ignore[override]
+        self._load_all()
+        return super().keys()
+
+    def items(self):  # type: ignore[override]
+        self._load_all()
+        return super().items()
+
+    def values(self):  # type: ignore[override]
+        self._load_all()
+        return super().values()
+
+    def copy(self) -> Dict[str, Any]:  # type: ignore[override]
+        self._load_all()
+        return dict(super().items())
+
+
+class CheckpointRun:
+    """
+    Checkpoints of one pipeline (one key) under <root>/<key>/.
+
+    After each step, the context keys it writes (the whole context for barrier
+    steps) are pickled to values/<index>-<hash>.pkl, then a small
+    step-<index>.json record is written. The record is the commit marker, so a
+    step interrupted mid-save is simply re-run.
+    """
+
+    def __init__(self, directory: Path, lazy_bytes: int = DEFAULT_LAZY_BYTES) -> None:
+        self.directory = directory
+        self.lazy_bytes = lazy_bytes
+        self._lock = threading.Lock()
+
+    def _record_path(self, index: int) -> Path:
+        return self.directory / f"step-{index:04d}.json"
+
+    @staticmethod
+    def _write_atomic(path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def save(self, index: int, step: Step, context: Context) -> bool:
+        """
+        Checkpoint step index after it finished. Returns False (and writes no
+        record) when one of its values cannot be pickled.
+        """
+        writes = step.writes()
+        keys = [k for k in (context if writes is None else writes) if k in context and k != RUN_REPORT_KEY]
+
+        with span("checkpoint.save", "checkpoint", {"step": step.name, "index": index}):
+            entries: Dict[str, Dict[str, Any]] = {}
+            for key in keys:
+                try:
+                    raw = pickle.dumps(context[key], protocol=pickle.HIGHEST_PROTOCOL)
+                except Exception as exc:
+                    print(f"[checkpoint] Not checkpointing step '{step.name}': cannot pickle '{key}' ({exc})")
+                    return False
+                name = f"{index:04d}-{hashlib.sha1(key.encode('utf-8')).hexdigest()[:12]}.pkl"
+                self._write_atomic(self.directory / "values" / name, raw)
+                entries[key] = {"file": name, "bytes": len(raw)}
+
+            record = {"index": index, "step": step.name, "barrier": writes is None, "values": entries}
+            with self._lock:
+                self._write_atomic(self._record_path(index), json.dumps(record).encode("utf-8"))
+        return True
+
+    def completed(self) -> Dict[int, Dict[str, Any]]:
+        records: Dict[int, Dict[str, Any]] = {}
+        if not self.directory.is_dir():
+            return records
+        for path in self.directory.glob("step-*.json"):
+            try:
+                record = json.loads(path.read_text(encoding="utf-8"))
+                records[int(record["index"])] = record
+            except (OSError, ValueError, KeyError):
+                continue
+        return records
+
+    def _loader(self, path: Path) -> Callable[[], Any]:
+        def load() -> Any:
+            with span("checkpoint.load", "checkpoint", {"path": path.name}):
+                return pickle.loads(path.read_bytes())
+
+        return load
+
+    def restore(self, dependencies: List[Set[int]], context: Context) -> Tuple[Set[int], LazyContext]:
+        """
+        Restore every completed step whose dependencies are completed too into
+        a LazyContext over context. Returns (restored step indices, context).
+        """
+        records = self.completed()
+        restored: Set[int] = set()
+        for index in range(len(dependencies)):
+            if index in records and dependencies[index] <= restored:
+                restored.add(index)
+
+        lazy = context if isinstance(context, LazyContext) else LazyContext(context)
+        values_dir = self.directory / "values"
+        for index in sorted(restored):
+            for key, entry in records[index]["values"].items():
+                path = values_dir / entry["file"]
+                if entry["bytes"] > self.lazy_bytes:
+                    lazy.add_lazy(key, self._loader(path))
+                else:
+                    lazy[key] = self._loader(path)()
+        return restored, lazy
+
+    def clear(self) -> None:
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class CheckpointStore:
+    """
+    Local store of per-step Engine checkpoints, one directory per pipeline key
+    (see pipeline_key()). Location: root, ORCHESTRATOR_CHECKPOINT_DIR, or
+    .orchestrator_cache/checkpoints.
+    """
+
+    def __init__(self, root: str | Path | None = None, lazy_bytes: int | None = None) -> None:
+        self.root = Path(root or os.getenv("ORCHESTRATOR_CHECKPOINT_DIR", DEFAULT_CHECKPOINT_DIR))
+        self.lazy_bytes = lazy_bytes if lazy_bytes is not None else DEFAULT_LAZY_BYTES
+
+    def open(self, key: str) -> CheckpointRun:
+        return CheckpointRun(self.root / key, lazy_bytes=self.lazy_bytes)
+
+
+def default_checkpoint_store() -> CheckpointStore | None:
+    """
+    A CheckpointStore when ORCHESTRATOR_CHECKPOINTS is set (e.g. to 1), else None.
+    """
+    if os.getenv("ORCHESTRATOR_CHECKPOINTS", "") in ("", "0", "false", "False"):
+        return None
+    return CheckpointStore()
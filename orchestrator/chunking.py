@@ -0,0 +1,129 @@
+from __future__ import annotations
+
+import os
+import re
+from typing import Callable, List, Sequence
+
+from .codegen.context_packer import CHARS_PER_TOKEN, estimate_tokens
+
+
+DEFAULT_CHUNK_TOKENS = 4096
+DEFAULT_CHUNK_WORKERS = 4
+
+_FENCE = re.compile(r"^\s*(```|~~~)")
+_MAJOR_HEADING = re.compile(r"^#{1,2}\s")
+_MINOR_HEADING = re.compile(r"^#{3,6}\s")
+# Top-level definitions in Python / JS / TS / Go / Rust sources (column 0 only)
+_TOP_LEVEL_DEF = re.compile(
+    r"^(?:@\w|(?:export\s+)?(?:default\s+)?(?:async\s+)?(?:pub\s+)?"
+    r"(?:def|class|function|interface|type|enum|const|let|var|fn|func|struct|impl|trait|module)\b)"
+)
+
+# A boundary predicate decides whether line i starts a new section
+Boundary = Callable[[Sequence[str], Sequence[bool], int], bool]
+
+
+def _heading(pattern: re.Pattern) -> Boundary:
+    def starts(lines: Sequence[str], fenced: Sequence[bool], i: int) -> bool:
+        return not fenced[i] and pattern.match(lines[i]) is not None
+
+    return starts
+
+
+def _top_level_def(lines: Sequence[str], fenced: Sequence[bool], i: int) -> bool:
+    if fenced[i] or _TOP_LEVEL_DEF.match(lines[i]) is None:
+        return False
+    # A decorated definition starts at its first decorator
+    return i == 0 or not lines[i - 1].startswith("@")
+
+
+def _paragraph(lines: Sequence[str], fenced: Sequence[bool], i: int) -> bool:
+    return i > 0 and bool(lines[i].strip()) and not lines[i - 1].strip()
+
+
+def _any_line(lines: Sequence[str], fenced: Sequence[bool], i: int) -> bool:
+    return True
+
+
+# Coarsest first: a section over budget is re-split at the next level
+BOUNDARIES: List[Boundary] = [
+    _heading(_MAJOR_HEADING),
+    _heading(_MINOR_HEADING),
+    _top_level_def,
+    _paragraph,
+    _any_line,
+]
+
+
+def _fence_flags(lines: Sequence[str]) -> List[bool]:
+    """
+    True for lines inside (or opening) a ``` fenced block, where '#' lines
+    are code comments rather than headings.
+    """
+    flags: List[bool] = []
+    inside = False
+    for line in lines:
+        if _FENCE.match(line):
+            flags.append(True)
+            inside = not inside
+        else:
+            flags.append(inside)
+    return flags
+
+
+def split_chunks(text: str, max_tokens: int = DEFAULT_CHUNK_TOKENS) -> List[str]:
+    """
+    Split text into pieces of at most max_tokens (estimated) on structural
+    boundaries: Markdown headings first, then top-level definitions, blank
+    lines, single lines and, for one overlong line, a plain character cut.
+    Neighbouring small sections are packed together up to the budget.
+
+    "".join(split_chunks(text)) == text.
+    """
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be positive.")
+    budget = max(1, int(max_tokens * CHARS_PER_TOKEN))
+    if len(text) <= budget:
+        return [text] if text else []
+
+    lines = text.splitlines(keepends=True)
+    fenced = _fence_flags(lines)
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+
+    chunks: List[str] = []
+
+    def split(start: int, end: int, level: int) -> None:
+        if level >= len(BOUNDARIES):
+            # A single line longer than the budget
+            piece = "".join(lines[start:end])
+            chunks.extend(piece[i : i + budget] for i in range(0, len(piece), budget))
+            return
+
+        starts = [start] + [i for i in range(start + 1, end) if BOUNDARIES[level](lines, fenced, i)]
+        starts.append(end)
+
+        current = starts[0]
+        for a, b in zip(starts, starts[1:]):
+            if offsets[b] - offsets[a] > budget:
+                if a > current:
+                    chunks.append("".join(lines[current:a]))
+                split(a, b, level + 1)
+                current = b
+            elif offsets[b] - offsets[current] > budget:
+                chunks.append("".join(lines[current:a]))
+                current = a
+        if end > current:
+            chunks.append("".join(lines[current:end]))
+
+    split(0, len(lines), 0)
+    return chunks
+
+
+def chunk_tokens_from_env() -> int:
+    """
+    ORCHESTRATOR_CHUNK_TOKENS as an int; 0 (the default) disables chunking.
+    """
+    return int(os.getenv("ORCHESTRATOR_CHUNK_TOKENS", "0"))
+
@@ -1,6 +1,11 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING:
+    from orchestrator.metrics import RunReport
+    from .path_index import PathIndex
+    from .retrieval import RetrievalIndex
 
 @dataclass
 class CodegenContext:
@@ -10,7 +15,17 @@ class CodegenContext:
 
     spec_text: Optional[str] = None
     generated_code: Optional[str] = None
+    generated_imports: Optional[List[str]] = None  # import specifiers of generated_code, collected while cleaning it
     project_context: Optional[str] = None  # JSON blob / summary
+    project_files: Optional[List[Dict[str, Any]]] = None  # complete scan: {"path", "size_bytes", "mtime_ns"}
+    path_index: Optional["PathIndex"] = None  # import resolution over project_files
+    retrieval_index: Optional["RetrievalIndex"] = None  # BM25 over project source files
+    stream_stats: Optional[Dict[str, Any]] = None  # ttft / tokens/sec when streaming
+    file_written: Optional[bool] = None  # False when the target already had the generated content
+    run_report: Optional["RunReport"] = None  # per-step metrics of the CodegenTask run
+    # Other files generated in the same run (posix paths relative to project_path);
+    # imports of these are allowed even though they may not exist on disk yet
+    planned_files: List[str] = field(default_factory=list)
 
     @property
     def abs_target_file(self) -> Path:
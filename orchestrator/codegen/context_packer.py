@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+from typing import Any, Dict, Iterable, List, Tuple
+
+
+# Rough tokenizer-free estimate; compact JSON paths run about 3-4 characters per token,
+# so 3 keeps us on the safe side of the budget.
+CHARS_PER_TOKEN = 3.0
+
+DEFAULT_MODEL_CONTEXT_TOKENS = 32768
+DEFAULT_PROJECT_CONTEXT_TOKENS = 2048
+SAFETY_MARGIN_TOKENS = 256
+MIN_ENTRY_TOKENS = 8  # smallest possible {"path":..,"size_bytes":..} entry
+
+SOURCE_SUFFIXES = {".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs", ".css", ".json"}
+KEY_CONFIG_FILES = {
+    "package.json",
+    "tsconfig.json",
+    "tsconfig.app.json",
+    "vite.config.ts",
+    "vite.config.js",
+    "tailwind.config.js",
+    "tailwind.config.ts",
+    "postcss.config.js",
+    "index.html",
+}
+
+_WORD = re.compile(r"[A-Za-z][A-Za-z0-9_]+")
+
+
+def estimate_tokens(text: str) -> int:
+    return int(math.ceil(len(text) / CHARS_PER_TOKEN))
+
+
+class ContextPacker:
+    """
+    Packs the project file list into the prompt within a token budget.
+
+    Files are ranked by relevance to the target file and the spec, then added
+    greedily until the budget is spent. Whole entries are added or skipped,
+    so the packed context is always valid JSON.
+
+    Relevance signals:
+      - the target file itself, and files in the same directory
+      - file names / paths mentioned in the spec
+      - files under a components directory
+      - key project config files (package.json, tsconfig, vite/tailwind config)
+      - shallow paths over deep ones
+    """
+
+    def __init__(
+        self,
+        max_tokens: int | None = None,
+        model_context_tokens: int | None = None,
+    ) -> None:
+        # Upper bound for the project context section itself
+        self.max_tokens = max_tokens or int(
+            os.getenv("ORCHESTRATOR_PROJECT_CONTEXT_TOKENS", str(DEFAULT_PROJECT_CONTEXT_TOKENS))
+        )
+        # Context window of the configured model
+        self.model_context_tokens = model_context_tokens or int(
+            os.getenv("LMSTUDIO_CONTEXT_TOKENS", str(DEFAULT_MODEL_CONTEXT_TOKENS))
+        )
+
+    def budget(self, other_prompt_text: str, max_output_tokens: int) -> int:
+        """
+        Tokens available for the project context, given the rest of the prompt
+        and the tokens reserved for the completion.
+        """
+        available = (
+            self.model_context_tokens
+            - max_output_tokens
+            - estimate_tokens(other_prompt_text)
+            - SAFETY_MARGIN_TOKENS
+        )
+        return max(0, min(self.max_tokens, available))
+
+    @staticmethod
+    def score(path: str, target: str, spec_words: set[str], spec_text: str) -> float:
+        # Plain string handling: this runs once per project file
+        parent, _, name = path.rpartition("/")
+        target_parent = target.rpartition("/")[0]
+        dot = name.rfind(".")
+        stem = (name[:dot] if dot > 0 else name).lower()
+        suffix = name[dot:] if dot > 0 else ""
+        score = 0.0
+
+        if path == target:
+            score += 100
+        if parent == target_parent:
+            score += 50
+        elif target_parent and parent.startswith(target_parent + "/"):
+            score += 20
+
+        if stem in spec_words and stem != "index":
+            # Full path spelled out in the spec beats a bare name mention
+            score += 60 if path in spec_text else 40
+
+        if parent == "components" or "components/" in path:
+            score += 15
+        if not parent and name in KEY_CONFIG_FILES:
+            score += 25
+        if suffix in SOURCE_SUFFIXES:
+            score += 10
+
+        score -= 2 * path.count("/")
+        return score
+
+    def rank(self, files: Iterable[Dict[str, Any]], target_file: str, spec_text: str) -> List[Dict[str, Any]]:
+        spec_words = {w.lower() for w in _WORD.findall(spec_text)}
+        scored: List[Tuple[float, str, Dict[str, Any]]] = [
+            (self.score(str(f["path"]), target_file, spec_words, spec_text), str(f["path"]), f)
+            for f in files
+        ]
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [f for _, _, f in scored]
+
+    def pack(
+        self,
+        files: List[Dict[str, Any]],
+        root: str,
+        target_file: str,
+        spec_text: str,
+        budget_tokens: int,
+    ) -> str:
+        header = {"root": root, "target_file": target_file, "files": [], "omitted_files": 0}
+        used = estimate_tokens(json.dumps(header, separators=(",", ":")))
+
+        chosen: List[Dict[str, Any]] = []
+        for f in self.rank(files, target_file, spec_text):
+            if budget_tokens - used < MIN_ENTRY_TOKENS:
+                break
+            entry = {"path": f["path"], "size_bytes": f.get("size_bytes")}
+            # +1 for the separating comma
+            cost = estimate_tokens(json.dumps(entry, separators=(",", ":"))) + 1
+            if used + cost > budget_tokens:
+                # Keep going: a later, shorter entry may still fit
+                continue
+            chosen.append(entry)
+            used += cost
+
+        chosen.sort(key=lambda e: e["path"])
+        summary = {
+            "root": root,
+            "target_file": target_file,
+            "files": chosen,
+            "omitted_files": len(files) - len(chosen),
+        }
+        # Compact JSON: no spaces → fewer tokens
+        return json.dumps(summary, separators=(",", ":"))
@@ -1,5 +1,8 @@
 import os
-import requests
+from typing import Iterator
+
+from orchestrator.backend import LLMBackend, StreamStats, get_backend
+from orchestrator.cache import ResponseCache
 
 class LMStudioClient:
     def __init__(
@@ -8,6 +11,9 @@ class LMStudioClient:
         model: str | None = None,
         api_key: str | None = None,
         timeout_seconds: int | None = None,
+        cache: ResponseCache | None = None,
+        use_cache: bool = True,
+        backend: LLMBackend | None = None,
     ) -> None:
         self.base_url = base_url or os.getenv("LMSTUDIO_BASE_URL", "http://localhost:1234/v1")
         self.model = model or os.getenv("LMSTUDIO_MODEL", "qwen/qwen3-coder-30b")  # your model
@@ -15,6 +21,16 @@ class LMStudioClient:
         # total timeout, but we’ll split into connect + read below
         self.timeout_seconds = timeout_seconds or int(os.getenv("LMSTUDIO_TIMEOUT_SEC", "600"))
         # 600 seconds = 10 minutes, overkill but safe for big local models
+        # Identical requests are answered from the on-disk response cache
+        self.cache = cache
+        self.use_cache = use_cache
+        # Pooled HTTP transport shared with every other client for the same server
+        # Without an explicit base_url, LMSTUDIO_BASE_URLS (a server pool) applies
+        self.backend = backend or get_backend(
+            base_url=base_url,
+            api_key=self.api_key,
+            timeout_seconds=self.timeout_seconds,
+        )
 
     def chat_completion(
         self,
@@ -22,38 +38,28 @@ class LMStudioClient:
         temperature: float = 0.0,
         max_tokens: int = 4096,
     ) -> str:
-        url = f"{self.base_url}/chat/completions"
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {self.api_key}",
-        }
-        payload: dict[str, object] = {
-            "model": self.model,
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": max_tokens,
-        }
-
-        try:
-            # timeout=(connect_timeout, read_timeout)
-            resp = requests.post(
-                url,
-                json=payload,
-                headers=headers,
-                timeout=(10, self.timeout_seconds),
-            )
-        except requests.exceptions.ReadTimeout as e:
-            raise RuntimeError(
-                f"LM Studio timed out after {self.timeout_seconds}s. "
-                "The local model may be too slow or still loading. "
-                "Try lowering model size, ensuring the model is fully loaded, "
-                "or increasing LMSTUDIO_TIMEOUT_SEC."
-            ) from e
+        return self.backend.chat_completion(
+            messages=messages,
+            model=self.model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            use_cache=self.use_cache,
+            cache=self.cache,
+        )
 
-        resp.raise_for_status()
-        data = resp.json()
-
-        try:
-            return data["choices"][0]["message"]["content"]
-        except (KeyError, IndexError) as exc:
-            raise RuntimeError(f"Unexpected LM Studio response: {data}") from exc
+    def stream_chat_completion(
+        self,
+        messages: list[dict[str, str]],
+        temperature: float = 0.0,
+        max_tokens: int = 4096,
+        stats: StreamStats | None = None,
+    ) -> Iterator[str]:
+        return self.backend.stream_chat_completion(
+            messages=messages,
+            model=self.model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            use_cache=self.use_cache,
+            cache=self.cache,
+            stats=stats,
+        )
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import json
+import posixpath
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Tuple
+
+
+# Extensions we consider when resolving bare import paths without an extension.
+CANDIDATE_EXTS: tuple[str, ...] = (
+    ".tsx",
+    ".ts",
+    ".jsx",
+    ".js",
+    ".mjs",
+    ".cjs",
+    ".json",
+)
+
+TSCONFIG_NAMES = ("tsconfig.json", "tsconfig.app.json", "jsconfig.json")
+
+_JSONC_COMMENT = re.compile(r'("(?:\\.|[^"\\])*")|//[^\n]*|/\*.*?\*/', re.DOTALL)
+_JSONC_TRAILING_COMMA = re.compile(r",(\s*[}\]])")
+# Specifiers that could name an npm package ("react", "lodash/fp", "@scope/pkg"),
+# unlike alias forms such as "@/x" or "~/x"
+_PACKAGE_SPECIFIER = re.compile(r"^(?:@[A-Za-z0-9][\w.~-]*/)?[A-Za-z0-9][\w.~-]*(?:/|$)")
+
+
+def _load_jsonc(text: str) -> dict:
+    """
+    Parse tsconfig-style JSON: // and /* */ comments and trailing commas allowed.
+    """
+    text = _JSONC_COMMENT.sub(lambda m: m.group(1) or "", text)
+    text = _JSONC_TRAILING_COMMA.sub(r"\1", text)
+    return json.loads(text)
+
+
+class PathIndex:
+    """
+    Hash index of project file paths with memoized import resolution.
+
+    resolve(spec, from_dir) maps an import specifier to the project file it
+    refers to, trying in order: the path as written, each candidate extension,
+    and <path>/index.<ext>. Non-relative specifiers are resolved through the
+    tsconfig/jsconfig "paths" aliases and "baseUrl". Results (including
+    misses) are memoized per (from_dir, spec), so validating many files
+    against one index costs O(imports).
+    """
+
+    def __init__(
+        self,
+        paths: Iterable[str],
+        base_url: str | None = None,
+        aliases: Dict[str, List[str]] | None = None,
+        exts: Tuple[str, ...] = CANDIDATE_EXTS,
+    ) -> None:
+        self.paths: set[str] = set(paths)
+        # Project-relative posix dir; None when no baseUrl is configured
+        self.base_url = base_url
+        # alias pattern (e.g. "@/*") -> project-relative targets (e.g. ["src/*"])
+        self.aliases: Dict[str, List[str]] = aliases or {}
+        self.exts = exts
+        self._memo: Dict[Tuple[str, str], str | None] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_project(cls, root: Path, paths: Iterable[str]) -> "PathIndex":
+        base_url, aliases = cls._read_tsconfig(root)
+        return cls(paths, base_url=base_url, aliases=aliases)
+
+    @staticmethod
+    def _read_tsconfig(root: Path) -> Tuple[str | None, Dict[str, List[str]]]:
+        base_url: str | None = None
+        aliases: Dict[str, List[str]] = {}
+        for name in TSCONFIG_NAMES:
+            path = root / name
+            if not path.is_file():
+                continue
+            try:
+                options = _load_jsonc(path.read_text(encoding="utf-8")).get("compilerOptions") or {}
+            except (OSError, ValueError, AttributeError):
+                continue
+
+            config_base = options.get("baseUrl")
+            if config_base is not None:
+                base_url = posixpath.normpath(str(config_base).replace("\\", "/"))
+            # "paths" entries are relative to baseUrl, or to the config file when there is none
+            paths_base = base_url or "."
+            for pattern, targets in (options.get("paths") or {}).items():
+                aliases[pattern] = [
+                    posixpath.normpath(posixpath.join(paths_base, str(t)))
+                    for t in targets
+                ]
+        return base_url, aliases
+
+    def add(self, path: str) -> None:
+        """
+        Register a file that does not exist yet (e.g. generated in the same run).
+        """
+        with self._lock:
+            if path in self.paths:
+                return
+            self.paths.add(path)
+            # Drop memoized misses, which may resolve now
+            self._memo = {k: v for k, v in self._memo.items() if v is not None}
+
+    def __contains__(self, path: str) -> bool:
+        return path in self.paths
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    def _resolve_file(self, rel_path: str) -> str | None:
+        rel_path = posixpath.normpath(rel_path)
+        if rel_path.startswith("./"):
+            rel_path = rel_path[2:]
+
+        if rel_path in self.paths:
+            return rel_path
+        for ext in self.exts:
+            candidate = rel_path + ext
+            if candidate in self.paths:
+                return candidate
+        # Directory imports: ./foo -> ./foo/index.tsx, etc.
+        stem = rel_path.rstrip("/")
+        for ext in self.exts:
+            candidate = f"{stem}/index{ext}"
+            if candidate in self.paths:
+                return candidate
+        return None
+
+    def _alias_targets(self, spec: str) -> List[str] | None:
+        """
+        Project-relative paths an aliased specifier maps to, or None if no alias matches.
+        """
+        best: Tuple[int, List[str]] | None = None
+        for pattern, targets in self.aliases.items():
+            if "*" in pattern:
+                prefix, _, suffix = pattern.partition("*")
+                if spec.startswith(prefix) and spec.endswith(suffix) and len(spec) >= len(prefix) + len(suffix):
+                    star = spec[len(prefix) : len(spec) - len(suffix)]
+                    # Longest prefix wins, as in TypeScript
+                    if best is None or len(prefix) > best[0]:
+                        best = (len(prefix), [t.replace("*", star) for t in targets])
+            elif spec == pattern:
+                return list(targets)
+        return None if best is None else best[1]
+
+    def is_project_specifier(self, spec: str) -> bool:
+        """
+        True for specifiers that must resolve inside the project: relative paths
+        and tsconfig path aliases. Bare package names are not, even when an
+        alias pattern such as "*" matches them: like TypeScript, an alias with
+        no existing target falls back to node_modules.
+        """
+        if spec.startswith(("./", "../")):
+            return True
+        targets = self._alias_targets(spec)
+        if targets is None:
+            return False
+        if not _PACKAGE_SPECIFIER.match(spec):
+            return True
+        return any(self._resolve_file(target) is not None for target in targets)
+
+    def resolve(self, spec: str, from_dir: str) -> str | None:
+        key = (from_dir, spec)
+        if key in self._memo:
+            return self._memo[key]
+
+        resolved: str | None = None
+        if spec.startswith(("./", "../")):
+            resolved = self._resolve_file(posixpath.join(from_dir or ".", spec))
+        else:
+            for target in self._alias_targets(spec) or []:
+                resolved = self._resolve_file(target)
+                if resolved is not None:
+                    break
+            if resolved is None and self.base_url is not None:
+                resolved = self._resolve_file(posixpath.join(self.base_url, spec))
+
+        self._memo[key] = resolved
+        return resolved
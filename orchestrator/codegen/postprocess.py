@@ -0,0 +1,334 @@
+from __future__ import annotations
+
+import re
+from typing import Callable, Iterable, List, Type, TypeVar
+
+
+# Tailwind default color names
+TAILWIND_COLOR_NAMES = (
+    "slate", "gray", "zinc", "neutral", "stone",
+    "red", "orange", "amber", "yellow",
+    "lime", "green", "emerald", "teal", "cyan",
+    "sky", "blue", "indigo", "violet", "purple",
+    "fuchsia", "pink", "rose",
+)
+TAILWIND_SHADES = frozenset({"50", "100", "200", "300", "400", "500", "600", "700", "800", "900"})
+
+# Color utilities with a numeric shade, e.g. bg-slate-750, text-blue-845, border-red-15.
+# Compiled once at import; it never spans lines, so it can run per line.
+TAILWIND_SHADE_PATTERN = re.compile(
+    r"\b("
+    r"(?:bg|text|border|outline|ring|from|via|to|accent|caret|decoration)"
+    rf"-(?:{'|'.join(TAILWIND_COLOR_NAMES)})-"
+    r")"
+    r"(\d{1,3})\b"
+)
+
+IMPORT_FROM_PATTERN = re.compile(
+    r"""(?:import|export)\s+(?:type\s+)?(?:[^'";]+?\s+from\s+)?['"]([^'"]+)['"]""",
+    re.MULTILINE,
+)
+
+ANY_DYNAMIC_IMPORT_PATTERN = re.compile(
+    r"""import\(\s*['"]([^'"]+)['"]\s*\)""",
+    re.MULTILINE,
+)
+
+# An unterminated import/export statement is given up after this many lines
+MAX_STATEMENT_LINES = 200
+
+
+def snap_tailwind_shade(shade: str) -> str:
+    """
+    Nearest valid shade at or below an invalid one: 0–99 -> 50, 100–199 -> 100,
+    ..., 900+ -> 900.
+    """
+    try:
+        n = int(shade)
+    except ValueError:
+        # If it's not an int at all, just default to 700 as a safe fallback
+        return "700"
+    if n <= 99:
+        return "50"
+    if n >= 900:
+        return "900"
+    return str((n // 100) * 100)
+
+
+def _replace_shade(match: re.Match) -> str:
+    shade = match.group(2)
+    if shade in TAILWIND_SHADES:
+        return match.group(0)
+    return match.group(1) + snap_tailwind_shade(shade)
+
+
+def strip_fence(text: str) -> str:
+    """
+    Strip outer whitespace and a surrounding ``` fence (```tsx ... ```) from text.
+    """
+    stripped = text.strip()
+    if not stripped.startswith("```"):
+        return stripped
+    # Drop the opening fence line, then a closing fence line if present
+    _, _, body = stripped.partition("\n")
+    body = body.rstrip()
+    last_start = body.rfind("\n") + 1
+    if body[last_start:].lstrip().startswith("```"):
+        body = body[:last_start]
+    return body.strip()
+
+
+def sanitize_tailwind(text: str) -> str:
+    """
+    Snap invalid Tailwind color shades (bg-slate-750 -> bg-slate-700) in text.
+    """
+    return TAILWIND_SHADE_PATTERN.sub(_replace_shade, text)
+
+
+class LineRule:
+    """
+    One post-processing rule, applied to every line of the code (after fence
+    stripping), in order, exactly once. process() returns the line to emit;
+    collector rules return it unchanged and keep what they found.
+    """
+
+    name = "rule"
+
+    def process(self, line: str) -> str:
+        return line
+
+    def process_text(self, text: str) -> str:
+        """
+        process() over every line of a complete text. Rules whose patterns
+        never span lines can override this with one whole-text pass.
+        """
+        return "\n".join(self.process(line) for line in text.split("\n"))
+
+    def finish(self) -> None:
+        """
+        Called once after the last line.
+        """
+
+
+class TailwindShadeRule(LineRule):
+    """
+    sanitize_tailwind() on each line; counts the classes it fixed.
+    """
+
+    name = "tailwind"
+
+    def __init__(self) -> None:
+        self.fixes = 0
+
+    def _replace(self, match: re.Match) -> str:
+        out = _replace_shade(match)
+        if out is not match.group(0):
+            self.fixes += 1
+        return out
+
+    def process(self, line: str) -> str:
+        # Every match contains "-<digit>"; most lines have none
+        if "-" not in line:
+            return line
+        return TAILWIND_SHADE_PATTERN.sub(self._replace, line)
+
+    def process_text(self, text: str) -> str:
+        return TAILWIND_SHADE_PATTERN.sub(self._replace, text)
+
+
+class ImportCollector(LineRule):
+    """
+    Collects import specifiers (static imports, `export ... from` re-exports
+    and dynamic import()) as the lines go by, with the same patterns as a
+    whole-source scan. Statements spanning several lines (import { A,\\n B }
+    from "./x") are buffered until their specifier arrives.
+
+    on_import(specifier), if given, is called once per new specifier as soon
+    as its statement is complete; raising from it stops the processing (e.g.
+    to abort a streamed generation).
+    """
+
+    name = "imports"
+
+    def __init__(self, on_import: Callable[[str], None] | None = None) -> None:
+        self.specifiers: set[str] = set()
+        self.on_import = on_import
+        self._pending: List[str] = []
+
+    @property
+    def imports(self) -> List[str]:
+        return sorted(self.specifiers)
+
+    def _add(self, specifier: str) -> None:
+        if specifier in self.specifiers:
+            return
+        self.specifiers.add(specifier)
+        if self.on_import is not None:
+            self.on_import(specifier)
+
+    def _scan(self, text: str) -> None:
+        for m in IMPORT_FROM_PATTERN.finditer(text):
+            self._add(m.group(1))
+        if "import(" in text or "import (" in text:
+            for m in ANY_DYNAMIC_IMPORT_PATTERN.finditer(text):
+                self._add(m.group(1))
+
+    def process(self, line: str) -> str:
+        if self._pending:
+            self._pending.append(line)
+        elif "import" in line or "export" in line:
+            self._pending = [line]
+        else:
+            return line
+
+        # A statement's specifier is its first string literal; a ';' ends it regardless
+        if "'" in line or '"' in line or ";" in line or len(self._pending) >= MAX_STATEMENT_LINES:
+            self._scan("\n".join(self._pending))
+            cut = max(line.rfind("'"), line.rfind('"'), line.rfind(";"))
+            tail = line[cut + 1 :]
+            # Another statement may start after the last one on this line
+            self._pending = [tail] if ("import" in tail or "export" in tail) else []
+        return line
+
+    def process_text(self, text: str) -> str:
+        self._scan(text)
+        return text
+
+    def finish(self) -> None:
+        if self._pending:
+            self._scan("\n".join(self._pending))
+            self._pending = []
+
+
+R = TypeVar("R", bound=LineRule)
+
+
+def default_rules() -> List[LineRule]:
+    return [TailwindShadeRule(), ImportCollector()]
+
+
+class PostProcessor:
+    """
+    Single-pass cleanup of generated code, for streamed chunks or whole strings.
+
+    Strips a surrounding Markdown fence and outer whitespace, then runs every
+    rule over each line once (default: Tailwind shade fixes and import
+    collection). feed() returns the cleaned text that is final so far; a line
+    is only emitted once a later non-blank line proves it is neither the
+    closing fence nor trailing whitespace, so feed()+finish() output equals
+    process() on the whole string.
+
+    Rules are plugged in via rules=[...]; find(RuleType) returns a rule
+    instance to read what it collected.
+    """
+
+    def __init__(self, rules: Iterable[LineRule] | None = None) -> None:
+        self.rules: List[LineRule] = list(rules) if rules is not None else default_rules()
+        self._buffer = ""
+        self._started = False
+        self._fence_checked = False
+        self._fenced = False
+        self._held: List[str] = []
+        self._emitted_any = False
+        self._finished = False
+
+    def find(self, rule_type: Type[R]) -> R | None:
+        for rule in self.rules:
+            if isinstance(rule, rule_type):
+                return rule
+        return None
+
+    @property
+    def imports(self) -> List[str] | None:
+        """
+        Import specifiers seen so far, if an ImportCollector is installed.
+        """
+        collector = self.find(ImportCollector)
+        return collector.imports if collector is not None else None
+
+    def process(self, text: str) -> str:
+        """
+        Clean a complete text. On a fresh processor this is one whole-text
+        pass per rule instead of the line-by-line streaming path.
+        """
+        if self._started or self._buffer or self._finished:
+            return self.feed(text) + self.finish()
+        self._finished = True
+        out = strip_fence(text)
+        for rule in self.rules:
+            out = rule.process_text(out)
+            rule.finish()
+        return out
+
+    def feed(self, chunk: str) -> str:
+        if "\n" not in chunk:
+            self._buffer += chunk
+            return ""
+        lines = (self._buffer + chunk).split("\n")
+        self._buffer = lines.pop()
+        out: List[str] = []
+        for line in lines:
+            emitted = self._line(line)
+            if emitted:
+                out.append(emitted)
+        return "".join(out)
+
+    def finish(self) -> str:
+        if self._finished:
+            return ""
+        self._finished = True
+        out = self._line(self._buffer) if self._buffer else ""
+        self._buffer = ""
+
+        held = self._held
+        self._held = []
+        while held and not held[-1].strip():
+            held.pop()
+        if self._fenced and held and held[-1].strip().startswith("```"):
+            held.pop()
+            while held and not held[-1].strip():
+                held.pop()
+        if held:
+            held[-1] = held[-1].rstrip()
+        out += self._emit(held)
+        for rule in self.rules:
+            rule.finish()
+        return out
+
+    def _line(self, line: str) -> str:
+        if not self._started:
+            if not line.strip():
+                return ""
+            if not self._fence_checked:
+                self._fence_checked = True
+                if line.lstrip().startswith("```"):
+                    # Opening fence: drop it and keep skipping leading blank lines
+                    self._fenced = True
+                    return ""
+            self._started = True
+            self._held = [line.lstrip()]
+            return ""
+
+        if not line.strip() or (self._fenced and line.lstrip().startswith("```")):
+            # Could still turn out to be trailing whitespace or the closing fence
+            self._held.append(line)
+            return ""
+
+        out = self._emit(self._held)
+        self._held = [line]
+        return out
+
+    def _emit(self, lines: List[str]) -> str:
+        if not lines:
+            return ""
+        rules = self.rules
+        processed: List[str] = []
+        for line in lines:
+            for rule in rules:
+                line = rule.process(line)
+            processed.append(line)
+        text = "\n".join(processed)
+        if self._emitted_any:
+            text = "\n" + text
+        self._emitted_any = True
+        return text
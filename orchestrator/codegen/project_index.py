@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List
+
+from orchestrator.metrics import record_bytes_read, record_bytes_written
+from .scanner import ProjectScanner
+
+
+INDEX_DIR_NAME = ".orchestrator_index"
+INDEX_FILE_NAME = "project_index.json"
+INDEX_VERSION = 2
+
+
+class ProjectIndex:
+    """
+    Persisted file index of a project, refreshed incrementally.
+
+    Stored as <project>/.orchestrator_index/project_index.json, next to
+    .orchestrator_backups/. Each directory record holds the directory's
+    mtime_ns, its file entries, its subdirectory names and the ignore patterns
+    it was filtered with. On refresh, a directory whose mtime and ignore
+    patterns are unchanged is not listed again (its files were neither added,
+    removed nor renamed); only its subdirectories are visited.
+
+    File sizes are refreshed whenever their directory is re-listed. A file
+    edited in place does not change its directory's mtime, so its recorded
+    size may lag until the directory changes.
+    """
+
+    def __init__(self, root: Path, index_path: Path | None = None) -> None:
+        self.root = root
+        self.index_path = index_path or root / INDEX_DIR_NAME / INDEX_FILE_NAME
+        # rel_dir ("" for root) -> DirListing.as_record():
+        # {"mtime_ns", "files": {name: {"size_bytes", "mtime_ns"}}, "subdirs", "ignore_files", "ignore_key"}
+        self.dirs: Dict[str, Dict[str, Any]] = {}
+        self.dirs_listed = 0
+        self.dirs_reused = 0
+        self.dirs_dropped = 0
+
+    def load(self) -> None:
+        try:
+            raw = self.index_path.read_bytes()
+            data = json.loads(raw)
+        except (OSError, ValueError):
+            self.dirs = {}
+            return
+        record_bytes_read(len(raw))
+        if data.get("version") != INDEX_VERSION or data.get("root") != str(self.root):
+            self.dirs = {}
+            return
+        self.dirs = data.get("dirs") or {}
+
+    def save(self) -> None:
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": INDEX_VERSION, "root": str(self.root), "dirs": self.dirs}
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        tmp_path.write_bytes(raw)
+        os.replace(tmp_path, self.index_path)
+        record_bytes_written(len(raw))
+
+    def refresh(self, use_ignore_files: bool = True) -> None:
+        """
+        Bring the index up to date, re-listing only directories whose mtime (or
+        applicable ignore patterns) changed.
+        """
+        self.dirs_listed = 0
+        self.dirs_reused = 0
+        self.dirs_dropped = 0
+        previous = self.dirs
+
+        def reuse(rel_dir: str, mtime_ns: int) -> Dict[str, Any] | None:
+            record = previous.get(rel_dir)
+            if record is None or record.get("mtime_ns") != mtime_ns:
+                return None
+            return record
+
+        scanner = ProjectScanner(self.root, use_ignore_files=use_ignore_files, reuse=reuse)
+        fresh: Dict[str, Dict[str, Any]] = {}
+        for listing in scanner.iter_dirs():
+            if listing.reused:
+                self.dirs_reused += 1
+            else:
+                self.dirs_listed += 1
+            fresh[listing.rel_dir] = listing.as_record()
+
+        # Directories that disappeared are dropped with the old mapping
+        self.dirs_dropped = len(previous.keys() - fresh.keys())
+        self.dirs = fresh
+
+    @property
+    def changed(self) -> bool:
+        """
+        True if the last refresh re-listed or dropped any directory.
+        """
+        return bool(self.dirs_listed or self.dirs_dropped)
+
+    def files(self) -> List[Dict[str, Any]]:
+        """
+        All indexed files as {"path", "size_bytes", "mtime_ns"}, sorted by path.
+        """
+        out: List[Dict[str, Any]] = []
+        for rel_dir, record in self.dirs.items():
+            prefix = f"{rel_dir}/" if rel_dir else ""
+            for name, meta in record["files"].items():
+                out.append({"path": prefix + name, **meta})
+        out.sort(key=lambda f: f["path"])
+        return out
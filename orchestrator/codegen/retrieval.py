@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Tuple
+
+from orchestrator.metrics import record_bytes_read, record_bytes_written
+from .context_packer import estimate_tokens
+from .project_index import INDEX_DIR_NAME
+
+
+RETRIEVAL_FILE_NAME = "retrieval_index.json"
+RETRIEVAL_VERSION = 1
+
+INDEXED_SUFFIXES = (".ts", ".tsx", ".js", ".jsx", ".mjs", ".cjs")
+MAX_INDEXED_FILE_BYTES = 256 * 1024  # larger files are usually generated/bundled
+
+DEFAULT_TOP_K = 5
+DEFAULT_SNIPPET_TOKENS = 1024
+
+MAX_SNIPPETS_PER_FILE = 12
+MAX_SNIPPET_LINES = 20
+MAX_SNIPPET_CHARS = 600
+
+# BM25 parameters (standard defaults)
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_IDENT = re.compile(r"[A-Za-z_$][A-Za-z0-9_$]*")
+_CAMEL_PART = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+")
+
+# Language keywords carry no signal about what a file is for
+_STOPWORDS = {
+    "as", "async", "await", "boolean", "break", "case", "catch", "class", "const",
+    "default", "else", "export", "extends", "false", "for", "from", "function", "if",
+    "implements", "import", "in", "interface", "let", "new", "null", "number", "of",
+    "return", "string", "switch", "this", "true", "try", "type", "typeof", "undefined",
+    "var", "void", "while",
+}
+
+# Top-level declarations worth showing to the model
+_DECL = re.compile(
+    r"^(?:export\s+(?:default\s+)?)?(?:declare\s+)?(?:abstract\s+)?(?:async\s+)?"
+    r"(function\*?|class|interface|type|enum|const|let|var)\b"
+)
+_REEXPORT = re.compile(r"^export\s+(?:\*|\{[^}]*\}|type\s+\{[^}]*\})\s*(?:as\s+\w+\s+)?from\s+['\"]")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lower-cased search terms: each identifier plus its camelCase / snake_case parts,
+    so "TaskListProps" also matches "task list".
+    """
+    terms: List[str] = []
+    for ident in _IDENT.findall(text):
+        lower = ident.lower()
+        if lower in _STOPWORDS or len(lower) < 2:
+            continue
+        terms.append(lower)
+        parts = [p.lower() for p in _CAMEL_PART.findall(ident)]
+        if len(parts) > 1:
+            terms.extend(p for p in parts if len(p) > 1 and p not in _STOPWORDS)
+    return terms
+
+
+def _block_end(lines: List[str], start: int) -> int:
+    """
+    Index of the last line of a brace-delimited block starting at lines[start].
+    """
+    depth = 0
+    opened = False
+    for i in range(start, min(len(lines), start + MAX_SNIPPET_LINES)):
+        depth += lines[i].count("{") - lines[i].count("}")
+        opened = opened or "{" in lines[i]
+        if opened and depth <= 0:
+            return i
+        if not opened and lines[i].rstrip().endswith(";"):
+            return i
+    return min(len(lines), start + MAX_SNIPPET_LINES) - 1
+
+
+def _signature_end(lines: List[str], start: int) -> int:
+    """
+    Index of the line where a function / class / const signature ends (before its body).
+    """
+    parens = 0
+    for i in range(start, min(len(lines), start + MAX_SNIPPET_LINES)):
+        line = lines[i].rstrip()
+        parens += line.count("(") - line.count(")")
+        if parens <= 0 and (line.endswith("{") or "=>" in line or line.endswith(";")):
+            return i
+    return start
+
+
+def extract_snippets(source: str) -> List[str]:
+    """
+    Export signatures and type definitions of a JS/TS module, without bodies.
+
+    Interfaces, type aliases and enums are kept whole (capped); functions,
+    classes and consts are reduced to their signature.
+    """
+    lines = source.splitlines()
+    snippets: List[str] = []
+    i = 0
+    while i < len(lines) and len(snippets) < MAX_SNIPPETS_PER_FILE:
+        line = lines[i]
+        # Top-level only: nested declarations are implementation details
+        if not line or line[0].isspace():
+            i += 1
+            continue
+
+        if _REEXPORT.match(line):
+            snippets.append(line.strip())
+            i += 1
+            continue
+
+        m = _DECL.match(line)
+        exported = line.startswith("export")
+        if m is None or (not exported and m.group(1) not in ("interface", "type", "enum")):
+            i += 1
+            continue
+
+        kind = m.group(1)
+        if kind in ("interface", "type", "enum"):
+            end = _block_end(lines, i)
+            text = "\n".join(lines[i : end + 1])
+        else:
+            end = _signature_end(lines, i)
+            text = "\n".join(lines[i : end + 1]).rstrip()
+            if text.endswith("{"):
+                text += " ... }"
+            elif text.endswith("=>"):
+                text += " ..."
+            if kind == "class":
+                # Class bodies are skipped entirely
+                end = _block_end(lines, i)
+
+        if len(text) > MAX_SNIPPET_CHARS:
+            text = text[:MAX_SNIPPET_CHARS].rstrip() + " ..."
+        snippets.append(text)
+        i = end + 1
+    return snippets
+
+
+class RetrievalIndex:
+    """
+    Local BM25 index over project source files, used to show the model the
+    exports and types of files relevant to the spec.
+
+    Each document is one source file: its path and full content are tokenized
+    into terms, and its export signatures / type definitions are kept as
+    snippets. The index is stored as
+    <project>/.orchestrator_index/retrieval_index.json and refreshed
+    incrementally: a file is only re-read when its size or mtime changed.
+    """
+
+    def __init__(self, root: Path, index_path: Path | None = None) -> None:
+        self.root = root
+        self.index_path = index_path or root / INDEX_DIR_NAME / RETRIEVAL_FILE_NAME
+        # path -> {"mtime_ns", "size_bytes", "length", "terms": {term: tf}, "snippets": [...]}
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.docs_indexed = 0
+        self.docs_reused = 0
+        self.docs_dropped = 0
+        self._postings: Dict[str, Dict[str, int]] | None = None
+        self._avg_length = 0.0
+
+    def load(self) -> None:
+        try:
+            raw = self.index_path.read_bytes()
+            data = json.loads(raw)
+        except (OSError, ValueError):
+            self.docs = {}
+            return
+        record_bytes_read(len(raw))
+        if data.get("version") != RETRIEVAL_VERSION or data.get("root") != str(self.root):
+            self.docs = {}
+            return
+        self.docs = data.get("docs") or {}
+        self._postings = None
+
+    def save(self) -> None:
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {"version": RETRIEVAL_VERSION, "root": str(self.root), "docs": self.docs}
+        tmp_path = self.index_path.with_name(self.index_path.name + ".tmp")
+        raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        tmp_path.write_bytes(raw)
+        os.replace(tmp_path, self.index_path)
+        record_bytes_written(len(raw))
+
+    def refresh(self, paths: Iterable[str]) -> None:
+        """
+        Bring the index up to date with the given project-relative paths
+        (typically ProjectIndex.files()). Non-source files are ignored, and
+        documents for paths that are gone are dropped.
+        """
+        self.docs_indexed = 0
+        self.docs_reused = 0
+        self.docs_dropped = 0
+        fresh: Dict[str, Dict[str, Any]] = {}
+        # Plain string paths: this stats every source file in the project
+        root = os.fspath(self.root)
+
+        for rel_path in paths:
+            if not rel_path.endswith(INDEXED_SUFFIXES):
+                continue
+            abs_path = os.path.join(root, rel_path)
+            try:
+                # Stat directly: the project index may lag for files edited in place
+                st = os.stat(abs_path)
+            except OSError:
+                continue
+            if st.st_size > MAX_INDEXED_FILE_BYTES:
+                continue
+
+            doc = self.docs.get(rel_path)
+            if doc is not None and doc["mtime_ns"] == st.st_mtime_ns and doc["size_bytes"] == st.st_size:
+                fresh[rel_path] = doc
+                self.docs_reused += 1
+                continue
+
+            try:
+                with open(abs_path, encoding="utf-8", errors="replace") as fh:
+                    source = fh.read()
+            except OSError:
+                continue
+            record_bytes_read(st.st_size)
+            fresh[rel_path] = self._make_doc(rel_path, source, st.st_mtime_ns, st.st_size)
+            self.docs_indexed += 1
+
+        self.docs_dropped = len(set(self.docs) - set(fresh))
+        self.docs = fresh
+        if self.changed:
+            # Unchanged documents keep the postings of a long-lived index
+            self._postings = None
+
+    @property
+    def changed(self) -> bool:
+        """
+        True if the last refresh re-indexed or dropped any document.
+        """
+        return bool(self.docs_indexed or self.docs_dropped)
+
+    @staticmethod
+    def _make_doc(rel_path: str, source: str, mtime_ns: int, size_bytes: int) -> Dict[str, Any]:
+        terms = tokenize(rel_path) + tokenize(source)
+        return {
+            "mtime_ns": mtime_ns,
+            "size_bytes": size_bytes,
+            "length": len(terms),
+            "terms": dict(Counter(terms)),
+            "snippets": extract_snippets(source),
+        }
+
+    def _build_postings(self) -> Dict[str, Dict[str, int]]:
+        postings: Dict[str, Dict[str, int]] = {}
+        total = 0
+        for path, doc in self.docs.items():
+            total += doc["length"]
+            for term, tf in doc["terms"].items():
+                postings.setdefault(term, {})[path] = tf
+        self._avg_length = total / len(self.docs) if self.docs else 0.0
+        self._postings = postings
+        return postings
+
+    def search(self, query: str, top_k: int = DEFAULT_TOP_K, exclude: Iterable[str] = ()) -> List[Tuple[str, float]]:
+        """
+        The top_k files by BM25 score for the query, as (path, score).
+        Files without snippets are skipped, since there is nothing to show.
+        """
+        postings = self._postings if self._postings is not None else self._build_postings()
+        n_docs = len(self.docs)
+        if not n_docs:
+            return []
+
+        excluded = set(exclude)
+        scores: Dict[str, float] = {}
+        for term in set(tokenize(query)):
+            docs = postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for path, tf in docs.items():
+                norm = 1 - BM25_B + BM25_B * self.docs[path]["length"] / (self._avg_length or 1)
+                scores[path] = scores.get(path, 0.0) + idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * norm)
+
+        ranked = sorted(
+            (
+                (path, score)
+                for path, score in scores.items()
+                if path not in excluded and self.docs[path]["snippets"]
+            ),
+            key=lambda item: (-item[1], item[0]),
+        )
+        return ranked[:top_k]
+
+    def format_snippets(self, hits: Iterable[Tuple[str, float]], budget_tokens: int) -> str:
+        """
+        Snippets of the hit files, best first, as long as they fit budget_tokens.
+        """
+        blocks: List[str] = []
+        used = 0
+        for path, _ in hits:
+            header = f"// {path}"
+            parts = [header]
+            cost = estimate_tokens(header) + 1
+            for snippet in self.docs[path]["snippets"]:
+                snippet_cost = estimate_tokens(snippet) + 1
+                if used + cost + snippet_cost > budget_tokens:
+                    break
+                parts.append(snippet)
+                cost += snippet_cost
+            if len(parts) == 1:
+                # Not even the first snippet fits; a smaller file further down might
+                continue
+            blocks.append("\n".join(parts))
+            used += cost
+        return "\n\n".join(blocks)
@@ -1,11 +1,32 @@
 from __future__ import annotations
+from contextlib import closing
 from pathlib import Path
-from typing import Protocol
+from typing import Callable, Dict, Protocol, TextIO, Tuple
 import json
 import os
 import re
 from .context import CodegenContext
 from .llm_client import LMStudioClient
+from .context_packer import ContextPacker
+from .path_index import CANDIDATE_EXTS, PathIndex
+from .postprocess import (
+    ANY_DYNAMIC_IMPORT_PATTERN,
+    IMPORT_FROM_PATTERN,
+    ImportCollector,
+    LineRule,
+    PostProcessor,
+    default_rules,
+    sanitize_tailwind,
+    strip_fence,
+)
+from .project_index import ProjectIndex
+from .retrieval import DEFAULT_SNIPPET_TOKENS, DEFAULT_TOP_K, RetrievalIndex
+from .scanner import EXCLUDED_DIRS, EXCLUDED_FILE_NAMES
+from orchestrator.backend import StreamStats
+from orchestrator.backups import get_backup_store
+from orchestrator.fileio import write_text_atomic
+from orchestrator.metrics import record_bytes_read, record_bytes_written
+from orchestrator.tracing import span
 
 
 class Step(Protocol):
@@ -17,28 +38,27 @@ class LoadProjectSpecStep:
         ctx.ensure_project_exists()
         ctx.ensure_spec_exists()
 
-        ctx.spec_text = ctx.spec_path.read_text(encoding="utf-8")
+        with span("file.read", "file", {"path": str(ctx.spec_path)}):
+            ctx.spec_text = ctx.spec_path.read_text(encoding="utf-8")
+        record_bytes_read(len(ctx.spec_text.encode("utf-8")))
+
+MAX_FILES_IN_SUMMARY = 500  # cap on files listed in the LLM prompt (not in the index)
 
-EXCLUDED_DIRS = {
-    "node_modules",
-    ".git",
-    ".idea",
-    ".vscode",
-    "dist",
-    "build",
-    ".next",
-    ".turbo",
-    ".cache",
-}
 
-EXCLUDED_FILE_NAMES = {
-    "package-lock.json",
-    "pnpm-lock.yaml",
-    "yarn.lock",
-    "bun.lockb",
-}
+# project root -> (ProjectIndex, RetrievalIndex | None) kept in memory between runs;
+# None unless a long-lived process opts in with keep_indexes_warm()
+_warm_indexes: Dict[Path, Tuple[ProjectIndex, RetrievalIndex | None]] | None = None
 
-MAX_FILES_IN_SUMMARY = 500  # safety cap for very large projects
+
+def keep_indexes_warm(enabled: bool = True) -> None:
+    """
+    Keep each project's scan and retrieval indexes in memory across
+    ProjectScanningStep runs (e.g. in the daemon): later runs refresh them in
+    place instead of loading them from disk. Runs on the same project must
+    not overlap.
+    """
+    global _warm_indexes
+    _warm_indexes = {} if enabled else None
 
 
 class ProjectScanningStep:
@@ -49,47 +69,64 @@ class ProjectScanningStep:
 
     Excludes heavy/noisy folders like node_modules and lockfiles.
     DOES NOT include file contents to keep the prompt well under context limits.
+
+    The scan is backed by a persisted ProjectIndex, so later runs only re-list
+    directories that changed. ctx.project_files receives the complete file list
+    (used for validation); ctx.project_context only the first max_files_in_context.
+
+    With use_retrieval (default: ORCHESTRATOR_RETRIEVAL, off), source file
+    contents are indexed into a persisted RetrievalIndex (ctx.retrieval_index),
+    which GenerateComponentStep queries for relevant export signatures and
+    types. This reads every source file changed since the last run, so it is
+    opt-in.
     """
 
+    def __init__(
+        self,
+        use_index: bool = True,
+        max_files_in_context: int = MAX_FILES_IN_SUMMARY,
+        use_retrieval: bool | None = None,
+    ) -> None:
+        self.use_index = use_index
+        self.max_files_in_context = max_files_in_context
+        if use_retrieval is None:
+            use_retrieval = os.getenv("ORCHESTRATOR_RETRIEVAL", "") not in ("", "0", "false", "False")
+        self.use_retrieval = use_retrieval
+
     def run(self, ctx: CodegenContext) -> None:
         ctx.ensure_project_exists()
         root = ctx.project_path
 
-        files_info: list[dict[str, object]] = []
-
-        for dirpath, dirnames, filenames in os.walk(root):
-            # filter out excluded dirs in-place so os.walk does not descend into them
-            dirnames[:] = [d for d in dirnames if d not in EXCLUDED_DIRS]
-
-            for fname in filenames:
-                if fname in EXCLUDED_FILE_NAMES:
-                    continue
-
-                fpath = Path(dirpath) / fname
-                rel_path = fpath.relative_to(root).as_posix()
-
-                # also exclude some obvious junk by suffix
-                if rel_path.endswith(".log"):
-                    continue
-
-                try:
-                    size_bytes = fpath.stat().st_size
-                except OSError:
-                    continue
-
-                files_info.append(
-                    {
-                        "path": rel_path,
-                        "size_bytes": size_bytes,
-                    }
-                )
-
-                # safety cap to avoid giant monorepos blowing up the context
-                if len(files_info) >= MAX_FILES_IN_SUMMARY:
-                    break
+        warm = _warm_indexes.get(root) if _warm_indexes is not None else None
+        index = warm[0] if warm is not None else ProjectIndex(root)
+        if self.use_index and warm is None:
+            with span("index.load", "file"):
+                index.load()
+        with span("index.refresh", "scan") as trace_args:
+            index.refresh()
+            trace_args.update(dirs_listed=index.dirs_listed, dirs_reused=index.dirs_reused)
+        if self.use_index and index.changed:
+            try:
+                with span("index.save", "file"):
+                    index.save()
+            except OSError:
+                # Read-only checkouts still get a (non-persisted) scan
+                pass
+
+        ctx.project_files = index.files()
+        ctx.path_index = PathIndex.from_project(root, (f["path"] for f in ctx.project_files))
+        if self.use_retrieval:
+            ctx.retrieval_index = self._refresh_retrieval(
+                root, ctx.project_files, warm[1] if warm is not None else None
+            )
+        if _warm_indexes is not None:
+            _warm_indexes[root] = (index, ctx.retrieval_index)
 
-            if len(files_info) >= MAX_FILES_IN_SUMMARY:
-                break
+        files_info: list[dict[str, object]] = [
+            {"path": f["path"], "size_bytes": f["size_bytes"]}
+            # safety cap to avoid giant monorepos blowing up the context
+            for f in ctx.project_files[: self.max_files_in_context]
+        ]
 
         summary = {
             "root": str(root),
@@ -100,15 +137,79 @@ class ProjectScanningStep:
         # Compact JSON: no spaces → fewer tokens
         ctx.project_context = json.dumps(summary, separators=(",", ":"))
 
+    def _refresh_retrieval(
+        self, root: Path, files: list[dict[str, object]], warm: RetrievalIndex | None = None
+    ) -> RetrievalIndex:
+        retrieval = warm or RetrievalIndex(root)
+        if self.use_index and warm is None:
+            with span("retrieval.load", "file"):
+                retrieval.load()
+        with span("retrieval.refresh", "scan") as trace_args:
+            retrieval.refresh(str(f["path"]) for f in files)
+            trace_args.update(docs_indexed=retrieval.docs_indexed, docs_reused=retrieval.docs_reused)
+        if self.use_index and retrieval.changed:
+            try:
+                with span("retrieval.save", "file"):
+                    retrieval.save()
+            except OSError:
+                pass
+        return retrieval
+
 
 class GenerateComponentStep:
     """
     Calls LM Studio to create a complete TSX/TS file for the target.
     The model is treated strictly as a code printer for a single file.
+
+    With stream=True the cleaned code is passed to on_chunk(ctx, chunk) line by
+    line while the model is still generating (e.g. WriteGeneratedFileStep.stream_chunk).
+    Raising from on_chunk aborts the generation.
+
+    When the scan built a retrieval index, the export signatures and types of
+    the top_k files most relevant to the spec are added to the prompt, within
+    snippet_tokens.
+
+    The output goes through one PostProcessor pass (fence stripping, Tailwind
+    shade fixes, import collection into ctx.generated_imports); when streaming,
+    that pass runs on the chunks as they arrive. rules, if given, returns a
+    fresh list of LineRules per generation.
+
+    While streaming, each import is resolved against ctx.path_index as soon as
+    its statement is complete; the first one that does not resolve cancels
+    the request and raises UnresolvedImportError. With import_retries
+    (ORCHESTRATOR_IMPORT_RETRIES) > 0 the file is regenerated instead, telling
+    the model which imports do not exist; on_restart(ctx) is called before
+    each retry (e.g. WriteGeneratedFileStep.restart_stream).
     """
 
-    def __init__(self, llm: LMStudioClient | None = None) -> None:
+    def __init__(
+        self,
+        llm: LMStudioClient | None = None,
+        stream: bool = False,
+        on_chunk: Callable[[CodegenContext, str], None] | None = None,
+        packer: ContextPacker | None = None,
+        max_tokens: int = 4096,
+        top_k: int = DEFAULT_TOP_K,
+        snippet_tokens: int | None = None,
+        rules: Callable[[], list[LineRule]] | None = None,
+        import_retries: int | None = None,
+        on_restart: Callable[[CodegenContext], None] | None = None,
+    ) -> None:
         self.llm = llm or LMStudioClient()
+        self.stream = stream or on_chunk is not None
+        self.on_chunk = on_chunk
+        # Fits the project file list into the model's context window by relevance
+        self.packer = packer or ContextPacker()
+        self.max_tokens = max_tokens
+        self.top_k = top_k
+        self.snippet_tokens = snippet_tokens or int(
+            os.getenv("ORCHESTRATOR_SNIPPET_TOKENS", str(DEFAULT_SNIPPET_TOKENS))
+        )
+        self.rules = rules or default_rules
+        if import_retries is None:
+            import_retries = int(os.getenv("ORCHESTRATOR_IMPORT_RETRIES", "0"))
+        self.import_retries = max(0, import_retries)
+        self.on_restart = on_restart
 
     def run(self, ctx: CodegenContext) -> None:
         if ctx.spec_text is None:
@@ -161,18 +262,17 @@ class GenerateComponentStep:
         )
 
         # 2) USER PROMPT: spec + minimal direct request
-        project_context_section = ""
-        if ctx.project_context:
-            # Hard clamp to avoid context overflow in extreme cases
-            MAX_CONTEXT_CHARS = 6000
-            context_str = ctx.project_context
-            if len(context_str) > MAX_CONTEXT_CHARS:
-                context_str = context_str[:MAX_CONTEXT_CHARS] + ".../* project context trimmed by orchestrator */"
-            project_context_section = "# Project Context (read-only)\n" + context_str + "\n\n"
-
-        
-        user_prompt = (
-            project_context_section +
+        planned_section = ""
+        if ctx.planned_files:
+            planned_list = "\n".join(f"- {p}" for p in ctx.planned_files)
+            planned_section = (
+                "# Other Files Generated In This Run\n"
+                "These files are generated alongside this one and may be imported "
+                "even though they are not in the project context yet:\n"
+                f"{planned_list}\n\n"
+            )
+
+        request_section = (
             "# Project Spec\n\n"
             f"{ctx.spec_text}\n\n"
             "# Task\n"
@@ -182,139 +282,188 @@ class GenerateComponentStep:
             "Output ONLY the raw file contents."
         )
 
+        snippets_section = ""
+        snippets = self._relevant_snippets(ctx)
+        if snippets:
+            snippets_section = (
+                "# Relevant Project Snippets (read-only)\n"
+                "Exports and types of existing files; match these names and props exactly when importing them.\n"
+                f"{snippets}\n\n"
+            )
 
-        messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ]
-
-        code = self.llm.chat_completion(
-            messages=messages,
-            temperature=0.0,   # deterministic-ish
-            max_tokens=4096,
+        project_context_section = ""
+        packed = self._pack_project_context(
+            ctx, system_prompt + snippets_section + planned_section + request_section
         )
+        if packed:
+            project_context_section = "# Project Context (read-only)\n" + packed + "\n\n"
+
+        user_prompt = project_context_section + snippets_section + planned_section + request_section
+
+        rejected: list[str] = []
+        for attempt in range(self.import_retries + 1):
+            prompt = user_prompt
+            if rejected:
+                prompt += (
+                    "\n\n# Invalid Imports From A Previous Attempt\n"
+                    "These modules do NOT exist in the project. Do not import them; "
+                    "use existing files or define what you need in this file:\n"
+                    + "\n".join(f"- {spec}" for spec in rejected)
+                )
+            messages = [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": prompt},
+            ]
+            try:
+                self._generate(ctx, messages)
+                return
+            except UnresolvedImportError as exc:
+                if attempt == self.import_retries:
+                    raise
+                rejected.extend(s for s in exc.specifiers if s not in rejected)
+                print(f"[codegen] Retrying {target_path} without import(s): {', '.join(rejected)}")
+                if self.on_restart is not None:
+                    self.on_restart(ctx)
+
+    def _generate(self, ctx: CodegenContext, messages: list[dict[str, str]]) -> None:
+        processor = PostProcessor(self.rules())
+        guard = self._import_guard(ctx) if self.stream or self.import_retries else None
+        collector = processor.find(ImportCollector)
+        if guard is not None and collector is not None:
+            collector.on_import = guard
+
+        if self.stream:
+            cleaned = self._generate_streaming(ctx, messages, processor)
+        else:
+            code = self.llm.chat_completion(
+                messages=messages,
+                temperature=0.0,   # deterministic-ish
+                max_tokens=self.max_tokens,
+            )
+            cleaned = processor.process(code)
 
-        cleaned = self._strip_fence(code)
-        cleaned = self._sanitize_tailwind(cleaned)
         ctx.generated_code = cleaned
-
-
+        ctx.generated_imports = processor.imports
 
     @staticmethod
-    def _strip_fence(text: str) -> str:
+    def _import_guard(ctx: CodegenContext) -> Callable[[str], None] | None:
         """
-        Defensive cleanup in case the model still wraps the code in ``` fences.
+        Callback raising UnresolvedImportError for a specifier that does not
+        resolve in the project (None when there is no index to check against).
         """
-        stripped = text.strip()
-
-        # Common case: ```tsx ... ``` or ```ts ... ```
-        if stripped.startswith("```"):
-            lines = stripped.splitlines()
-
-            # Drop first line (``` or ```tsx/ts)
-            if lines:
-                lines = lines[1:]
-
-            # Drop final ``` if present
-            if lines and lines[-1].strip().startswith("```"):
-                lines = lines[:-1]
-
-            stripped = "\n".join(lines).strip()
-
-        return stripped
+        index = validation_index(ctx)
+        if index is None or not len(index):
+            return None
+        base_dir = ctx.target_file.parent.as_posix()
+
+        def check(spec: str) -> None:
+            if index.is_project_specifier(spec) and index.resolve(spec, base_dir) is None:
+                raise UnresolvedImportError(
+                    [spec],
+                    f"Generation of {ctx.target_file.as_posix()} aborted: import '{spec}' "
+                    "does not resolve to an existing file in the project.",
+                )
 
+        return check
 
-    @staticmethod
-    def _sanitize_tailwind(text: str) -> str:
+    def _relevant_snippets(self, ctx: CodegenContext) -> str:
         """
-        Post-process Tailwind color classes to avoid invalid numeric shades, e.g. bg-slate-750
-        or text-blue-845.
-
-        For any color utility like:
-          - bg-<color>-XYZ
-          - text-<color>-XYZ
-          - border-<color>-XYZ
-          - outline-<color>-XYZ
-          - ring-<color>-XYZ
-          - from-<color>-XYZ
-          - via-<color>-XYZ
-          - to-<color>-XYZ
-          - accent-<color>-XYZ
-          - caret-<color>-XYZ
-          - decoration-<color>-XYZ
-
-        where XYZ is not a valid Tailwind shade, we:
-        - Parse XYZ as an integer.
-        - If 0–99    -> snap to 50.
-        - If 100–199 -> snap to 100.
-        - If 200–299 -> snap to 200.
-        - ...
-        - If 800–899 -> snap to 800.
-        - If 900+    -> snap to 900.
-
-        Non-color utilities (e.g. p-4, gap-2, z-50) are left untouched.
+        Export signatures / types of the files most relevant to the spec and target.
         """
-        # Tailwind default color names
-        color_names = (
-            "slate", "gray", "zinc", "neutral", "stone",
-            "red", "orange", "amber", "yellow",
-            "lime", "green", "emerald", "teal", "cyan",
-            "sky", "blue", "indigo", "violet", "purple",
-            "fuchsia", "pink", "rose",
-        )
-        allowed_shades = {"50", "100", "200", "300", "400", "500", "600", "700", "800", "900"}
-
-        # Build a regex that matches ONLY color utilities with numeric shades
-        # e.g. bg-slate-750, text-blue-845, border-red-15, etc.
-        color_names_pattern = "|".join(color_names)
-        pattern = re.compile(
-            rf"\b("
-            rf"(?:bg|text|border|outline|ring|from|via|to|accent|caret|decoration)"
-            rf"-(?:{color_names_pattern})-"
-            rf")"
-            rf"(\d{{1,3}})\b"
+        if ctx.retrieval_index is None or self.top_k <= 0:
+            return ""
+        target = ctx.target_file.as_posix()
+        hits = ctx.retrieval_index.search(
+            f"{ctx.spec_text or ''}\n{target}",
+            top_k=self.top_k,
+            # The target is being regenerated; its old exports are not a contract
+            exclude=(target,),
         )
+        return ctx.retrieval_index.format_snippets(hits, self.snippet_tokens)
 
-        def snap_shade(shade_str: str) -> str:
+    def _pack_project_context(self, ctx: CodegenContext, other_prompt_text: str) -> str:
+        """
+        Relevance-ranked project file list that fits the model's token budget.
+        """
+        files = ctx.project_files
+        if files is None:
+            if not ctx.project_context:
+                return ""
             try:
-                n = int(shade_str)
-            except ValueError:
-                # If it's not an int at all, just default to 700 as a safe fallback
-                return "700"
-
-            if n <= 99:
-                return "50"
-            if n >= 900:
-                return "900"
-
-            # 100–199 -> 100, 200–299 -> 200, etc.
-            base = (n // 100) * 100
-            # Clamp to valid range
-            if base < 100:
-                base = 100
-            if base > 900:
-                base = 900
-            return str(base)
+                files = json.loads(ctx.project_context).get("files") or []
+            except (json.JSONDecodeError, AttributeError):
+                return ""
+
+        budget = self.packer.budget(other_prompt_text, self.max_tokens)
+        return self.packer.pack(
+            files,
+            root=str(ctx.project_path),
+            target_file=ctx.target_file.as_posix(),
+            spec_text=ctx.spec_text or "",
+            budget_tokens=budget,
+        )
 
-        def replace(match: re.Match) -> str:
-            prefix, shade = match.group(1), match.group(2)
-            if shade in allowed_shades:
-                return match.group(0)
+    def _generate_streaming(
+        self, ctx: CodegenContext, messages: list[dict[str, str]], processor: PostProcessor
+    ) -> str:
+        """
+        Stream the completion through processor; returns the cleaned code.
+        """
+        stats = StreamStats()
+        parts: list[str] = []
 
-            snapped = snap_shade(shade)
-            if snapped not in allowed_shades:
-                # final safety: if somehow still not valid, default to 700
-                snapped = "700"
+        chunks = self.llm.stream_chat_completion(
+            messages=messages,
+            temperature=0.0,
+            max_tokens=self.max_tokens,
+            stats=stats,
+        )
+        try:
+            # Raising inside the loop closes the stream, which cancels the generation
+            with closing(chunks):
+                for chunk in chunks:
+                    cleaned_chunk = processor.feed(chunk)
+                    if cleaned_chunk:
+                        parts.append(cleaned_chunk)
+                        if self.on_chunk is not None:
+                            self.on_chunk(ctx, cleaned_chunk)
+
+            tail = processor.finish()
+        except UnresolvedImportError as exc:
+            ctx.stream_stats = stats.as_dict()
+            print(f"[codegen] Cancelled after {stats.tokens} tokens: {exc}")
+            raise
+        if tail:
+            parts.append(tail)
+            if self.on_chunk is not None:
+                self.on_chunk(ctx, tail)
+
+        ctx.stream_stats = stats.as_dict()
+        print(f"[codegen] {stats.summary()}")
+        return "".join(parts)
 
-            return f"{prefix}{snapped}"
+    @staticmethod
+    def _strip_fence(text: str) -> str:
+        """
+        Defensive cleanup in case the model still wraps the code in ``` fences.
+        """
+        return strip_fence(text)
 
-        return pattern.sub(replace, text)
+    @staticmethod
+    def _sanitize_tailwind(text: str) -> str:
+        """
+        Snap invalid Tailwind color shades (e.g. bg-slate-750, text-blue-845)
+        down to a valid one; see orchestrator.codegen.postprocess.
+        """
+        return sanitize_tailwind(text)
 
 
 class BackupExistingFileStep:
     """
-    If the target file already exists, create a timestamped backup copy
-    under .orchestrator_backups/ relative to the project root.
+    If the target file already exists, back it up into the project's
+    content-addressed BackupStore (.orchestrator_backups/, see
+    orchestrator.backups). Unchanged files and identical contents cost no
+    extra copy; old backups are pruned by the store's retention policy.
     """
 
     def run(self, ctx: CodegenContext) -> None:
@@ -323,20 +472,10 @@ class BackupExistingFileStep:
             # Nothing to back up
             return
 
-        # .orchestrator_backups/src/App.tsx.20251205-132045.bak
-        from datetime import datetime
-
-        backup_root = ctx.project_path / ".orchestrator_backups"
-        backup_root.mkdir(parents=True, exist_ok=True)
-
-        rel_path = abs_target.relative_to(ctx.project_path)
-        timestamp = datetime.now().strftime("%Y%m%d-%H%M%S")
-
-        backup_dir = backup_root / rel_path.parent
-        backup_dir.mkdir(parents=True, exist_ok=True)
-
-        backup_file = backup_dir / f"{rel_path.name}.{timestamp}.bak"
-        backup_file.write_text(abs_target.read_text(encoding="utf-8"), encoding="utf-8")
+        rel_path = abs_target.relative_to(ctx.project_path).as_posix()
+        entry = get_backup_store(ctx.project_path).backup(abs_target, rel_path)
+        if entry is None:
+            print(f"[codegen] Backup of {rel_path} is up to date")
 
 
 RELATIVE_IMPORT_PATTERN = re.compile(
@@ -350,6 +489,22 @@ DYNAMIC_IMPORT_PATTERN = re.compile(
 )
 
 
+def _extract_imports(source: str) -> list[str]:
+    """
+    Extract every import specifier (relative, aliased or package) from TS/TSX
+    source code, including `export ... from` re-exports and dynamic imports.
+    """
+    imports: set[str] = set()
+
+    for m in IMPORT_FROM_PATTERN.finditer(source):
+        imports.add(m.group(1))
+
+    for m in ANY_DYNAMIC_IMPORT_PATTERN.finditer(source):
+        imports.add(m.group(1))
+
+    return sorted(imports)
+
+
 def _extract_relative_imports(source: str) -> list[str]:
     """
     Extract relative import specifiers from TS/TSX source code.
@@ -371,10 +526,79 @@ def _extract_relative_imports(source: str) -> list[str]:
     return sorted(imports)
 
 
+def imported_targets(target: Path, source: str, targets: list[Path]) -> set[Path]:
+    """
+    The members of targets that source (the code of target) imports relatively.
+    """
+    by_posix = {t.as_posix(): t for t in targets}
+    index = PathIndex(by_posix)
+    base_dir = target.parent.as_posix()
+    found: set[Path] = set()
+    for spec in _extract_relative_imports(source):
+        dep = by_posix.get(index.resolve(spec, base_dir) or "")
+        if dep is not None and dep != target:
+            found.add(dep)
+    return found
+
+
+def order_by_imports(targets: list[Path], sources: dict[Path, str]) -> list[Path]:
+    """
+    Order targets so that a target comes after the other targets it imports.
+
+    Imports are taken from sources (target -> TS/TSX source) with
+    _extract_relative_imports. Targets without a source, and targets in an
+    import cycle, keep their original relative order.
+    """
+    deps = {
+        t: imported_targets(t, sources[t], targets) if sources.get(t) else set()
+        for t in targets
+    }
+
+    ordered: list[Path] = []
+    placed: set[Path] = set()
+    remaining = list(targets)
+    while remaining:
+        ready = [t for t in remaining if deps[t] <= placed]
+        if not ready:
+            # Cycle: fall back to the original order for what is left
+            ready = remaining[:1]
+        for t in ready:
+            ordered.append(t)
+            placed.add(t)
+        remaining = [t for t in remaining if t not in placed]
+    return ordered
+
+
+class UnresolvedImportError(ValueError):
+    """
+    Generated code imports project files that do not exist (specifiers lists them).
+    """
+
+    def __init__(self, specifiers: list[str], message: str) -> None:
+        super().__init__(message)
+        self.specifiers = specifiers
+
+
+def validation_index(ctx: CodegenContext) -> PathIndex | None:
+    """
+    ctx.path_index with the files planned in the same run registered (they
+    count as existing), or None when the scan built no index.
+    """
+    index = ctx.path_index
+    if index is None:
+        return None
+    for planned in ctx.planned_files:
+        index.add(planned)
+    return index
+
+
 class ImportValidationStep:
     """
-    Validates that all relative imports in the generated code point to existing files
-    in the scanned project.
+    Validates that all relative imports (and tsconfig path aliases) in the
+    generated code point to existing files in the scanned project.
+
+    Resolution goes through ctx.path_index, built once by ProjectScanningStep
+    and shared by every target of a run.
 
     Strict mode: if any import cannot be resolved to a real file, the step raises
     and the task fails. No file is written.
@@ -382,90 +606,124 @@ class ImportValidationStep:
 
     def __init__(self) -> None:
         # Extensions we consider when resolving bare import paths without an extension.
-        self.candidate_exts: tuple[str, ...] = (
-            ".tsx",
-            ".ts",
-            ".jsx",
-            ".js",
-            ".mjs",
-            ".cjs",
-            ".json",
-        )
+        self.candidate_exts: tuple[str, ...] = CANDIDATE_EXTS
 
     def run(self, ctx: CodegenContext) -> None:
         if ctx.generated_code is None:
             raise ValueError("generated_code is not set. Run GenerateComponentStep first.")
 
-        if not ctx.project_context:
-            # If we somehow have no project context, we cannot validate; fail fast.
-            raise ValueError("project_context is not set. Run ProjectScanningStep first.")
-
-        try:
-            context_obj = json.loads(ctx.project_context)
-        except json.JSONDecodeError as exc:
-            raise ValueError(f"project_context is not valid JSON: {exc}") from exc
-
-        files = context_obj.get("files") or []
-        existing_paths = {str(entry.get("path")) for entry in files if "path" in entry}
+        index = validation_index(ctx)
+        if index is None:
+            index = self._index_from_context(ctx)
+            for planned in ctx.planned_files:
+                index.add(planned)
 
         # If project has no files, something is wrong; but don't block imports in that case.
-        if not existing_paths:
+        if not len(index):
             return
 
-        # Extract relative imports from the generated source.
-        imports = _extract_relative_imports(ctx.generated_code)
+        # Imports were collected while post-processing; otherwise scan the source
+        imports = ctx.generated_imports
+        if imports is None:
+            imports = _extract_imports(ctx.generated_code)
         if not imports:
             return  # nothing to validate
 
         base_dir = ctx.target_file.parent.as_posix()  # relative to project root
 
-        missing: list[str] = []
-
-        for spec in imports:
-            # spec is something like './Foo' or '../components/Sidebar'
-            # We resolve this relative to the target file directory.
-            rel = Path(base_dir) / spec
-            # Normalize to posix-style path relative to project root; remove leading './'
-            rel_norm = rel.as_posix()
-            if rel_norm.startswith("./"):
-                rel_norm = rel_norm[2:]
-
-            # If the spec already has an extension, check it directly.
-            suffix = Path(rel_norm).suffix
-            candidate_paths: list[str] = []
-
-            if suffix:
-                candidate_paths.append(rel_norm)
-            else:
-                # Try with our candidate extensions.
-                stem_path = rel_norm
-                candidate_paths.extend(stem_path + ext for ext in self.candidate_exts)
-                # Also support index files in directories: ./foo -> ./foo/index.tsx, etc.
-                candidate_paths.extend(
-                    stem_path.rstrip("/") + "/index" + ext for ext in self.candidate_exts
-                )
-
-            # See if any candidate exists in the project file list.
-            if not any(c in existing_paths for c in candidate_paths):
-                missing.append(spec)
+        missing = [
+            spec
+            for spec in imports
+            if index.is_project_specifier(spec) and index.resolve(spec, base_dir) is None
+        ]
 
         if missing:
             details = "\n  ".join(missing)
-            raise ValueError(
-                "ImportValidationStep failed: the following relative imports do not "
+            raise UnresolvedImportError(
+                missing,
+                "ImportValidationStep failed: the following relative or aliased imports do not "
                 "resolve to existing files in the project:\n"
                 f"  {details}\n\n"
                 "Either adjust the spec/prompt, create the referenced files, or relax "
                 "validation logic if this is intentional."
             )
 
+    def _index_from_context(self, ctx: CodegenContext) -> PathIndex:
+        if ctx.project_files is not None:
+            files = ctx.project_files
+        else:
+            if not ctx.project_context:
+                # If we somehow have no project context, we cannot validate; fail fast.
+                raise ValueError("project_context is not set. Run ProjectScanningStep first.")
+
+            try:
+                context_obj = json.loads(ctx.project_context)
+            except json.JSONDecodeError as exc:
+                raise ValueError(f"project_context is not valid JSON: {exc}") from exc
+
+            files = context_obj.get("files") or []
+
+        paths = [str(entry.get("path")) for entry in files if "path" in entry]
+        return PathIndex.from_project(ctx.project_path, paths) if paths else PathIndex([], exts=self.candidate_exts)
+
 
 class WriteGeneratedFileStep:
+    """
+    Writes ctx.generated_code to the target file, atomically and only if the
+    content changed (ctx.file_written records which).
+
+    stream_chunk() can be wired as a GenerateComponentStep on_chunk callback to
+    follow the generation live in <target>.partial; the target itself is only
+    written by run(), after validation and backup.
+    """
+
+    def __init__(self) -> None:
+        self._stream_file: TextIO | None = None
+        self._partial_path: Path | None = None
+
+    @staticmethod
+    def partial_path(ctx: CodegenContext) -> Path:
+        abs_target = ctx.abs_target_file
+        return abs_target.with_name(abs_target.name + ".partial")
+
+    def restart_stream(self, ctx: CodegenContext) -> None:
+        """
+        Discard the live preview, e.g. before a generation is retried.
+        """
+        if self._stream_file is not None:
+            self._stream_file.seek(0)
+            self._stream_file.truncate()
+
+    def stream_chunk(self, ctx: CodegenContext, chunk: str) -> None:
+        if self._stream_file is None:
+            self._partial_path = self.partial_path(ctx)
+            self._partial_path.parent.mkdir(parents=True, exist_ok=True)
+            self._stream_file = self._partial_path.open("w", encoding="utf-8")
+        self._stream_file.write(chunk)
+        self._stream_file.flush()
+        record_bytes_written(len(chunk.encode("utf-8")))
+
+    def discard(self) -> None:
+        """
+        Close and delete the live preview. run() does this after writing the
+        target; callers do it when the generation or validation failed.
+        """
+        if self._stream_file is None:
+            return
+        self._stream_file.close()
+        self._stream_file = None
+        if self._partial_path is not None:
+            self._partial_path.unlink(missing_ok=True)
+            self._partial_path = None
+
     def run(self, ctx: CodegenContext) -> None:
         if ctx.generated_code is None:
             raise ValueError("generated_code is not set. Run GenerateComponentStep first.")
 
-        abs_target = ctx.abs_target_file
-        abs_target.parent.mkdir(parents=True, exist_ok=True)
-        abs_target.write_text(ctx.generated_code, encoding="utf-8")
-        # MVP: direct overwrite. No diff/merge.
+        with span("file.write", "file", {"path": ctx.target_file.as_posix()}) as trace_args:
+            # Atomic replace; identical content is not rewritten (no spurious HMR rebuilds)
+            ctx.file_written = write_text_atomic(ctx.abs_target_file, ctx.generated_code)
+            trace_args.update(written=ctx.file_written)
+        if not ctx.file_written:
+            print(f"[codegen] Unchanged: {ctx.target_file.as_posix()} (not rewritten)")
+        self.discard()
@@ -1,6 +1,15 @@
 from __future__ import annotations
+import contextvars
+import copy
+import dataclasses
+import itertools
+import json
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List
+from typing import Any, Callable, Dict, List, Type, TypeVar
+from orchestrator.metrics import RunReport, track_step
+from orchestrator.tracing import Tracer, activated, span
 from .context import CodegenContext
 from .steps import (
     LoadProjectSpecStep,
@@ -10,31 +19,289 @@ from .steps import (
     BackupExistingFileStep,
     WriteGeneratedFileStep,
     Step,
+    imported_targets,
+    order_by_imports,
+)
+
+
+S = TypeVar("S")
+# Step types a multi-target run knows where to place
+MULTI_TARGET_STEP_TYPES = (
+    LoadProjectSpecStep,
+    ProjectScanningStep,
+    GenerateComponentStep,
+    ImportValidationStep,
+    BackupExistingFileStep,
+    WriteGeneratedFileStep,
 )
 
 
 class CodegenTask:
+    """
+    Generates one or more target files from a spec.
+
+    With several targets, the spec is loaded and the project scanned once,
+    the targets are generated concurrently (up to max_workers at a time), and
+    each file is validated and written only after the other targets it imports,
+    so components land on disk before the files that use them.
+
+    Each run records per-step metrics in ctx.run_report (a RunReport); in
+    multi-target runs, per-target steps are named "<Step>[<target>]".
+
+    A custom steps list is honoured with several targets too: the configured
+    load and scan steps run once, the generate and write steps are copied per
+    target (a streaming generator wired to the configured writer is rewired to
+    the target's copy), and steps left out of the list are skipped. Step types
+    other than the six built-in ones cannot be placed per target and raise
+    ValueError, as does a list without a GenerateComponentStep.
+    """
+
     def __init__(
         self,
         project_path: Path,
         spec_path: Path,
-        target_file: Path,
+        target_file: Path | None = None,
         steps: List[Step] | None = None,
+        stream: bool = False,
+        target_files: List[Path] | None = None,
+        max_workers: int = 4,
+        tracer: Tracer | None = None,
+        use_retrieval: bool | None = None,
     ) -> None:
+        targets = list(target_files or [])
+        if target_file is not None and target_file not in targets:
+            targets.insert(0, target_file)
+        if not targets:
+            raise ValueError("CodegenTask needs at least one target file.")
+
+        self.target_files: List[Path] = targets
+        self.stream = stream
+        self.max_workers = max(1, max_workers)
+        self.tracer = tracer
+        # target -> error message, for targets that failed in a multi-target run
+        self.failures: Dict[Path, str] = {}
+        self.report: RunReport | None = None
+        self._step_index = itertools.count()
+
         self.ctx = CodegenContext(
             project_path=project_path,
             spec_path=spec_path,
-            target_file=target_file,
+            target_file=targets[0],
+        )
+        write_step = WriteGeneratedFileStep()
+        generate_step = (
+            GenerateComponentStep(stream=True, on_chunk=write_step.stream_chunk, on_restart=write_step.restart_stream)
+            if stream
+            else GenerateComponentStep()
         )
         self.steps: List[Step] = steps or [
             LoadProjectSpecStep(),
-            ProjectScanningStep(),
-            GenerateComponentStep(),
+            ProjectScanningStep(use_retrieval=use_retrieval),
+            generate_step,
             ImportValidationStep(),
             BackupExistingFileStep(),
-            WriteGeneratedFileStep(),
+            write_step,
         ]
+        if len(targets) > 1:
+            unknown = [type(s).__name__ for s in self.steps if not isinstance(s, MULTI_TARGET_STEP_TYPES)]
+            if unknown:
+                raise ValueError(
+                    f"Custom step(s) {', '.join(unknown)} cannot run per target; "
+                    "use one target per CodegenTask with these steps."
+                )
+            if self._configured(GenerateComponentStep) is None:
+                raise ValueError("A multi-target CodegenTask needs a GenerateComponentStep in its steps.")
 
     def run(self) -> None:
+        self.report = self.ctx.run_report = RunReport(name="codegen")
+        self._step_index = itertools.count()
+        started = time.perf_counter()
+        try:
+            with activated(self.tracer), span("codegen", "run", {"targets": [t.as_posix() for t in self.target_files]}):
+                if len(self.target_files) == 1:
+                    self._run_single()
+                else:
+                    self._run_multi()
+        finally:
+            self.report.wall_seconds = time.perf_counter() - started
+
+    def _run_single(self) -> None:
+        try:
+            for step in self.steps:
+                self._tracked(type(step).__name__, step.run, self.ctx)
+        except BaseException:
+            # Do not leave <target>.partial behind after a failed generation or validation
+            for step in self.steps:
+                if isinstance(step, WriteGeneratedFileStep):
+                    step.discard()
+            raise
+
+    def _tracked(self, name: str, fn: Callable[[CodegenContext], Any], ctx: CodegenContext) -> None:
+        index = next(self._step_index)
+        with span(name, "step", {"index": index}), track_step(self.report, name, index):
+            fn(ctx)
+
+    def _target_context(self, target: Path) -> CodegenContext:
+        ctx = dataclasses.replace(
+            self.ctx,
+            target_file=target,
+            generated_code=None,
+            stream_stats=None,
+            planned_files=[t.as_posix() for t in self.target_files if t != target],
+        )
+        if ctx.project_context:
+            summary = json.loads(ctx.project_context)
+            summary["target_file"] = target.as_posix()
+            ctx.project_context = json.dumps(summary, separators=(",", ":"))
+        return ctx
+
+    def _configured(self, step_type: Type[S]) -> S | None:
+        return next((s for s in self.steps if isinstance(s, step_type)), None)
+
+    def _generator_for(self, writer: WriteGeneratedFileStep | None) -> GenerateComponentStep:
+        """
+        Per-target copy of the configured GenerateComponentStep, streaming into
+        writer where the configured one streamed into the configured writer.
+        """
+        configured = self._configured(GenerateComponentStep)
+        assert configured is not None
+        step = copy.copy(configured)
+        configured_writer = self._configured(WriteGeneratedFileStep)
+        if writer is not None and configured_writer is not None:
+            if getattr(configured.on_chunk, "__self__", None) is configured_writer:
+                step.on_chunk = writer.stream_chunk
+            if getattr(configured.on_restart, "__self__", None) is configured_writer:
+                step.on_restart = writer.restart_stream
+        return step
+
+    def _run_multi(self) -> None:
+        # Shared, once per run
         for step in self.steps:
-            step.run(self.ctx)
+            if isinstance(step, (LoadProjectSpecStep, ProjectScanningStep)):
+                self._tracked(type(step).__name__, step.run, self.ctx)
+
+        # One shared index validates every target; generated files count as existing
+        if self.ctx.path_index is not None:
+            for t in self.target_files:
+                self.ctx.path_index.add(t.as_posix())
+
+        contexts = {t: self._target_context(t) for t in self.target_files}
+        configured_writer = self._configured(WriteGeneratedFileStep)
+        writers = {
+            t: copy.copy(configured_writer) if configured_writer is not None else None for t in self.target_files
+        }
+
+        try:
+            self._generate_targets(contexts, writers)
+        except BaseException:
+            for writer in writers.values():
+                if writer is not None:
+                    writer.discard()
+            raise
+
+    def _generate_targets(
+        self,
+        contexts: Dict[Path, CodegenContext],
+        writers: Dict[Path, WriteGeneratedFileStep | None],
+    ) -> None:
+        # Generate dependencies first when regenerating existing files
+        existing_sources: Dict[Path, str] = {}
+        for t, ctx in contexts.items():
+            if ctx.abs_target_file.is_file():
+                existing_sources[t] = ctx.abs_target_file.read_text(encoding="utf-8")
+        submit_order = order_by_imports(self.target_files, existing_sources)
+
+        generated: Dict[Path, str] = {}
+        finalized: set[Path] = set()
+        self.failures = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="codegen") as pool:
+            running: Dict[Future, Path] = {}
+            for t in submit_order:
+                generate_step = self._generator_for(writers[t])
+                name = f"GenerateComponentStep[{t.as_posix()}]"
+                # Workers inherit the caller's context (active tracer)
+                worker_context = contextvars.copy_context()
+                running[pool.submit(worker_context.run, self._tracked, name, generate_step.run, contexts[t])] = t
+
+            while running:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in done:
+                    t = running.pop(fut)
+                    try:
+                        fut.result()
+                    except Exception as exc:
+                        self.failures[t] = f"generation failed: {exc}"
+                        if writers[t] is not None:
+                            writers[t].discard()
+                        continue
+                    generated[t] = contexts[t].generated_code or ""
+
+                # Validate and write everything whose imported targets are already settled
+                self._finalize_ready(contexts, writers, generated, finalized, pending=set(running.values()))
+
+        self._finalize_ready(contexts, writers, generated, finalized, pending=set())
+
+        if self.failures:
+            details = "\n  ".join(f"{t}: {err}" for t, err in self.failures.items())
+            raise RuntimeError(f"Codegen failed for {len(self.failures)} target(s):\n  {details}")
+
+    def _finalize_ready(
+        self,
+        contexts: Dict[Path, CodegenContext],
+        writers: Dict[Path, WriteGeneratedFileStep | None],
+        generated: Dict[Path, str],
+        finalized: set[Path],
+        pending: set[Path],
+    ) -> None:
+        """
+        Validate, back up and write every generated target whose imported targets
+        are already written. With nothing pending, whatever is left is part of an
+        import cycle and is written in best-effort order.
+        """
+        progress = True
+        while progress:
+            progress = False
+            for t in self.target_files:
+                if t not in generated or t in finalized or t in self.failures:
+                    continue
+                deps = imported_targets(t, generated[t], self.target_files)
+                failed_deps = sorted(d.as_posix() for d in deps if d in self.failures)
+                if failed_deps:
+                    self.failures[t] = "imports failed target(s): " + ", ".join(failed_deps)
+                    progress = True
+                    continue
+                if deps <= finalized:
+                    self._finalize(t, contexts[t], writers[t], finalized)
+                    progress = True
+
+        if pending:
+            return
+
+        leftover = [t for t in self.target_files if t in generated and t not in finalized and t not in self.failures]
+        for t in order_by_imports(leftover, generated):
+            self._finalize(t, contexts[t], writers[t], finalized)
+
+    def _finalize(
+        self,
+        target: Path,
+        ctx: CodegenContext,
+        writer: WriteGeneratedFileStep | None,
+        finalized: set[Path],
+    ) -> None:
+        suffix = f"[{target.as_posix()}]"
+        per_target = [
+            self._configured(ImportValidationStep),
+            self._configured(BackupExistingFileStep),
+            writer,
+        ]
+        try:
+            for step in per_target:
+                if step is not None:
+                    self._tracked(type(step).__name__ + suffix, step.run, ctx)
+        except Exception as exc:
+            self.failures[target] = str(exc)
+            if writer is not None:
+                writer.discard()
+            return
+        finalized.add(target)
@@ -42,12 +42,16 @@ def generate_task_files(task_name_raw: str) -> None:
         f"""
         from __future__ import annotations
 
+        from pathlib import Path
         from orchestrator.engine import Engine
         from orchestrator.steps.file_ops import LoadFile, WriteFile
         from orchestrator.steps.llm_step import LLMStep
 
 
-        def {task_builder_name}() -> Engine:
+        def {task_builder_name}(
+            input_path: str | Path = "examples/{task_slug}_input.txt",
+            output_path: str | Path = "examples/{task_slug}_output.txt",
+        ) -> Engine:
             \"\"\"Engine for the '{task_slug}' task.
 
             Customize:
@@ -62,13 +66,13 @@ def generate_task_files(task_name_raw: str) -> None:
             )
 
             steps = [
-                LoadFile("examples/{task_slug}_input.txt", context_key="input_text"),
+                LoadFile(input_path, context_key="input_text"),
                 LLMStep(
                     system_prompt=system_prompt,
                     input_key="input_text",
                     output_key="output_text",
                 ),
-                WriteFile("examples/{task_slug}_output.txt", context_key="output_text"),
+                WriteFile(output_path, context_key="output_text"),
             ]
 
             return Engine(steps)
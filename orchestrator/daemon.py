@@ -0,0 +1,537 @@
+from __future__ import annotations
+
+import contextvars
+import hmac
+import http.client
+import io
+import json
+import os
+import secrets
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable, Dict, List, TextIO
+
+
+# This module is also the thin client (run_daemon.py): keep module-level
+# imports to the standard library; the orchestrator is imported by the server only.
+
+COMMANDS = ("codegen", "task")
+DEFAULT_HOST = "127.0.0.1"
+
+
+def default_socket_path() -> str:
+    """
+    ORCHESTRATOR_DAEMON_SOCKET, or a per-user socket in the temp directory.
+    """
+    uid = os.getuid() if hasattr(os, "getuid") else "user"
+    return os.getenv("ORCHESTRATOR_DAEMON_SOCKET") or os.path.join(
+        tempfile.gettempdir(), f"ai-orchestrator-{uid}.sock"
+    )
+
+
+def default_token_path() -> str:
+    """
+    ORCHESTRATOR_DAEMON_TOKEN_FILE, or a per-user file in the temp directory.
+    """
+    uid = os.getuid() if hasattr(os, "getuid") else "user"
+    return os.getenv("ORCHESTRATOR_DAEMON_TOKEN_FILE") or os.path.join(
+        tempfile.gettempdir(), f"ai-orchestrator-{uid}.token"
+    )
+
+
+def _write_token(path: str) -> str:
+    """
+    Write a fresh random token to path, readable by the owner only.
+    """
+    token = secrets.token_urlsafe(32)
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+    # O_EXCL: never write the token into a file someone else created
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    with os.fdopen(fd, "w", encoding="utf-8") as fh:
+        fh.write(token)
+    return token
+
+
+# --- output routing ---
+
+# Where print() output of the job running in this context goes (None: the real stream)
+_job_sink: contextvars.ContextVar["_JobOutput | None"] = contextvars.ContextVar("orchestrator_job_sink", default=None)
+
+
+class _RoutedStream(io.TextIOBase):
+    """
+    sys.stdout / sys.stderr replacement that sends writes made while a job
+    runs (in its thread, or threads that copied its context) to that job's
+    client, and everything else to the original stream.
+    """
+
+    def __init__(self, name: str, fallback: TextIO) -> None:
+        self.name = name
+        self.fallback = fallback
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        sink = _job_sink.get()
+        if sink is None:
+            return self.fallback.write(text)
+        sink.write(self.name, text)
+        return len(text)
+
+    def flush(self) -> None:
+        sink = _job_sink.get()
+        if sink is None:
+            self.fallback.flush()
+
+
+class _JobOutput:
+    """
+    Line-buffered NDJSON writer of one job's output: {"stdout": "..."} /
+    {"stderr": "..."} events, then a final {"exit_code": n, "seconds": s}.
+    """
+
+    def __init__(self, wfile: Any) -> None:
+        self.wfile = wfile
+        self._buffers: Dict[str, str] = {"stdout": "", "stderr": ""}
+        self._lock = threading.Lock()
+
+    def _send(self, event: Dict[str, Any]) -> None:
+        self.wfile.write((json.dumps(event) + "\n").encode("utf-8"))
+        self.wfile.flush()
+
+    def write(self, stream: str, text: str) -> None:
+        with self._lock:
+            buffered = self._buffers[stream] + text
+            cut = buffered.rfind("\n") + 1
+            self._buffers[stream] = buffered[cut:]
+            if cut:
+                # A disconnected client raises here, which aborts its job
+                self._send({stream: buffered[:cut]})
+
+    def close(self, exit_code: int, seconds: float) -> None:
+        with self._lock:
+            for stream, rest in self._buffers.items():
+                if rest:
+                    self._send({stream: rest})
+            self._buffers = {"stdout": "", "stderr": ""}
+            self._send({"exit_code": exit_code, "seconds": seconds})
+
+
+# --- server ---
+
+
+class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+class OrchestratorDaemon:
+    """
+    Long-lived process that runs codegen and task jobs with warm state.
+
+    Kept across jobs: imported modules, the pooled LLM backend (keep-alive
+    connections), each project's scan and retrieval indexes (in memory, see
+    keep_indexes_warm()) and the task registry. Jobs arrive over HTTP on a
+    Unix socket (default, see default_socket_path()) or on 127.0.0.1:port:
+
+      POST /jobs      {"command": "codegen" | "task", "argv": [...], "cwd": "..."}
+                      -> NDJSON stream of output events, then the exit code
+      GET  /status    counters and warm projects
+      POST /shutdown
+
+    The Unix socket is created with mode 0600. On a TCP port, which any
+    local user can reach, every request must carry "Authorization: Bearer
+    <token>"; the token is random per start and written to a 0600 file
+    (default_token_path()) that DaemonClient reads.
+
+    argv is what run_codegen.py (or run_daemon.py task) takes; relative paths
+    are resolved against the client's cwd. Jobs run concurrently, except that
+    codegen jobs on the same project are serialized. Caches and checkpoints
+    (.orchestrator_cache/) live in the daemon's working directory.
+    """
+
+    def __init__(
+        self,
+        socket_path: str | None = None,
+        port: int | None = None,
+        host: str = DEFAULT_HOST,
+        token_path: str | None = None,
+    ) -> None:
+        self.socket_path = None if port is not None else (socket_path or default_socket_path())
+        self.port = port
+        self.host = host
+        self.token_path = token_path or default_token_path()
+        # Required bearer token (TCP mode only)
+        self.token: str | None = None
+        self.started = time.time()
+        self.jobs_run = 0
+        self.jobs_failed = 0
+        self.jobs_running = 0
+        self._lock = threading.Lock()
+        self._project_locks: Dict[str, threading.Lock] = {}
+        self._server: socketserver.BaseServer | None = None
+
+    # --- warm state ---
+
+    def warm_up(self) -> None:
+        """
+        Import everything a job needs and enable in-memory project indexes.
+        """
+        import run_codegen  # noqa: F401
+        import tasks  # noqa: F401
+        from orchestrator.backend import get_backend
+        from orchestrator.codegen.steps import keep_indexes_warm
+
+        keep_indexes_warm(True)
+        get_backend()
+        for stream in ("stdout", "stderr"):
+            current = getattr(sys, stream)
+            if not isinstance(current, _RoutedStream):
+                setattr(sys, stream, _RoutedStream(stream, current))
+
+    def _project_lock(self, project_path: Path) -> threading.Lock:
+        with self._lock:
+            return self._project_locks.setdefault(str(project_path), threading.Lock())
+
+    # --- jobs ---
+
+    def run_job(self, command: str, argv: List[str], cwd: str) -> int:
+        """
+        Run one job in the calling thread; returns its exit code. Output goes
+        wherever _job_sink points.
+        """
+        try:
+            if command == "codegen":
+                self._run_codegen(argv, Path(cwd))
+            elif command == "task":
+                self._run_task(argv, Path(cwd))
+            else:
+                raise ValueError(f"Unknown command '{command}'. Expected one of {', '.join(COMMANDS)}.")
+        except SystemExit as exc:
+            # argparse errors and --help
+            code = exc.code
+            return code if isinstance(code, int) else (0 if code is None else 1)
+        except Exception as exc:
+            print(f"[daemon] {type(exc).__name__}: {exc}", file=sys.stderr)
+            return 1
+        return 0
+
+    def _run_codegen(self, argv: List[str], cwd: Path) -> None:
+        import run_codegen
+
+        args = run_codegen.parse_args(argv)
+        for name in ("project_path", "spec_path", "metrics_jsonl", "metrics_prom", "trace"):
+            value = getattr(args, name)
+            if value:
+                setattr(args, name, str(cwd / value))
+        with self._project_lock(Path(args.project_path).resolve()):
+            run_codegen.run(args)
+
+    def _run_task(self, argv: List[str], cwd: Path) -> None:
+        import argparse
+        import inspect
+
+        from orchestrator.checkpoint import CheckpointStore
+        from tasks import TASK_BUILDERS
+
+        parser = argparse.ArgumentParser(prog="run_daemon task", description="Run a registered task.")
+        parser.add_argument("--task", default="example", choices=sorted(TASK_BUILDERS))
+        parser.add_argument("--input-path", help="Input file (default: the task's own default).")
+        parser.add_argument("--output-path", help="Output file (default: the task's own default).")
+        parser.add_argument("--resume", action="store_true", help="Continue a failed run from its last finished step.")
+        args = parser.parse_args(argv)
+
+        builder = TASK_BUILDERS[args.task]
+        params = inspect.signature(builder).parameters
+        input_path = cwd / (args.input_path or params["input_path"].default)
+        output_path = cwd / (args.output_path or params["output_path"].default)
+
+        engine = builder(input_path=input_path, output_path=output_path)
+        engine.checkpoints = engine.checkpoints or CheckpointStore()
+        engine.run(resume=args.resume)
+        print(f"Task '{args.task}' completed: {output_path}")
+
+    def status(self) -> Dict[str, Any]:
+        from orchestrator.codegen import steps
+
+        with self._lock:
+            return {
+                "pid": os.getpid(),
+                "uptime_seconds": time.time() - self.started,
+                "jobs_run": self.jobs_run,
+                "jobs_failed": self.jobs_failed,
+                "jobs_running": self.jobs_running,
+                "warm_projects": sorted(str(p) for p in (steps._warm_indexes or {})),
+                "cwd": os.getcwd(),
+            }
+
+    # --- transport ---
+
+    def _handler(self) -> type:
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.0"
+
+            def log_message(self, format: str, *args: Any) -> None:
+                pass
+
+            def address_string(self) -> str:
+                return "local"
+
+            def _send_json(self, status: int, payload: Dict[str, Any]) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _authorized(self) -> bool:
+                if daemon.token is None:
+                    return True
+                given = self.headers.get("Authorization") or ""
+                if hmac.compare_digest(given.encode("utf-8"), f"Bearer {daemon.token}".encode("utf-8")):
+                    return True
+                self._send_json(401, {"error": "missing or invalid bearer token"})
+                return False
+
+            def do_GET(self) -> None:
+                if not self._authorized():
+                    return
+                if self.path.rstrip("/") != "/status":
+                    self._send_json(404, {"error": "not found"})
+                    return
+                self._send_json(200, daemon.status())
+
+            def do_POST(self) -> None:
+                if not self._authorized():
+                    return
+                path = self.path.rstrip("/")
+                if path == "/shutdown":
+                    self._send_json(200, {"ok": True})
+                    threading.Thread(target=daemon.shutdown, daemon=True).start()
+                    return
+                if path != "/jobs":
+                    self._send_json(404, {"error": "not found"})
+                    return
+                try:
+                    length = int(self.headers.get("Content-Length") or 0)
+                    job = json.loads(self.rfile.read(length) or b"{}")
+                    command = str(job["command"])
+                    argv = [str(a) for a in job.get("argv") or []]
+                    cwd = str(job.get("cwd") or os.getcwd())
+                except (ValueError, KeyError, TypeError) as exc:
+                    self._send_json(400, {"error": f"invalid job: {exc}"})
+                    return
+
+                self.send_response(200)
+                self.send_header("Content-Type", "application/x-ndjson")
+                self.end_headers()
+                output = _JobOutput(self.wfile)
+                daemon._job_started()
+                started = time.perf_counter()
+                token = _job_sink.set(output)
+                code = 1
+                try:
+                    code = daemon.run_job(command, argv, cwd)
+                    output.close(code, time.perf_counter() - started)
+                except OSError:
+                    # The client went away; its job was aborted on the next write
+                    pass
+                finally:
+                    _job_sink.reset(token)
+                    daemon._job_finished(code == 0)
+
+        return Handler
+
+    def _job_started(self) -> None:
+        with self._lock:
+            self.jobs_running += 1
+
+    def _job_finished(self, ok: bool) -> None:
+        with self._lock:
+            self.jobs_running -= 1
+            self.jobs_run += 1
+            if not ok:
+                self.jobs_failed += 1
+
+    def serve_forever(self) -> None:
+        self.warm_up()
+        handler = self._handler()
+        if self.socket_path is not None:
+            if os.path.exists(self.socket_path):
+                if DaemonClient(socket_path=self.socket_path).ping():
+                    raise RuntimeError(f"A daemon is already listening on {self.socket_path}")
+                os.unlink(self.socket_path)
+            self._server = _UnixHTTPServer(self.socket_path, handler)
+            os.chmod(self.socket_path, 0o600)
+            where = self.socket_path
+        else:
+            self.token = _write_token(self.token_path)
+            self._server = ThreadingHTTPServer((self.host, self.port or 0), handler)
+            self._server.daemon_threads = True
+            self.port = self._server.server_address[1]
+            where = f"http://{self.host}:{self.port} (token in {self.token_path})"
+        print(f"[daemon] Listening on {where} (pid {os.getpid()})")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+            for path in (self.socket_path, self.token_path if self.token is not None else None):
+                if path is not None:
+                    try:
+                        os.unlink(path)
+                    except OSError:
+                        pass
+            print("[daemon] Stopped")
+
+    def shutdown(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+
+
+# --- client ---
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, socket_path: str, timeout: float | None = None) -> None:
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self) -> None:
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        if self.timeout is not None:
+            self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class DaemonClient:
+    """
+    Thin stdlib client of OrchestratorDaemon. Talks to url (or
+    ORCHESTRATOR_DAEMON_URL, e.g. http://127.0.0.1:8765) if set, else to the
+    Unix socket. Over HTTP it sends the bearer token from token_path
+    (default_token_path()).
+    """
+
+    def __init__(self, socket_path: str | None = None, url: str | None = None, token_path: str | None = None) -> None:
+        self.url = url or os.getenv("ORCHESTRATOR_DAEMON_URL") or None
+        self.socket_path = socket_path or default_socket_path()
+        self.token_path = token_path or default_token_path()
+
+    def _auth_headers(self) -> Dict[str, str]:
+        if not self.url:
+            return {}
+        try:
+            with open(self.token_path, encoding="utf-8") as fh:
+                return {"Authorization": f"Bearer {fh.read().strip()}"}
+        except OSError:
+            return {}
+
+    def _connection(self, timeout: float | None) -> http.client.HTTPConnection:
+        if self.url:
+            host_port = self.url.split("://", 1)[-1].rstrip("/")
+            return http.client.HTTPConnection(host_port, timeout=timeout)
+        return _UnixHTTPConnection(self.socket_path, timeout=timeout)
+
+    def _send(
+        self, conn: http.client.HTTPConnection, method: str, path: str, body: Dict[str, Any] | None = None
+    ) -> http.client.HTTPResponse:
+        payload = json.dumps(body).encode("utf-8") if body is not None else None
+        headers = {"Content-Type": "application/json"} if payload is not None else {}
+        headers.update(self._auth_headers())
+        conn.request(method, path, body=payload, headers=headers)
+        return conn.getresponse()
+
+    def _request(self, method: str, path: str, body: Dict[str, Any] | None = None, timeout: float | None = None):
+        conn = self._connection(timeout)
+        return conn, self._send(conn, method, path, body)
+
+    def ping(self) -> bool:
+        """
+        True if a daemon answers (even one that rejects our token).
+        """
+        try:
+            conn, resp = self._request("GET", "/status", timeout=2.0)
+            resp.read()
+            conn.close()
+            return resp.status in (200, 401)
+        except (OSError, http.client.HTTPException):
+            return False
+
+    @staticmethod
+    def _check(resp: http.client.HTTPResponse, body: bytes) -> None:
+        if resp.status != 200:
+            raise RuntimeError(f"Daemon rejected the request: {body.decode('utf-8', errors='replace')}")
+
+    def status(self) -> Dict[str, Any]:
+        conn, resp = self._request("GET", "/status", timeout=5.0)
+        try:
+            body = resp.read()
+            self._check(resp, body)
+            return json.loads(body)
+        finally:
+            conn.close()
+
+    def shutdown(self) -> None:
+        conn, resp = self._request("POST", "/shutdown", {}, timeout=5.0)
+        try:
+            self._check(resp, resp.read())
+        finally:
+            conn.close()
+
+    def run(
+        self,
+        command: str,
+        argv: List[str],
+        cwd: str | None = None,
+        on_output: Callable[[str, str], None] | None = None,
+    ) -> int:
+        """
+        Submit a job and relay its output as it arrives (default: to this
+        process's stdout/stderr). Returns the job's exit code.
+
+        Raises OSError only if no daemon accepts the connection, i.e. before
+        the job was sent. Once it was, the daemon may already be running it,
+        so a lost connection raises RuntimeError instead of inviting a retry.
+        """
+        job = {"command": command, "argv": argv, "cwd": cwd or os.getcwd()}
+        conn = self._connection(None)
+        try:
+            conn.connect()
+            try:
+                return self._relay(self._send(conn, "POST", "/jobs", job), on_output)
+            except (OSError, http.client.HTTPException, ValueError) as exc:
+                raise RuntimeError(f"Lost the connection to the daemon during the job: {exc}") from exc
+        finally:
+            conn.close()
+
+    def _relay(self, resp: http.client.HTTPResponse, on_output: Callable[[str, str], None] | None) -> int:
+        if resp.status != 200:
+            self._check(resp, resp.read())
+        exit_code: int | None = None
+        for line in resp:
+            event = json.loads(line)
+            if "exit_code" in event:
+                exit_code = int(event["exit_code"])
+                continue
+            for stream in ("stdout", "stderr"):
+                if stream in event:
+                    if on_output is not None:
+                        on_output(stream, event[stream])
+                    else:
+                        target = sys.stdout if stream == "stdout" else sys.stderr
+                        target.write(event[stream])
+                        target.flush()
+        if exit_code is None:
+            raise RuntimeError("The daemon closed the connection before the job finished.")
+        return exit_code
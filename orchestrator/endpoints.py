@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List
+
+
+DEFAULT_EJECT_AFTER = 1
+DEFAULT_EJECT_SECONDS = 10.0
+MAX_EJECT_SECONDS = 300.0
+DEFAULT_HEALTH_INTERVAL_SECONDS = 5.0
+# Weight of the newest sample in the per-endpoint latency average
+LATENCY_EWMA_ALPHA = 0.2
+
+
+@dataclass
+class Endpoint:
+    """
+    One OpenAI-compatible server in an EndpointPool, with its routing state.
+    """
+
+    url: str
+    outstanding: int = 0
+    requests: int = 0
+    errors: int = 0
+    consecutive_failures: int = 0
+    ejections: int = 0
+    # Ejections and failed health checks since the endpoint was last admitted
+    backoff_level: int = 0
+    ejected_until: float | None = None
+    latency_ewma: float | None = None
+
+    @property
+    def ejected(self) -> bool:
+        return self.ejected_until is not None
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "url": self.url,
+            "outstanding": self.outstanding,
+            "requests": self.requests,
+            "errors": self.errors,
+            "ejected": self.ejected,
+            "ejections": self.ejections,
+            "latency_ewma_seconds": self.latency_ewma,
+        }
+
+
+class EndpointPool:
+    """
+    Routes requests across several servers by least outstanding requests.
+
+    acquire() picks the admitted endpoint with the fewest in-flight requests
+    (ties go to the lower average latency) and blocks while every admitted
+    endpoint already has max_outstanding requests. release() reports the
+    outcome: after eject_after consecutive failures (timeouts, connection
+    errors, 5xx) an endpoint is ejected and receives no traffic until a health
+    probe succeeds; the wait before the next probe doubles on every failed
+    probe, up to MAX_EJECT_SECONDS.
+
+    Probes run on a background thread every health_interval seconds when a
+    probe callable is given and the pool has more than one endpoint. If every
+    endpoint is ejected, requests still go to the one due back soonest rather
+    than waiting forever, so a dead setup fails loudly.
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        max_outstanding: int,
+        eject_after: int | None = None,
+        eject_seconds: float | None = None,
+        probe: Callable[[str], bool] | None = None,
+        health_interval: float | None = None,
+    ) -> None:
+        self.endpoints: List[Endpoint] = [Endpoint(url=u.rstrip("/")) for u in urls]
+        if not self.endpoints:
+            raise ValueError("EndpointPool needs at least one endpoint URL.")
+        self.max_outstanding = max(1, max_outstanding)
+        self.eject_after = eject_after or int(os.getenv("LMSTUDIO_EJECT_AFTER", str(DEFAULT_EJECT_AFTER)))
+        self.eject_seconds = eject_seconds or float(os.getenv("LMSTUDIO_EJECT_SEC", str(DEFAULT_EJECT_SECONDS)))
+        self.health_interval = health_interval or float(
+            os.getenv("LMSTUDIO_HEALTH_INTERVAL_SEC", str(DEFAULT_HEALTH_INTERVAL_SECONDS))
+        )
+        self.probe = probe
+
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._health_thread: threading.Thread | None = None
+        if probe is not None and len(self.endpoints) > 1:
+            self._health_thread = threading.Thread(target=self._health_loop, name="llm-health", daemon=True)
+            self._health_thread.start()
+
+    def __len__(self) -> int:
+        return len(self.endpoints)
+
+    def _pick(self, exclude: Iterable[Endpoint] = ()) -> Endpoint | None:
+        best: Endpoint | None = None
+        for ep in self.endpoints:
+            if ep.ejected or ep.outstanding >= self.max_outstanding or ep in exclude:
+                continue
+            if best is None or (ep.outstanding, ep.latency_ewma or 0.0) < (best.outstanding, best.latency_ewma or 0.0):
+                best = ep
+        return best
+
+    def _take(self, ep: Endpoint) -> Endpoint:
+        ep.outstanding += 1
+        ep.requests += 1
+        return ep
+
+    def acquire(self) -> Endpoint:
+        """
+        Reserve a slot on the least loaded admitted endpoint, waiting for one if needed.
+        """
+        with self._cond:
+            while True:
+                ep = self._pick()
+                if ep is not None:
+                    return self._take(ep)
+                if all(e.ejected for e in self.endpoints):
+                    fallback = min(self.endpoints, key=lambda e: (e.ejected_until or 0.0, e.outstanding))
+                    if fallback.outstanding < self.max_outstanding:
+                        return self._take(fallback)
+                self._cond.wait()
+
+    def try_acquire_idle(self, exclude: Iterable[Endpoint] = ()) -> Endpoint | None:
+        """
+        Reserve an admitted endpoint with nothing in flight, or return None (used for hedging).
+        """
+        exclude = list(exclude)
+        with self._cond:
+            ep = self._pick(exclude)
+            if ep is None or ep.outstanding:
+                return None
+            return self._take(ep)
+
+    def release(self, ep: Endpoint, ok: bool, seconds: float | None = None) -> None:
+        with self._cond:
+            ep.outstanding -= 1
+            if ok:
+                ep.consecutive_failures = 0
+                if seconds is not None:
+                    ep.latency_ewma = (
+                        seconds
+                        if ep.latency_ewma is None
+                        else LATENCY_EWMA_ALPHA * seconds + (1 - LATENCY_EWMA_ALPHA) * ep.latency_ewma
+                    )
+                if ep.ejected and ep.outstanding == 0:
+                    # A fallback request got through: the server is back
+                    self._admit(ep)
+            else:
+                ep.errors += 1
+                ep.consecutive_failures += 1
+                if not ep.ejected and ep.consecutive_failures >= self.eject_after and len(self.endpoints) > 1:
+                    self._eject(ep, self.eject_seconds)
+            self._cond.notify_all()
+
+    def _eject(self, ep: Endpoint, seconds: float) -> None:
+        ep.ejections += 1
+        ep.backoff_level += 1
+        ep.ejected_until = time.monotonic() + seconds
+        print(f"[llm] Ejected endpoint {ep.url} for {seconds:.0f}s after {ep.consecutive_failures} failure(s)")
+
+    def _admit(self, ep: Endpoint) -> None:
+        ep.ejected_until = None
+        ep.consecutive_failures = 0
+        # The next incident starts from the base ejection time again
+        ep.backoff_level = 0
+        print(f"[llm] Re-admitted endpoint {ep.url}")
+
+    def check_health(self) -> None:
+        """
+        Probe every ejected endpoint that is due and re-admit the healthy ones.
+        """
+        if self.probe is None:
+            return
+        now = time.monotonic()
+        with self._cond:
+            due = [ep for ep in self.endpoints if ep.ejected_until is not None and ep.ejected_until <= now]
+        for ep in due:
+            healthy = self.probe(ep.url)
+            with self._cond:
+                if not ep.ejected:
+                    continue
+                if healthy:
+                    self._admit(ep)
+                else:
+                    # Back off: double the wait with every failed check of this incident, capped
+                    wait = min(MAX_EJECT_SECONDS, self.eject_seconds * 2 ** min(ep.backoff_level, 8))
+                    ep.backoff_level += 1
+                    ep.ejected_until = time.monotonic() + wait
+                self._cond.notify_all()
+
+    def _health_loop(self) -> None:
+        while not self._stop.wait(self.health_interval):
+            try:
+                self.check_health()
+            except Exception as exc:
+                print(f"[llm] Health check failed: {exc}")
+
+    def stats(self) -> List[Dict[str, object]]:
+        with self._cond:
+            return [ep.as_dict() for ep in self.endpoints]
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._health_thread is not None:
+            self._health_thread.join(timeout=1.0)
+            self._health_thread = None
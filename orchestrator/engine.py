@@ -1,20 +1,122 @@
 from __future__ import annotations
 
-from typing import Iterable, List
+import time
+from typing import Iterable, List, Set, Tuple
+from .checkpoint import CheckpointRun, CheckpointStore, default_checkpoint_store, pipeline_key
+from .metrics import RUN_REPORT_KEY, RunReport
+from .scheduler import StepGraph, arun_tracked, run_tracked
+from .tracing import Tracer, activated, span
 from .steps.base import Step, Context
 
 
+DEFAULT_MAX_WORKERS = 8
+
+
 class Engine:
     """
     Orchestrates a sequence of Steps over a shared context.
+
+    Steps that declare their context reads/writes are scheduled as a dependency
+    graph: steps with no dependency between them run concurrently, up to
+    max_workers at a time. Steps without declarations run alone, in list order.
+    max_workers=1 restores the plain sequential loop.
+
+    run() executes steps on threads; run_async() awaits each step's arun(),
+    so many engines can share one event loop.
+
+    Every run records per-step metrics (wall/CPU time, LLM tokens, bytes
+    read/written) in a RunReport, stored as context["run_report"] and as
+    self.last_report (also when a step fails).
+
+    With a tracer (or inside an active one, e.g. a traced batch run), the run,
+    its steps, LLM requests and file operations are recorded as trace spans.
+
+    With a CheckpointStore (checkpoints=..., or ORCHESTRATOR_CHECKPOINTS=1),
+    each finished step's outputs are saved under a key derived from the steps'
+    configuration and the initial context. run(resume=True) restores the
+    steps that finished in an earlier, failed run of the same pipeline and
+    runs only the rest; large restored values are loaded when first read.
+    Checkpoints are removed once a run succeeds.
     """
 
-    def __init__(self, steps: Iterable[Step]) -> None:
+    def __init__(
+        self,
+        steps: Iterable[Step],
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        name: str = "engine",
+        tracer: Tracer | None = None,
+        checkpoints: CheckpointStore | None = None,
+    ) -> None:
         self.steps: List[Step] = list(steps)
+        self.max_workers = max(1, max_workers)
+        self.name = name
+        self.tracer = tracer
+        self.checkpoints = checkpoints if checkpoints is not None else default_checkpoint_store()
+        # Built eagerly so conflicting writes are reported before anything runs
+        self.graph = StepGraph(self.steps)
+        self.last_report: RunReport | None = None
 
-    def run(self, initial_context: Context | None = None) -> Context:
+    def _prepare(self, context: Context, resume: bool) -> Tuple[Context, CheckpointRun | None, Set[int]]:
+        if self.checkpoints is None:
+            return context, None, set()
+        checkpoint = self.checkpoints.open(pipeline_key(self.steps, context))
+        if not resume:
+            checkpoint.clear()
+            return context, checkpoint, set()
+        skip, context = checkpoint.restore(self.graph.dependencies, context)
+        if skip:
+            print(
+                f"[checkpoint] Resuming '{self.name}': {len(skip)} of {len(self.steps)} step(s) "
+                f"restored from {checkpoint.directory}"
+            )
+        return context, checkpoint, skip
+
+    def run(self, initial_context: Context | None = None, resume: bool = False) -> Context:
+        context: Context = initial_context or {}
+        report = self.last_report = RunReport(name=self.name)
+        started = time.perf_counter()
+        context, checkpoint, skip = self._prepare(context, resume)
+        on_step_done = None if checkpoint is None else (lambda i, ctx: checkpoint.save(i, self.steps[i], ctx))
+        try:
+            with activated(self.tracer), span(self.name, "run"):
+                if self.max_workers > 1:
+                    context = self.graph.run(context, self.max_workers, report, skip, on_step_done)
+                else:
+                    for i, step in enumerate(self.steps):
+                        if i in skip:
+                            continue
+                        context = run_tracked(step, i, context, report)
+                        if on_step_done is not None:
+                            on_step_done(i, context)
+        finally:
+            report.wall_seconds = time.perf_counter() - started
+
+        if checkpoint is not None:
+            checkpoint.clear()
+        context[RUN_REPORT_KEY] = report
+        return context
+
+    async def run_async(self, initial_context: Context | None = None, resume: bool = False) -> Context:
         context: Context = initial_context or {}
-        for step in self.steps:
-            context = step.run(context)
-            
+        report = self.last_report = RunReport(name=self.name)
+        started = time.perf_counter()
+        context, checkpoint, skip = self._prepare(context, resume)
+        on_step_done = None if checkpoint is None else (lambda i, ctx: checkpoint.save(i, self.steps[i], ctx))
+        try:
+            with activated(self.tracer), span(self.name, "run"):
+                if self.max_workers > 1:
+                    context = await self.graph.arun(context, self.max_workers, report, skip, on_step_done)
+                else:
+                    for i, step in enumerate(self.steps):
+                        if i in skip:
+                            continue
+                        context = await arun_tracked(step, i, context, report)
+                        if on_step_done is not None:
+                            on_step_done(i, context)
+        finally:
+            report.wall_seconds = time.perf_counter() - started
+
+        if checkpoint is not None:
+            checkpoint.clear()
+        context[RUN_REPORT_KEY] = report
         return context
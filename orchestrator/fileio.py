@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+
+from .metrics import record_bytes_read, record_bytes_written, record_file_write
+
+
+COMPARE_BLOCK_BYTES = 1024 * 1024
+
+
+def fsync_enabled() -> bool:
+    """
+    ORCHESTRATOR_FSYNC=1 makes atomic writes durable across power loss (slower).
+    """
+    return os.getenv("ORCHESTRATOR_FSYNC", "") not in ("", "0", "false", "False")
+
+
+def same_content(path: Path, data: bytes) -> bool:
+    """
+    True if path exists and holds exactly data. The size is compared first, so
+    a changed file is usually detected without reading it; otherwise the file
+    is compared block by block and the read stops at the first difference.
+    """
+    try:
+        if os.stat(path).st_size != len(data):
+            return False
+        view = memoryview(data)
+        offset = 0
+        with open(path, "rb") as fh:
+            while True:
+                block = fh.read(COMPARE_BLOCK_BYTES)
+                if not block:
+                    return offset == len(data)
+                record_bytes_read(len(block))
+                if view[offset : offset + len(block)] != block:
+                    return False
+                offset += len(block)
+    except OSError:
+        return False
+
+
+def write_bytes_atomic(path: str | Path, data: bytes, fsync: bool | None = None) -> bool:
+    """
+    Replace path with data unless it already holds exactly that content.
+
+    The data goes to a temporary file in the same directory, is fsynced when
+    fsync (default: ORCHESTRATOR_FSYNC) is on, and is swapped in with
+    os.replace(), so readers and watchers see either the old or the new file,
+    never a truncated one. An existing file's permission bits are kept.
+
+    Returns True if the file was written, False if it was left untouched.
+    """
+    path = Path(path)
+    if same_content(path, data):
+        record_file_write(False)
+        return False
+
+    if fsync is None:
+        fsync = fsync_enabled()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, "wb") as fh:
+            fh.write(data)
+            if fsync:
+                fh.flush()
+                os.fsync(fh.fileno())
+        try:
+            os.chmod(tmp_path, os.stat(path).st_mode & 0o7777)
+        except OSError:
+            pass
+        os.replace(tmp_path, path)
+    except BaseException:
+        tmp_path.unlink(missing_ok=True)
+        raise
+
+    if fsync and hasattr(os, "O_DIRECTORY"):
+        # Persist the rename itself
+        dir_fd = os.open(path.parent, os.O_RDONLY | os.O_DIRECTORY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    record_bytes_written(len(data))
+    record_file_write(True)
+    return True
+
+
+def write_text_atomic(path: str | Path, text: str, encoding: str = "utf-8", fsync: bool | None = None) -> bool:
+    """
+    write_bytes_atomic() for text. Returns True if the file was written.
+    """
+    return write_bytes_atomic(path, text.encode(encoding), fsync=fsync)
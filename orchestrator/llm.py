@@ -1,39 +1,109 @@
 from __future__ import annotations
 
-from typing import List
+from functools import lru_cache
+from typing import Iterator, List
 from openai import OpenAI
 
+from .backend import LLMBackend, StreamStats, get_backend, resolve_base_urls
+from .cache import ResponseCache
+
 
 # Adjust this model name to whatever LM Studio is serving
 DEFAULT_MODEL_NAME = "qwen/qwen3-coder-30b"  # e.g. from LM Studio Server panel
 
 
+@lru_cache(maxsize=None)
 def get_client() -> OpenAI:
     """
     Return an OpenAI-compatible client pointing at the LM Studio local server.
+
+    The client is created once per process and reused.
     """
 
     return OpenAI(
-        base_url="http://localhost:1234/v1",
+        # The plain OpenAI client talks to one server: the first of LMSTUDIO_BASE_URLS
+        base_url=resolve_base_urls()[0],
         api_key="lm-studio",  # LM Studio ignores this but it must be non-empty
     )
 
 
-def complete(prompt: str, system_prompt: str | None = None, model: str | None = None) -> str:
-    """
-    Single-turn completion using the local LM Studio model.
-    """
-
-    client = get_client()
-    model_name = model or DEFAULT_MODEL_NAME
+def _build_messages(prompt: str, system_prompt: str | None) -> List[dict]:
     messages: List[dict] = []
     if system_prompt:
         messages.append({"role": "system", "content": system_prompt})
     messages.append({"role": "user", "content": prompt})
-    response = client.chat.completions.create(
-        model=model_name,
-        messages=messages,
+    return messages
+
+
+def complete(
+    prompt: str,
+    system_prompt: str | None = None,
+    model: str | None = None,
+    cache: ResponseCache | None = None,
+    use_cache: bool = True,
+    backend: LLMBackend | None = None,
+) -> str:
+    """
+    Single-turn completion using the local LM Studio model.
+
+    Goes through the shared pooled backend. Responses are served from the
+    on-disk response cache when an identical request was made before; pass
+    use_cache=False to always hit the model.
+    """
+
+    return (backend or get_backend()).chat_completion(
+        messages=_build_messages(prompt, system_prompt),
+        model=model or DEFAULT_MODEL_NAME,
+        temperature=0.2,
+        max_tokens=None,
+        use_cache=use_cache,
+        cache=cache,
+    )
+
+
+async def acomplete(
+    prompt: str,
+    system_prompt: str | None = None,
+    model: str | None = None,
+    cache: ResponseCache | None = None,
+    use_cache: bool = True,
+    backend: LLMBackend | None = None,
+) -> str:
+    """
+    Awaitable variant of complete().
+    """
+
+    return await (backend or get_backend()).achat_completion(
+        messages=_build_messages(prompt, system_prompt),
+        model=model or DEFAULT_MODEL_NAME,
+        temperature=0.2,
+        max_tokens=None,
+        use_cache=use_cache,
+        cache=cache,
+    )
+
+
+def stream_complete(
+    prompt: str,
+    system_prompt: str | None = None,
+    model: str | None = None,
+    cache: ResponseCache | None = None,
+    use_cache: bool = True,
+    backend: LLMBackend | None = None,
+    stats: StreamStats | None = None,
+) -> Iterator[str]:
+    """
+    Streaming variant of complete(): yields content chunks as they arrive.
+
+    Pass a StreamStats to collect time-to-first-token and tokens/sec.
+    """
+
+    return (backend or get_backend()).stream_chat_completion(
+        messages=_build_messages(prompt, system_prompt),
+        model=model or DEFAULT_MODEL_NAME,
         temperature=0.2,
+        max_tokens=None,
+        use_cache=use_cache,
+        cache=cache,
+        stats=stats,
     )
-    
-    return response.choices[0].message.content or ""
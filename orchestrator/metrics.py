@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import contextvars
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List
+
+
+# Key under which Engine.run()/run_async() store the RunReport in the context
+RUN_REPORT_KEY = "run_report"
+
+PROMETHEUS_PREFIX = "orchestrator_step_"
+
+
+@dataclass
+class StepMetrics:
+    """
+    Resource usage of one step execution.
+
+    cpu_seconds is the CPU time of the thread that ran the step; it is None
+    for steps with a native arun() coroutine, whose CPU time cannot be
+    separated from other tasks on the event loop.
+    """
+
+    step: str
+    index: int
+    wall_seconds: float = 0.0
+    cpu_seconds: float | None = None
+    llm_calls: int = 0
+    llm_cached_calls: int = 0
+    llm_seconds: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    bytes_read: int = 0
+    bytes_written: int = 0
+    files_written: int = 0
+    files_unchanged: int = 0
+    error: str | None = None
+
+    @property
+    def tokens_per_second(self) -> float | None:
+        # Completion tokens over the time spent waiting on the model (cache hits excluded)
+        if self.llm_seconds <= 0 or not self.completion_tokens:
+            return None
+        return self.completion_tokens / self.llm_seconds
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["tokens_per_second"] = self.tokens_per_second
+        return data
+
+
+@dataclass
+class RunReport:
+    """
+    Per-step metrics of one Engine or CodegenTask run.
+
+    Steps that run concurrently each get their own record; records are listed
+    in completion order.
+    """
+
+    name: str = "run"
+    run_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+    started_at: float = field(default_factory=time.time)
+    wall_seconds: float = 0.0
+    steps: List[StepMetrics] = field(default_factory=list)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False, compare=False)
+
+    def add(self, metrics: StepMetrics) -> None:
+        with self._lock:
+            self.steps.append(metrics)
+
+    def totals(self) -> Dict[str, Any]:
+        return {
+            "wall_seconds": self.wall_seconds,
+            "cpu_seconds": sum(s.cpu_seconds or 0.0 for s in self.steps),
+            "llm_calls": sum(s.llm_calls for s in self.steps),
+            "llm_cached_calls": sum(s.llm_cached_calls for s in self.steps),
+            "llm_seconds": sum(s.llm_seconds for s in self.steps),
+            "prompt_tokens": sum(s.prompt_tokens for s in self.steps),
+            "completion_tokens": sum(s.completion_tokens for s in self.steps),
+            "bytes_read": sum(s.bytes_read for s in self.steps),
+            "bytes_written": sum(s.bytes_written for s in self.steps),
+            "files_written": sum(s.files_written for s in self.steps),
+            "files_unchanged": sum(s.files_unchanged for s in self.steps),
+        }
+
+    def to_jsonl(self) -> str:
+        """
+        One JSON object per step, followed by a "total" record.
+        """
+        common = {"run": self.name, "run_id": self.run_id, "started_at": self.started_at}
+        lines = [json.dumps({**common, "kind": "step", **s.as_dict()}) for s in self.steps]
+        lines.append(json.dumps({**common, "kind": "total", **self.totals()}))
+        return "\n".join(lines) + "\n"
+
+    def to_prometheus(self) -> str:
+        """
+        Prometheus text exposition format (e.g. for the node_exporter textfile collector).
+        """
+        series = [
+            ("wall_seconds", "Wall-clock time of the step.", lambda s: s.wall_seconds),
+            ("cpu_seconds", "CPU time of the thread running the step.", lambda s: s.cpu_seconds),
+            ("llm_calls", "LLM requests made by the step, cache hits included.", lambda s: s.llm_calls),
+            ("llm_cached_calls", "LLM requests answered from the response cache.", lambda s: s.llm_cached_calls),
+            ("llm_seconds", "Time spent waiting on the LLM server.", lambda s: s.llm_seconds),
+            ("prompt_tokens", "Prompt tokens reported by the LLM server.", lambda s: s.prompt_tokens),
+            ("completion_tokens", "Completion tokens reported by the LLM server.", lambda s: s.completion_tokens),
+            ("tokens_per_second", "Completion tokens per second of LLM time.", lambda s: s.tokens_per_second),
+            ("bytes_read", "Bytes read from disk by the step.", lambda s: s.bytes_read),
+            ("bytes_written", "Bytes written to disk by the step.", lambda s: s.bytes_written),
+            ("files_written", "Output files the step (re)wrote.", lambda s: s.files_written),
+            ("files_unchanged", "Output files left untouched because their content was unchanged.", lambda s: s.files_unchanged),
+        ]
+        out: List[str] = []
+        for metric, help_text, getter in series:
+            name = PROMETHEUS_PREFIX + metric
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} gauge")
+            for s in self.steps:
+                value = getter(s)
+                if value is None:
+                    continue
+                labels = (
+                    f'run="{_escape_label(self.name)}",run_id="{self.run_id}",'
+                    f'step="{_escape_label(s.step)}",index="{s.index}"'
+                )
+                out.append(f"{name}{{{labels}}} {float(value):.6g}")
+        return "\n".join(out) + "\n"
+
+    def write_jsonl(self, path: str | Path) -> None:
+        """
+        Append this run's records to a JSONL file.
+        """
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("a", encoding="utf-8") as fh:
+            fh.write(self.to_jsonl())
+
+    def write_prometheus(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.to_prometheus(), encoding="utf-8")
+
+    def format(self) -> str:
+        """
+        Human-readable table, one line per step.
+        """
+        lines = []
+        for s in self.steps:
+            tps = s.tokens_per_second
+            cpu = "n/a" if s.cpu_seconds is None else f"{s.cpu_seconds:.2f}s"
+            lines.append(
+                f"{s.step:<32} wall={s.wall_seconds:.2f}s cpu={cpu} "
+                f"tokens={s.prompt_tokens}+{s.completion_tokens} "
+                f"tok/s={'n/a' if tps is None else f'{tps:.1f}'} "
+                f"read={s.bytes_read}B written={s.bytes_written}B"
+                + (f" files={s.files_written}/{s.files_written + s.files_unchanged}" if s.files_written or s.files_unchanged else "")
+                + (" FAILED" if s.error else "")
+            )
+        return "\n".join(lines)
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+# Steps may record from several threads at once (e.g. concurrent LLM calls)
+_record_lock = threading.Lock()
+
+_current_step: contextvars.ContextVar[StepMetrics | None] = contextvars.ContextVar(
+    "orchestrator_current_step", default=None
+)
+
+
+@contextmanager
+def track_step(report: RunReport | None, step: str, index: int, cpu: bool = True) -> Iterator[StepMetrics | None]:
+    """
+    Measure the enclosed block as one step of report.
+
+    Usage recorded through record_llm() / record_bytes_*() while the block runs
+    (in this thread, or in tasks and threads that copied this context) is
+    attributed to the step. With cpu=False, CPU time is not measured.
+    """
+    if report is None:
+        yield None
+        return
+
+    metrics = StepMetrics(step=step, index=index)
+    token = _current_step.set(metrics)
+    wall_start = time.perf_counter()
+    cpu_start = time.thread_time() if cpu else None
+    try:
+        yield metrics
+    except BaseException as exc:
+        metrics.error = f"{type(exc).__name__}: {exc}"
+        raise
+    finally:
+        metrics.wall_seconds = time.perf_counter() - wall_start
+        if cpu_start is not None:
+            metrics.cpu_seconds = time.thread_time() - cpu_start
+        _current_step.reset(token)
+        report.add(metrics)
+
+
+def current_step() -> StepMetrics | None:
+    return _current_step.get()
+
+
+def record_llm(
+    prompt_tokens: int | None,
+    completion_tokens: int | None,
+    seconds: float,
+    cached: bool = False,
+) -> None:
+    """
+    Attribute one LLM request to the running step (no-op outside a tracked step).
+    """
+    metrics = _current_step.get()
+    if metrics is None:
+        return
+    with _record_lock:
+        metrics.llm_calls += 1
+        if cached:
+            metrics.llm_cached_calls += 1
+            return
+        metrics.llm_seconds += seconds
+        metrics.prompt_tokens += prompt_tokens or 0
+        metrics.completion_tokens += completion_tokens or 0
+
+
+def record_bytes_read(n: int) -> None:
+    metrics = _current_step.get()
+    if metrics is not None:
+        with _record_lock:
+            metrics.bytes_read += n
+
+
+def record_bytes_written(n: int) -> None:
+    metrics = _current_step.get()
+    if metrics is not None:
+        with _record_lock:
+            metrics.bytes_written += n
+
+
+def record_file_write(written: bool) -> None:
+    """
+    Count one output file as written, or as unchanged (write skipped).
+    """
+    metrics = _current_step.get()
+    if metrics is not None:
+        with _record_lock:
+            if written:
+                metrics.files_written += 1
+            else:
+                metrics.files_unchanged += 1
@@ -0,0 +1,219 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Dict, List, Set
+
+from .metrics import RunReport, track_step
+from .tracing import span
+from .steps.base import FILE_RESOURCE_PREFIX, Context, Step
+
+
+def run_tracked(step: Step, index: int, context: Context, report: RunReport | None = None) -> Context:
+    """
+    step.run(context), recorded as one step of report (when given).
+    """
+    with span(step.name, "step", {"index": index}), track_step(report, step.name, index):
+        return step.run(context)
+
+
+async def arun_tracked(step: Step, index: int, context: Context, report: RunReport | None = None) -> Context:
+    """
+    Awaitable run_tracked(). Steps using the default arun() are run on a worker
+    thread and measured there, so their CPU time is recorded as well.
+    """
+    if type(step).arun is Step.arun:
+        return await asyncio.to_thread(run_tracked, step, index, context, report)
+    with span(step.name, "step", {"index": index}), track_step(report, step.name, index, cpu=False):
+        return await step.arun(context)
+
+
+class StepGraph:
+    """
+    Dependency graph over a list of steps, derived from their declared reads()/writes().
+
+    Step j runs after step i (i < j) when:
+      - j reads a key that i writes (read-after-write), or
+      - j writes a key that i reads (write-after-read), or
+      - either of them is a barrier (reads() or writes() returns None), or
+      - both write the same file (a FILE_RESOURCE_PREFIX key), in list order.
+
+    Two steps writing the same context key must be ordered by one of the rules
+    above; otherwise the later write would silently replace the earlier one,
+    and the graph raises ValueError.
+    """
+
+    def __init__(self, steps: List[Step]) -> None:
+        self.steps = steps
+        self.dependencies: List[Set[int]] = []
+        self._build()
+
+    def _build(self) -> None:
+        last_writer: Dict[str, int] = {}
+        readers_since_write: Dict[str, Set[int]] = {}
+        ancestors: List[Set[int]] = []
+        last_barrier: int | None = None
+
+        for i, step in enumerate(self.steps):
+            reads = step.reads()
+            writes = step.writes()
+            deps: Set[int] = set()
+
+            if reads is None or writes is None:
+                # Barrier: after everything before it, before everything after it
+                deps = set(range(i))
+                last_barrier = i
+                last_writer.clear()
+                readers_since_write.clear()
+                ancestors.append(set(deps))
+                self.dependencies.append(deps)
+                continue
+
+            if last_barrier is not None:
+                deps.add(last_barrier)
+            for key in reads:
+                if key in last_writer:
+                    deps.add(last_writer[key])
+            for key in writes:
+                deps.update(readers_since_write.get(key, set()))
+                if key.startswith(FILE_RESOURCE_PREFIX) and key in last_writer:
+                    # Later writes to the same file land last, as in a sequential run
+                    deps.add(last_writer[key])
+
+            step_ancestors = set(deps)
+            for d in deps:
+                step_ancestors |= ancestors[d]
+
+            for key in writes:
+                previous = last_writer.get(key)
+                if previous is not None and previous not in step_ancestors:
+                    raise ValueError(
+                        f"Conflicting writes: steps '{self.steps[previous].name}' (#{previous}) "
+                        f"and '{step.name}' (#{i}) both write context key '{key}' "
+                        "with no dependency between them."
+                    )
+
+            for key in reads:
+                readers_since_write.setdefault(key, set()).add(i)
+            for key in writes:
+                last_writer[key] = i
+                readers_since_write[key] = set()
+
+            ancestors.append(step_ancestors)
+            self.dependencies.append(deps)
+
+    def _ready(self, done: Set[int], started: Set[int]) -> List[int]:
+        return [
+            i
+            for i, deps in enumerate(self.dependencies)
+            if i not in started and deps <= done
+        ]
+
+    def _merge(self, context: Context, index: int, result: Context) -> Context:
+        if result is context:
+            return context
+        writes = self.steps[index].writes()
+        if writes is None:
+            # Barriers run alone, so they may replace the context outright
+            return result
+        for key in writes:
+            if key in result:
+                context[key] = result[key]
+        return context
+
+    def run(
+        self,
+        context: Context,
+        max_workers: int,
+        report: RunReport | None = None,
+        skip: Set[int] | None = None,
+        on_step_done: Callable[[int, Context], None] | None = None,
+    ) -> Context:
+        """
+        Run the graph. Steps in skip count as already done (e.g. restored from
+        a checkpoint); on_step_done(index, context) is called on the calling
+        thread after each step's writes are merged.
+        """
+        done: Set[int] = set(skip or ())
+        started: Set[int] = set(done)
+        running: Dict[Future, int] = {}
+        error: BaseException | None = None
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="engine-step") as pool:
+            while len(done) < len(self.steps):
+                ready = [] if error is not None else self._ready(done, started)
+
+                if not running and len(ready) == 1:
+                    # Nothing to overlap with: run inline on the calling thread
+                    i = ready[0]
+                    started.add(i)
+                    context = self._merge(context, i, run_tracked(self.steps[i], i, context, report))
+                    done.add(i)
+                    if on_step_done is not None:
+                        on_step_done(i, context)
+                    continue
+
+                for i in ready[: max(0, max_workers - len(running))]:
+                    started.add(i)
+                    # Workers inherit the caller's context (active tracer)
+                    step_context = contextvars.copy_context()
+                    running[pool.submit(step_context.run, run_tracked, self.steps[i], i, context, report)] = i
+
+                if not running:
+                    break
+
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for fut in finished:
+                    i = running.pop(fut)
+                    try:
+                        context = self._merge(context, i, fut.result())
+                    except BaseException as exc:
+                        # Stop scheduling new steps; let in-flight ones finish
+                        error = error or exc
+                        continue
+                    done.add(i)
+                    if on_step_done is not None:
+                        on_step_done(i, context)
+
+        if error is not None:
+            raise error
+        return context
+
+    async def arun(
+        self,
+        context: Context,
+        max_workers: int,
+        report: RunReport | None = None,
+        skip: Set[int] | None = None,
+        on_step_done: Callable[[int, Context], None] | None = None,
+    ) -> Context:
+        done: Set[int] = set(skip or ())
+        started: Set[int] = set(done)
+        running: Dict[asyncio.Task, int] = {}
+        error: BaseException | None = None
+
+        while len(done) < len(self.steps):
+            ready = [] if error is not None else self._ready(done, started)
+            for i in ready[: max(0, max_workers - len(running))]:
+                started.add(i)
+                running[asyncio.ensure_future(arun_tracked(self.steps[i], i, context, report))] = i
+
+            if not running:
+                break
+
+            finished, _ = await asyncio.wait(list(running), return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                i = running.pop(task)
+                try:
+                    context = self._merge(context, i, task.result())
+                except BaseException as exc:
+                    error = error or exc
+                    continue
+                done.add(i)
+                if on_step_done is not None:
+                    on_step_done(i, context)
+
+        if error is not None:
+            raise error
+        return context
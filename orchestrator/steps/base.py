@@ -1,11 +1,24 @@
 from __future__ import annotations
 
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Any, Dict
+from pathlib import Path, PurePath
+from typing import Any, Dict, Set
 
 
 Context = Dict[str, Any]
 
+# reads()/writes() keys with this prefix name files on disk, not context keys
+FILE_RESOURCE_PREFIX = "file:"
+
+
+def file_resource(path: str | PurePath) -> str:
+    """
+    reads()/writes() key for the file at path (resolved, so different
+    spellings of the same path order against each other).
+    """
+    return f"{FILE_RESOURCE_PREFIX}{Path(path).resolve()}"
+
 
 class Step(ABC):
     """
@@ -15,6 +28,15 @@ class Step(ABC):
       - reads from the context
       - updates the context
       - returns the new context
+
+    Steps may also override arun() with a native coroutine. The default arun()
+    offloads run() to a worker thread so sync steps never block the event loop.
+
+    Steps that declare the context keys they read and write (reads()/writes())
+    can be scheduled concurrently by the Engine. A step that returns None from
+    either method is treated as a barrier and runs alone. Steps that read or
+    write files also list file_resource(path), so steps sharing a file on disk
+    are ordered like steps sharing a context key.
     """
 
     name: str
@@ -27,5 +49,52 @@ class Step(ABC):
     def run(self, context: Context) -> Context:
         raise NotImplementedError
 
+    def reads(self) -> Set[str] | None:
+        return None
+
+    def writes(self) -> Set[str] | None:
+        return None
+
+    def fingerprint(self) -> Dict[str, Any]:
+        """
+        Plain-data description of this step's configuration, used to key
+        checkpoints (see orchestrator.checkpoint). Public attributes holding
+        strings, numbers, paths or lists of them are included; callables,
+        clients and private state are not. Steps whose inputs live outside the
+        context (e.g. files) should extend it.
+        """
+        config: Dict[str, Any] = {}
+        for attr, value in sorted(vars(self).items()):
+            if attr.startswith("_"):
+                continue
+            plain = _plain(value)
+            if plain is not _SKIP:
+                config[attr] = plain
+        return {"class": f"{type(self).__module__}.{type(self).__qualname__}", "config": config}
+
+    async def arun(self, context: Context) -> Context:
+        return await asyncio.to_thread(self.run, context)
+
     def __call__(self, context: Context) -> Context:
         return self.run(context)
+
+
+_SKIP = object()
+
+
+def _plain(value: Any) -> Any:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, PurePath):
+        return str(value)
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_plain(v) for v in value]
+        if any(v is _SKIP for v in items):
+            return _SKIP
+        return sorted(items, key=repr) if isinstance(value, (set, frozenset)) else items
+    if isinstance(value, dict):
+        items = {str(k): _plain(v) for k, v in value.items()}
+        if any(v is _SKIP for v in items.values()):
+            return _SKIP
+        return items
+    return _SKIP
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import asyncio
 from pathlib import Path
-from typing import Any, Dict
-from .base import Step, Context
+from typing import Any, Dict, Set, TextIO
+from .base import Step, Context, file_resource
+from ..fileio import write_text_atomic
+from ..metrics import record_bytes_read, record_bytes_written
+from ..tracing import span
 
 
 class LoadFile(Step):
@@ -15,11 +19,39 @@ class LoadFile(Step):
         self.source_path = Path(source_path)
         self.context_key = context_key
 
+    def reads(self) -> Set[str]:
+        return {file_resource(self.source_path)}
+
+    def writes(self) -> Set[str]:
+        return {self.context_key}
+
+    def fingerprint(self) -> Dict[str, Any]:
+        data = super().fingerprint()
+        # An edited input file must not resume from checkpoints of the old one
+        try:
+            st = self.source_path.stat()
+            data["source"] = [st.st_size, st.st_mtime_ns]
+        except OSError:
+            data["source"] = None
+        return data
+
     def run(self, context: Context) -> Context:
         if not self.source_path.exists():
             raise FileNotFoundError(f"Source file not found: {self.source_path}")
 
-        text = self.source_path.read_text(encoding="utf-8")
+        with span("file.read", "file", {"path": str(self.source_path)}):
+            text = self.source_path.read_text(encoding="utf-8")
+        record_bytes_read(len(text.encode("utf-8")))
+        context[self.context_key] = text
+        return context
+
+    async def arun(self, context: Context) -> Context:
+        if not self.source_path.exists():
+            raise FileNotFoundError(f"Source file not found: {self.source_path}")
+
+        with span("file.read", "file", {"path": str(self.source_path)}):
+            text = await asyncio.to_thread(self.source_path.read_text, encoding="utf-8")
+        record_bytes_read(len(text.encode("utf-8")))
         context[self.context_key] = text
         return context
 
@@ -27,12 +59,54 @@ class LoadFile(Step):
 class WriteFile(Step):
     """
     Write context[context_key] to a file at target_path.
+
+    The write is atomic (temp file + os.replace) and skipped when the file
+    already holds the same text, so watchers are not triggered for nothing.
+    Whether it happened is stored in context[written_key], which defaults to
+    f"{target_path}_written" so that several WriteFile steps can save the same
+    context_key to different files.
+
+    stream_chunk() can be wired as an LLMStep on_chunk callback: chunks are
+    appended to <target_path>.partial as they arrive, and run() then writes the
+    final text and removes the partial file.
     """
 
-    def __init__(self, target_path: str | Path, context_key: str = "output_text") -> None:
+    def __init__(
+        self,
+        target_path: str | Path,
+        context_key: str = "output_text",
+        written_key: str | None = None,
+    ) -> None:
         super().__init__(name="WriteFile")
         self.target_path = Path(target_path)
         self.context_key = context_key
+        self.written_key = written_key or f"{self.target_path.as_posix()}_written"
+        self._stream_file: TextIO | None = None
+
+    def reads(self) -> Set[str]:
+        return {self.context_key}
+
+    def writes(self) -> Set[str]:
+        return {self.written_key, file_resource(self.target_path)}
+
+    @property
+    def partial_path(self) -> Path:
+        return self.target_path.with_name(self.target_path.name + ".partial")
+
+    def stream_chunk(self, context: Context, chunk: str) -> None:
+        if self._stream_file is None:
+            self.partial_path.parent.mkdir(parents=True, exist_ok=True)
+            self._stream_file = self.partial_path.open("w", encoding="utf-8")
+        self._stream_file.write(chunk)
+        self._stream_file.flush()
+        record_bytes_written(len(chunk.encode("utf-8")))
+
+    def _close_stream(self) -> None:
+        if self._stream_file is None:
+            return
+        self._stream_file.close()
+        self._stream_file = None
+        self.partial_path.unlink(missing_ok=True)
 
     def run(self, context: Context) -> Context:
         if self.context_key not in context:
@@ -41,6 +115,24 @@ class WriteFile(Step):
                 f"Available keys: {list(context.keys())}"
             )
 
-        self.target_path.parent.mkdir(parents=True, exist_ok=True)
-        self.target_path.write_text(str(context[self.context_key]), encoding="utf-8")
+        context[self.written_key] = self._write(str(context[self.context_key]))
+        return context
+
+    async def arun(self, context: Context) -> Context:
+        if self.context_key not in context:
+            raise KeyError(
+                f"Context key '{self.context_key}' not found. "
+                f"Available keys: {list(context.keys())}"
+            )
+
+        context[self.written_key] = await asyncio.to_thread(self._write, str(context[self.context_key]))
         return context
+
+    def _write(self, text: str) -> bool:
+        with span("file.write", "file", {"path": str(self.target_path)}) as trace_args:
+            written = write_text_atomic(self.target_path, text)
+            trace_args.update(written=written)
+        if not written:
+            print(f"[{self.name}] Unchanged: {self.target_path}")
+        self._close_stream()
+        return written
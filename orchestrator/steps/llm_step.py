@@ -1,20 +1,74 @@
 from __future__ import annotations
 
+import asyncio
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Callable, List, Set
+
 from orchestrator.steps.base import Step, Context
-from orchestrator.llm import complete
+from orchestrator.backend import LLMBackend, StreamStats, get_backend
+from orchestrator.chunking import DEFAULT_CHUNK_WORKERS, chunk_tokens_from_env, estimate_tokens, split_chunks
+from orchestrator.llm import acomplete, complete, stream_complete
 
 
 class LLMStep(Step):
     """
     Generic LLM-powered transformation step.
     Reads from context[input_key], writes result to context[output_key].
+
+    With stream=True the completion is consumed chunk by chunk: each chunk is
+    passed to on_chunk(context, chunk) as it arrives (e.g. WriteFile.stream_chunk),
+    and time-to-first-token / tokens-per-second are stored in
+    context[f"{output_key}_stats"]. Raising from on_chunk aborts the generation.
+
+    Chunking: when chunk_tokens is set (or ORCHESTRATOR_CHUNK_TOKENS) and the
+    input is estimated above it, the input is split on structural boundaries
+    (see split_chunks()) and every chunk goes through the same system prompt,
+    up to max_parallel_chunks at a time. The results are joined in order, or,
+    with a reduce_prompt, merged by one more call over all of them (in several
+    rounds if they do not fit the budget together). Each chunk is cached on
+    its own, so editing one section of a large file only re-runs that section.
+    When streaming, chunk results reach on_chunk in order as they complete;
+    with a reduce_prompt only the final merge is streamed.
     """
 
-    def __init__(self, system_prompt: str, input_key: str = "input_text", output_key: str = "output_text") -> None:
+    def __init__(
+        self,
+        system_prompt: str,
+        input_key: str = "input_text",
+        output_key: str = "output_text",
+        backend: LLMBackend | None = None,
+        stream: bool = False,
+        on_chunk: Callable[[Context, str], None] | None = None,
+        chunk_tokens: int | None = None,
+        reduce_prompt: str | None = None,
+        max_parallel_chunks: int | None = None,
+    ) -> None:
         super().__init__(name="LLMStep")
         self.system_prompt = system_prompt
         self.input_key = input_key
         self.output_key = output_key
+        # None -> the shared process-wide backend (pooled connections)
+        self.backend = backend
+        self.stream = stream or on_chunk is not None
+        self.on_chunk = on_chunk
+        # None -> ORCHESTRATOR_CHUNK_TOKENS; 0 sends the whole input as one prompt
+        self.chunk_tokens = chunk_tokens if chunk_tokens is not None else chunk_tokens_from_env()
+        self.reduce_prompt = reduce_prompt
+        self.max_parallel_chunks = max_parallel_chunks or int(
+            os.getenv("ORCHESTRATOR_CHUNK_WORKERS", str(DEFAULT_CHUNK_WORKERS))
+        )
+
+    def reads(self) -> Set[str]:
+        return {self.input_key}
+
+    def writes(self) -> Set[str]:
+        if self.stream:
+            return {self.output_key, f"{self.output_key}_stats"}
+        return {self.output_key}
 
     def run(self, context: Context) -> Context:
         if self.input_key not in context:
@@ -24,10 +78,189 @@ class LLMStep(Step):
             )
 
         user_text = str(context[self.input_key])
+
+        chunks = self._split(user_text)
+        if chunks is not None:
+            context[self.output_key] = self._run_chunked(context, chunks)
+            return context
+
+        if self.stream:
+            context[self.output_key] = self._run_streaming(context, user_text)
+            return context
+
         result = complete(
             prompt=user_text,
             system_prompt=self.system_prompt,
+            backend=self.backend,
+        )
+        context[self.output_key] = result
+
+        return context
+
+    async def arun(self, context: Context) -> Context:
+        if self.input_key not in context:
+            raise KeyError(
+                f"Expected '{self.input_key}' in context. "
+                f"Available keys: {list(context.keys())}"
+            )
+
+        user_text = str(context[self.input_key])
+
+        chunks = self._split(user_text)
+        if chunks is not None and not self.stream:
+            context[self.output_key] = await self._arun_chunked(chunks)
+            return context
+
+        if self.stream:
+            backend = self.backend or get_backend()
+            if chunks is not None:
+                context[self.output_key] = await backend.run_in_worker(self._run_chunked, context, chunks)
+            else:
+                context[self.output_key] = await backend.run_in_worker(self._run_streaming, context, user_text)
+            return context
+
+        result = await acomplete(
+            prompt=user_text,
+            system_prompt=self.system_prompt,
+            backend=self.backend,
         )
         context[self.output_key] = result
 
         return context
+
+    def _run_streaming(self, context: Context, user_text: str, system_prompt: str | None = None) -> str:
+        stats = StreamStats()
+        parts: list[str] = []
+        chunks = stream_complete(
+            prompt=user_text,
+            system_prompt=system_prompt or self.system_prompt,
+            backend=self.backend,
+            stats=stats,
+        )
+        with closing(chunks):
+            for chunk in chunks:
+                parts.append(chunk)
+                if self.on_chunk is not None:
+                    self.on_chunk(context, chunk)
+
+        context[f"{self.output_key}_stats"] = stats.as_dict()
+        print(f"[{self.name}] {stats.summary()}")
+        return "".join(parts)
+
+    # --- chunked map-reduce ---
+
+    def _split(self, user_text: str) -> List[str] | None:
+        if self.chunk_tokens <= 0 or estimate_tokens(user_text) <= self.chunk_tokens:
+            return None
+        chunks = split_chunks(user_text, self.chunk_tokens)
+        if len(chunks) < 2:
+            return None
+        print(f"[{self.name}] Split ~{estimate_tokens(user_text)} tokens into {len(chunks)} chunks")
+        return chunks
+
+    @staticmethod
+    def _map_prompts(chunks: List[str]) -> List[str]:
+        # The part header goes in the user message so every call shares the system prompt prefix
+        n = len(chunks)
+        return [
+            f"(Part {i} of {n} of a longer input. Handle only this part; "
+            f"do not add an introduction or conclusion for the whole.)\n\n{chunk}"
+            for i, chunk in enumerate(chunks, start=1)
+        ]
+
+    @staticmethod
+    def _join(results: List[str]) -> str:
+        return "\n\n".join(r.strip() for r in results if r.strip())
+
+    @staticmethod
+    def _reduce_input(results: List[str]) -> str:
+        return "\n\n".join(f"## Part {i}\n\n{r.strip()}" for i, r in enumerate(results, start=1))
+
+    def _reduce_groups(self, results: List[str]) -> List[List[str]]:
+        """
+        Consecutive results packed into groups that fit chunk_tokens together.
+        """
+        groups: List[List[str]] = [[]]
+        size = 0
+        for result in results:
+            tokens = estimate_tokens(result)
+            if groups[-1] and size + tokens > self.chunk_tokens:
+                groups.append([])
+                size = 0
+            groups[-1].append(result)
+            size += tokens
+        return groups
+
+    def _map(self, prompts: List[str], system_prompt: str, on_result: Callable[[str], None] | None = None) -> List[str]:
+        workers = max(1, min(self.max_parallel_chunks, len(prompts)))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="llm-chunk") as pool:
+            futures = [
+                pool.submit(
+                    contextvars.copy_context().run,
+                    complete,
+                    prompt=prompt,
+                    system_prompt=system_prompt,
+                    backend=self.backend,
+                )
+                for prompt in prompts
+            ]
+            results: List[str] = []
+            # In input order, so on_result sees a growing prefix of the output
+            for future in futures:
+                results.append(future.result())
+                if on_result is not None:
+                    on_result(results[-1])
+        return results
+
+    def _run_chunked(self, context: Context, chunks: List[str]) -> str:
+        started = time.perf_counter()
+        emitted = [False]
+
+        def emit(result: str) -> None:
+            text = result.strip()
+            if not text:
+                return
+            self.on_chunk(context, ("\n\n" if emitted[0] else "") + text)
+            emitted[0] = True
+
+        stream_map = self.on_chunk is not None and not self.reduce_prompt
+        results = self._map(self._map_prompts(chunks), self.system_prompt, emit if stream_map else None)
+        if not self.reduce_prompt:
+            if self.stream:
+                context[f"{self.output_key}_stats"] = {
+                    "chunks": len(chunks),
+                    "total_seconds": time.perf_counter() - started,
+                }
+            return self._join(results)
+
+        while len(results) > 1:
+            groups = self._reduce_groups(results)
+            if len(groups) == 1 or len(groups) == len(results):
+                break
+            results = self._map([self._reduce_input(g) for g in groups], self.reduce_prompt)
+
+        if self.stream:
+            return self._run_streaming(context, self._reduce_input(results), system_prompt=self.reduce_prompt)
+        return complete(prompt=self._reduce_input(results), system_prompt=self.reduce_prompt, backend=self.backend)
+
+    async def _amap(self, prompts: List[str], system_prompt: str) -> List[str]:
+        limit = asyncio.Semaphore(max(1, self.max_parallel_chunks))
+
+        async def one(prompt: str) -> str:
+            async with limit:
+                return await acomplete(prompt=prompt, system_prompt=system_prompt, backend=self.backend)
+
+        return list(await asyncio.gather(*(one(p) for p in prompts)))
+
+    async def _arun_chunked(self, chunks: List[str]) -> str:
+        results = await self._amap(self._map_prompts(chunks), self.system_prompt)
+        if not self.reduce_prompt:
+            return self._join(results)
+
+        while len(results) > 1:
+            groups = self._reduce_groups(results)
+            if len(groups) == 1 or len(groups) == len(results):
+                break
+            results = await self._amap([self._reduce_input(g) for g in groups], self.reduce_prompt)
+
+        return await acomplete(prompt=self._reduce_input(results), system_prompt=self.reduce_prompt, backend=self.backend)
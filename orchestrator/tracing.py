@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Tuple
+
+
+class Tracer:
+    """
+    Collects Chrome trace_event spans (loadable in Perfetto / chrome://tracing).
+
+    Spans are "complete" events (ph="X") with microsecond timestamps relative
+    to the tracer's creation. Each OS thread gets its own track, and so does
+    each asyncio task, so overlapping async steps do not pile up on the event
+    loop thread's track.
+
+    A tracer records only while activated (tracer.activate()); instrumented
+    code looks it up with current_tracer(), and the engine, scheduler, batch
+    runner and LLM backend carry it across their worker threads.
+    """
+
+    def __init__(self, name: str = "orchestrator") -> None:
+        self.name = name
+        self.pid = os.getpid()
+        self.origin = time.perf_counter()
+        self.events: List[Dict[str, Any]] = []
+        self._lanes: Dict[Tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+        self.events.append(
+            {"name": "process_name", "ph": "M", "pid": self.pid, "tid": 0, "args": {"name": name}}
+        )
+
+    def _lane(self) -> int:
+        """
+        Track id for the caller: its asyncio task if inside one, else its thread.
+        """
+        task = None
+        try:
+            task = asyncio.current_task()
+        except RuntimeError:
+            pass
+        key = ("task", id(task)) if task is not None else ("thread", threading.get_ident())
+
+        with self._lock:
+            lane = self._lanes.get(key)
+            if lane is not None:
+                return lane
+            lane = len(self._lanes) + 1
+            self._lanes[key] = lane
+            if task is not None:
+                label = f"{threading.current_thread().name} / {task.get_name()}"
+            else:
+                label = threading.current_thread().name
+            self.events.append(
+                {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": lane, "args": {"name": label}}
+            )
+            return lane
+
+    def _us(self, t: float) -> float:
+        return round((t - self.origin) * 1e6, 3)
+
+    def complete(
+        self,
+        name: str,
+        cat: str,
+        start: float,
+        end: float,
+        args: Dict[str, Any] | None = None,
+    ) -> None:
+        """
+        Record a span from perf_counter() timestamps start..end on the caller's track.
+        """
+        event: Dict[str, Any] = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": self._us(start),
+            "dur": round(max(0.0, end - start) * 1e6, 3),
+            "pid": self.pid,
+            "tid": self._lane(),
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+
+    def instant(self, name: str, cat: str, args: Dict[str, Any] | None = None) -> None:
+        event: Dict[str, Any] = {
+            "name": name,
+            "cat": cat,
+            "ph": "i",
+            "s": "t",
+            "ts": self._us(time.perf_counter()),
+            "pid": self.pid,
+            "tid": self._lane(),
+        }
+        if args:
+            event["args"] = args
+        with self._lock:
+            self.events.append(event)
+
+    @contextmanager
+    def span(self, name: str, cat: str, args: Dict[str, Any] | None = None) -> Iterator[Dict[str, Any]]:
+        """
+        Time the enclosed block. The yielded dict can be filled with extra args.
+        """
+        extra: Dict[str, Any] = dict(args or {})
+        start = time.perf_counter()
+        try:
+            yield extra
+        except BaseException as exc:
+            extra["error"] = f"{type(exc).__name__}: {exc}"
+            raise
+        finally:
+            self.complete(name, cat, start, time.perf_counter(), extra)
+
+    @contextmanager
+    def activate(self) -> Iterator["Tracer"]:
+        token = _current_tracer.set(self)
+        try:
+            yield self
+        finally:
+            _current_tracer.reset(token)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            events = list(self.events)
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def write(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), separators=(",", ":")), encoding="utf-8")
+
+
+_current_tracer: contextvars.ContextVar[Tracer | None] = contextvars.ContextVar(
+    "orchestrator_current_tracer", default=None
+)
+
+
+def current_tracer() -> Tracer | None:
+    return _current_tracer.get()
+
+
+@contextmanager
+def span(name: str, cat: str, args: Dict[str, Any] | None = None) -> Iterator[Dict[str, Any]]:
+    """
+    Tracer.span() on the active tracer; a no-op when tracing is off.
+    """
+    tracer = _current_tracer.get()
+    if tracer is None:
+        yield {}
+        return
+    with tracer.span(name, cat, args) as extra:
+        yield extra
+
+
+@contextmanager
+def activated(tracer: Tracer | None) -> Iterator[Tracer | None]:
+    """
+    Activate tracer for the enclosed block; None keeps whatever tracer is active.
+    """
+    if tracer is None:
+        yield _current_tracer.get()
+        return
+    with tracer.activate():
+        yield tracer
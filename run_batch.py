@@ -0,0 +1,96 @@
+from __future__ import annotations
+import argparse
+from pathlib import Path
+import sys
+from orchestrator.batch import BatchRunner, collect_inputs, load_manifest, plan_items
+from orchestrator.checkpoint import CheckpointStore
+from orchestrator.tracing import Tracer
+from tasks import TASK_BUILDERS
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Apply a task to many input files with bounded concurrency."
+    )
+    parser.add_argument(
+        "--task",
+        required=True,
+        choices=sorted(TASK_BUILDERS),
+        help="Task to apply to every input.",
+    )
+    parser.add_argument(
+        "--inputs",
+        nargs="*",
+        default=[],
+        help="Glob pattern(s) of input files, e.g. 'docs/**/*.md'.",
+    )
+    parser.add_argument(
+        "--manifest",
+        help="File listing inputs: one path per line, or JSON lines {\"input\": ..., \"output\": ...}.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default="batch_output",
+        help="Directory for outputs; input paths are mirrored below it. Default: batch_output",
+    )
+    parser.add_argument(
+        "--suffix",
+        default=None,
+        help="Optional suffix appended to each output file name (e.g. .explained.md).",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Number of inputs processed concurrently. Default: 4",
+    )
+    parser.add_argument(
+        "--trace",
+        help="Write a Chrome trace_event timeline of the run to this JSON file (open in Perfetto).",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue items that failed in a previous run from their last finished step.",
+    )
+    parser.add_argument(
+        "--no-checkpoint",
+        action="store_true",
+        help="Do not save per-step checkpoints.",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    output_dir = Path(args.output_dir)
+
+    items = plan_items(collect_inputs(args.inputs), output_dir, args.suffix)
+    if args.manifest:
+        items += load_manifest(Path(args.manifest), output_dir, args.suffix)
+
+    if not items:
+        print("[batch] No inputs matched.")
+        sys.exit(1)
+
+    tracer = Tracer(f"batch {args.task}") if args.trace else None
+    checkpoints = None if args.no_checkpoint else CheckpointStore()
+    runner = BatchRunner(
+        TASK_BUILDERS[args.task],
+        max_workers=args.workers,
+        tracer=tracer,
+        checkpoints=checkpoints,
+        resume=args.resume,
+    )
+    summary = runner.run(items)
+    print(summary.format())
+    if tracer is not None:
+        tracer.write(args.trace)
+        print(f"[batch] Trace written to {args.trace}")
+
+    if summary.failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
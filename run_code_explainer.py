@@ -1,11 +1,25 @@
 from __future__ import annotations
 
+import argparse
+
+from orchestrator.checkpoint import CheckpointStore
 from tasks.code_explainer_task import build_code_explainer_engine
 
 
 def main() -> None:
-    engine = build_code_explainer_engine()
-    context = engine.run()
+    parser = argparse.ArgumentParser(description="Run the 'code_explainer' task.")
+    parser.add_argument("--resume", action="store_true", help="Continue a failed run from its last finished step.")
+    parser.add_argument(
+        "--chunk-tokens",
+        type=int,
+        default=None,
+        help="Split inputs above this many (estimated) tokens into chunks processed in parallel (0: never).",
+    )
+    args = parser.parse_args()
+
+    engine = build_code_explainer_engine(chunk_tokens=args.chunk_tokens)
+    engine.checkpoints = engine.checkpoints or CheckpointStore()
+    context = engine.run(resume=args.resume)
     print("Task 'code_explainer' completed. Context keys:", list(context.keys()))
 
 
@@ -3,6 +3,7 @@ import argparse
 from pathlib import Path
 import sys
 from orchestrator.codegen.task import CodegenTask
+from orchestrator.tracing import Tracer
 
 
 def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
@@ -21,27 +22,79 @@ def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     )
     parser.add_argument(
         "--target-file",
-        default="src/App.tsx",
-        help="Target file path relative to project root. Default: src/App.tsx",
+        action="append",
+        dest="target_files",
+        help=(
+            "Target file path relative to project root. Repeat to generate several "
+            "files in one run. Default: src/App.tsx"
+        ),
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Number of targets generated concurrently. Default: 4",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Stream tokens while generating (live preview in <target>.partial).",
+    )
+    parser.add_argument(
+        "--retrieval",
+        action="store_true",
+        default=None,
+        help="Index source file contents and add relevant snippets to the prompt (or ORCHESTRATOR_RETRIEVAL=1).",
+    )
+    parser.add_argument(
+        "--metrics-jsonl",
+        help="Append per-step metrics of this run to a JSONL file.",
+    )
+    parser.add_argument(
+        "--metrics-prom",
+        help="Write per-step metrics of this run in Prometheus text format to this file.",
+    )
+    parser.add_argument(
+        "--trace",
+        help="Write a Chrome trace_event timeline of the run to this JSON file (open in Perfetto).",
     )
     return parser.parse_args(argv)
 
 
 def main(argv: list[str] | None = None) -> None:
-    args = parse_args(argv)
+    run(parse_args(argv))
+
 
+def run(args: argparse.Namespace) -> None:
     project_path = Path(args.project_path).resolve()
     spec_path = Path(args.spec_path).resolve()
-    target_file = Path(args.target_file)
+    target_files = [Path(t) for t in (args.target_files or ["src/App.tsx"])]
 
     task = CodegenTask(
         project_path=project_path,
         spec_path=spec_path,
-        target_file=target_file,
+        target_files=target_files,
+        stream=args.stream,
+        max_workers=args.workers,
+        tracer=Tracer("codegen") if args.trace else None,
+        use_retrieval=args.retrieval,
     )
-    task.run()
+    try:
+        task.run()
+    finally:
+        if task.tracer is not None:
+            task.tracer.write(args.trace)
+            print(f"[codegen] Trace written to {args.trace}")
+        report = task.report
+        if report is not None:
+            print(report.format())
+            if args.metrics_jsonl:
+                report.write_jsonl(args.metrics_jsonl)
+            if args.metrics_prom:
+                report.write_prometheus(args.metrics_prom)
 
-    print(f"[codegen] Wrote {target_file} in {project_path}")
+    for target_file in target_files:
+        print(f"[codegen] Wrote {target_file} in {project_path}")
 
 
 if __name__ == "__main__":
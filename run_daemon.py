@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+from orchestrator.daemon import COMMANDS, DaemonClient
+
+
+USAGE = """usage: python -m run_daemon serve [--socket PATH | --port N]
+       python -m run_daemon status | stop
+       python -m run_daemon codegen <run_codegen arguments>
+       python -m run_daemon task [--task NAME] [--input-path P] [--output-path P] [--resume]
+
+Jobs are forwarded to a running daemon; without one they run in this process."""
+
+
+def serve(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(prog="run_daemon serve", description="Start the orchestrator daemon.")
+    parser.add_argument("--socket", help="Unix socket path (default: ORCHESTRATOR_DAEMON_SOCKET or a per-user temp path).")
+    parser.add_argument(
+        "--port",
+        type=int,
+        help="Listen on 127.0.0.1:PORT over HTTP instead of a Unix socket (requests need the token from the token file).",
+    )
+    args = parser.parse_args(argv)
+
+    from orchestrator.daemon import OrchestratorDaemon
+
+    daemon = OrchestratorDaemon(socket_path=args.socket, port=args.port)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def run_local(command: str, argv: list[str]) -> int:
+    from orchestrator.daemon import OrchestratorDaemon
+
+    return OrchestratorDaemon().run_job(command, argv, os.getcwd())
+
+
+def main(argv: list[str]) -> int:
+    if not argv or argv[0] in ("-h", "--help"):
+        print(USAGE)
+        return 0
+    command, rest = argv[0], argv[1:]
+    client = DaemonClient()
+
+    if command == "serve":
+        serve(rest)
+        return 0
+    if command not in COMMANDS + ("status", "stop"):
+        print(USAGE, file=sys.stderr)
+        return 2
+
+    try:
+        if command == "status":
+            if not client.ping():
+                print("[daemon] Not running")
+                return 1
+            for key, value in client.status().items():
+                print(f"{key}: {value}")
+            return 0
+        if command == "stop":
+            if client.ping():
+                try:
+                    client.shutdown()
+                except ConnectionError:
+                    # The daemon closed the connection while shutting down
+                    pass
+                print("[daemon] Stopping")
+            return 0
+        try:
+            return client.run(command, rest)
+        except OSError:
+            # Raised only when the connection was refused, before the job was sent
+            print("[daemon] No daemon running; running in-process", file=sys.stderr)
+            return run_local(command, rest)
+    except RuntimeError as exc:
+        # e.g. a --port daemon rejecting a missing or stale token, or a
+        # connection lost mid-job (reported as failed, never re-run locally)
+        print(f"[daemon] {exc}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,10 +1,24 @@
 # run_readme_task.py
+import argparse
+
+from orchestrator.checkpoint import CheckpointStore
 from tasks.readme_improver_task import build_readme_improver_engine
 
 
 def main() -> None:
-    engine = build_readme_improver_engine()
-    context = engine.run()
+    parser = argparse.ArgumentParser(description="Run the README improvement task.")
+    parser.add_argument("--resume", action="store_true", help="Continue a failed run from its last finished step.")
+    parser.add_argument(
+        "--chunk-tokens",
+        type=int,
+        default=None,
+        help="Split inputs above this many (estimated) tokens into chunks processed in parallel (0: never).",
+    )
+    args = parser.parse_args()
+
+    engine = build_readme_improver_engine(chunk_tokens=args.chunk_tokens)
+    engine.checkpoints = engine.checkpoints or CheckpointStore()
+    context = engine.run(resume=args.resume)
     print("README improvement completed. Keys:", list(context.keys()))
 
 
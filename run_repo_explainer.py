@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+import argparse
+
+from orchestrator.chunking import DEFAULT_CHUNK_TOKENS
+from tasks.repo_explainer_task import build_repo_explainer_engine
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Explain a whole repository: per-file, per-directory and project summaries.")
+    parser.add_argument("--project-path", default=".", help="Root of the repository to explain.")
+    parser.add_argument("--output", default="examples/repo_explainer_output.md", help="Markdown file to write.")
+    parser.add_argument("--workers", type=int, default=None, help="Files/directories summarized concurrently (default 8).")
+    parser.add_argument(
+        "--chunk-tokens",
+        type=int,
+        default=DEFAULT_CHUNK_TOKENS,
+        help="Summarize files above this many (estimated) tokens in chunks (0: never).",
+    )
+    args = parser.parse_args()
+
+    engine = build_repo_explainer_engine(
+        project_path=args.project_path,
+        output_path=args.output,
+        max_workers=args.workers,
+        chunk_tokens=args.chunk_tokens,
+    )
+    context = engine.run()
+    print(f"Task 'repo_explainer' completed: {args.output}")
+    print(context["run_report"].format())
+
+
+if __name__ == "__main__":
+    main()
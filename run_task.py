@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import argparse
+
+from orchestrator.checkpoint import CheckpointStore
 from tasks.example_task import build_example_engine
 
 
 def main() -> None:
+    parser = argparse.ArgumentParser(description="Run the example task.")
+    parser.add_argument("--resume", action="store_true", help="Continue a failed run from its last finished step.")
+    args = parser.parse_args()
+
     engine = build_example_engine()
-    context = engine.run()
+    engine.checkpoints = engine.checkpoints or CheckpointStore()
+    context = engine.run(resume=args.resume)
     print("Task completed.")
     print("Final context keys:", list(context.keys()))
 
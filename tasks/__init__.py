@@ -0,0 +1,17 @@
+from __future__ import annotations
+
+from typing import Callable, Dict
+
+from orchestrator.engine import Engine
+from .code_explainer_task import build_code_explainer_engine
+from .example_task import build_example_engine
+from .readme_improver_task import build_readme_improver_engine
+
+
+# Engine builders by task name. Each accepts input_path/output_path keyword arguments,
+# which is what the batch runner uses to instantiate one engine per input.
+TASK_BUILDERS: Dict[str, Callable[..., Engine]] = {
+    "example": build_example_engine,
+    "code_explainer": build_code_explainer_engine,
+    "readme_improver": build_readme_improver_engine,
+}
@@ -1,11 +1,18 @@
 from __future__ import annotations
 
+from pathlib import Path
+from orchestrator.chunking import DEFAULT_CHUNK_TOKENS, chunk_tokens_from_env
 from orchestrator.engine import Engine
 from orchestrator.steps.file_ops import LoadFile, WriteFile
 from orchestrator.steps.llm_step import LLMStep
 
 
-def build_code_explainer_engine() -> Engine:
+def build_code_explainer_engine(
+    input_path: str | Path = "examples/code_explainer_input.txt",
+    output_path: str | Path = "examples/code_explainer_output.txt",
+    stream: bool = False,
+    chunk_tokens: int | None = None,
+) -> Engine:
     """Engine for the 'code_explainer' task.
 
     Customize:
@@ -19,14 +26,19 @@ def build_code_explainer_engine() -> Engine:
         "Do NOT invent new facts or add information not present in the input."
     )
 
+    writer = WriteFile(output_path, context_key="output_text")
     steps = [
-        LoadFile("examples/code_explainer_input.txt", context_key="input_text"),
+        LoadFile(input_path, context_key="input_text"),
         LLMStep(
             system_prompt=system_prompt,
             input_key="input_text",
             output_key="output_text",
+            stream=stream,
+            on_chunk=writer.stream_chunk if stream else None,
+            # Large inputs are rewritten section by section instead of overflowing the context
+            chunk_tokens=chunk_tokens if chunk_tokens is not None else (chunk_tokens_from_env() or DEFAULT_CHUNK_TOKENS),
         ),
-        WriteFile("examples/code_explainer_output.txt", context_key="output_text"),
+        writer,
     ]
 
     return Engine(steps)
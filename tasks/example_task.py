@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from pathlib import Path
 from typing import Dict, Any
 from orchestrator.engine import Engine
 from orchestrator.steps.file_ops import LoadFile, WriteFile
@@ -26,18 +27,29 @@ class UppercaseStep(Step):
         return context
 
 
-def build_example_engine() -> Engine:
+def build_example_engine(
+    input_path: str | Path = "examples/input.txt",
+    output_path: str | Path = "examples/output.txt",
+    stream: bool = False,
+) -> Engine:
     system_prompt = (
         "You are a careful editor. "
         "You will take the input text and rewrite it for clarity and concision, "
         "preserving the original meaning."
     )
     
+    writer = WriteFile(output_path, context_key="output_text")
     steps = [
-        LoadFile("examples/input.txt", context_key="input_text"),
+        LoadFile(input_path, context_key="input_text"),
         #UppercaseStep(),
-        LLMStep(system_prompt=system_prompt, input_key="input_text", output_key="output_text"),
-        WriteFile("examples/output.txt", context_key="output_text"),
+        LLMStep(
+            system_prompt=system_prompt,
+            input_key="input_text",
+            output_key="output_text",
+            stream=stream,
+            on_chunk=writer.stream_chunk if stream else None,
+        ),
+        writer,
     ]
 
     return Engine(steps)
@@ -1,9 +1,18 @@
+from __future__ import annotations
+
+from pathlib import Path
+from orchestrator.chunking import DEFAULT_CHUNK_TOKENS, chunk_tokens_from_env
 from orchestrator.engine import Engine
 from orchestrator.steps.file_ops import LoadFile, WriteFile
 from orchestrator.steps.llm_step import LLMStep
 
 
-def build_readme_improver_engine() -> Engine:
+def build_readme_improver_engine(
+    input_path: str | Path = "examples/README_input.md",
+    output_path: str | Path = "examples/README_output.md",
+    stream: bool = False,
+    chunk_tokens: int | None = None,
+) -> Engine:
     system_prompt = (
         "You are a senior engineer improving README files.\n"
         "Rewrite the input to be clearer, better structured, and more professional.\n"
@@ -14,10 +23,19 @@ def build_readme_improver_engine() -> Engine:
     )
 
 
+    writer = WriteFile(output_path, context_key="output_text")
     steps = [
-        LoadFile("examples/README_input.md", context_key="input_text"),
-        LLMStep(system_prompt=system_prompt, input_key="input_text", output_key="output_text"),
-        WriteFile("examples/README_output.md", context_key="output_text"),
+        LoadFile(input_path, context_key="input_text"),
+        LLMStep(
+            system_prompt=system_prompt,
+            input_key="input_text",
+            output_key="output_text",
+            stream=stream,
+            on_chunk=writer.stream_chunk if stream else None,
+            # Large inputs are rewritten section by section instead of overflowing the context
+            chunk_tokens=chunk_tokens if chunk_tokens is not None else (chunk_tokens_from_env() or DEFAULT_CHUNK_TOKENS),
+        ),
+        writer,
     ]
 
     return Engine(steps)
@@ -0,0 +1,395 @@
+from __future__ import annotations
+
+import contextvars
+import hashlib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path, PurePosixPath
+from typing import Any, Callable, Dict, Iterable, List, Set, Tuple
+
+from orchestrator.cache import ResponseCache
+from orchestrator.chunking import DEFAULT_CHUNK_TOKENS
+from orchestrator.codegen.project_index import INDEX_DIR_NAME, ProjectIndex
+from orchestrator.engine import Engine
+from orchestrator.llm import DEFAULT_MODEL_NAME
+from orchestrator.metrics import record_bytes_read
+from orchestrator.steps.base import Context, Step
+from orchestrator.steps.file_ops import WriteFile
+from orchestrator.steps.llm_step import LLMStep
+from orchestrator.tracing import span
+
+
+DEFAULT_SUMMARY_CACHE_DIR = ".orchestrator_cache/summaries"
+DEFAULT_SUMMARY_WORKERS = 8
+# Larger files (bundles, data dumps) are listed as skipped rather than summarized
+DEFAULT_MAX_FILE_BYTES = 512 * 1024
+DIGESTS_FILE_NAME = "file_digests.json"
+SUMMARY_VERSION = 1
+
+FILE_PROMPT = (
+    "You are a senior engineer documenting a codebase. "
+    "Summarize the given file in a few sentences: its purpose, its main classes/functions/exports, "
+    "and how it is used. Do NOT invent behaviour that is not in the file."
+)
+DIRECTORY_PROMPT = (
+    "You are a senior engineer documenting a codebase. "
+    "Given summaries of the files and subdirectories of one directory, write a short summary of "
+    "what the directory contains and how its parts fit together. Use only the given summaries."
+)
+PROJECT_PROMPT = (
+    "You are a senior engineer documenting a codebase. "
+    "Given summaries of the top-level files and directories of a project, write an overview of the "
+    "project: what it does, its architecture and its main components. Use only the given summaries."
+)
+MERGE_PROMPT = (
+    "The input consists of summaries of consecutive parts of one text. "
+    "Merge them into one coherent summary without repeating yourself."
+)
+
+
+class ScanRepositoryStep(Step):
+    """
+    Lists the project's files into context[context_key] (sorted relative
+    paths), with the same exclusions as ProjectScanningStep (node_modules,
+    .git, build output, lockfiles, .gitignore / .orchestratorignore patterns)
+    and the same persisted, incrementally refreshed ProjectIndex.
+
+    Paths in exclude (e.g. the task's own output file) and anything under a
+    .orchestrator_* directory are left out, so a re-run does not summarize
+    the previous run's output or state.
+    """
+
+    def __init__(
+        self,
+        project_path: str | Path,
+        context_key: str = "repo_files",
+        use_index: bool = True,
+        exclude: Iterable[str | Path] = (),
+    ) -> None:
+        super().__init__(name="ScanRepositoryStep")
+        self.project_path = Path(project_path)
+        self.context_key = context_key
+        self.use_index = use_index
+        self.exclude = [Path(p) for p in exclude]
+
+    def reads(self) -> Set[str]:
+        return set()
+
+    def writes(self) -> Set[str]:
+        return {self.context_key}
+
+    def run(self, context: Context) -> Context:
+        root = self.project_path.resolve()
+        if not root.is_dir():
+            raise FileNotFoundError(f"Project directory not found: {root}")
+
+        index = ProjectIndex(root)
+        if self.use_index:
+            index.load()
+        with span("index.refresh", "scan") as trace_args:
+            index.refresh()
+            trace_args.update(dirs_listed=index.dirs_listed, dirs_reused=index.dirs_reused)
+        if self.use_index:
+            try:
+                index.save()
+            except OSError:
+                pass
+
+        excluded = set()
+        for path in self.exclude:
+            try:
+                excluded.add(path.resolve().relative_to(root).as_posix())
+            except ValueError:
+                continue  # outside the project
+
+        context[self.context_key] = [
+            rel_path
+            for rel_path in (str(f["path"]) for f in index.files())
+            if rel_path not in excluded
+            and not any(part.startswith(".orchestrator_") for part in PurePosixPath(rel_path).parts)
+        ]
+        return context
+
+
+class SummarizeRepositoryStep(Step):
+    """
+    Summarizes every file of context[files_key] with the LLM, then rolls the
+    summaries up per directory and finally into one project overview.
+
+    Work is scheduled as a tree: files are summarized concurrently (up to
+    max_workers at a time), and a directory is summarized as soon as all of
+    its files and subdirectories are, so roll-ups overlap with the remaining
+    file work. Files over chunk_tokens are summarized in chunks and merged.
+
+    Summaries are cached by content: a file's key is the SHA-256 of its bytes
+    (plus its path and the prompts), a directory's key the hash of its
+    children's summaries. After a small change only the changed files and
+    their ancestor directories are sent to the model. File hashes are kept in
+    <project>/.orchestrator_index/file_digests.json by size and mtime, so
+    unchanged files are not even read.
+
+    Writes {"project": str, "directories": {dir: str}, "files": {path: str},
+    "skipped": [path, ...]} to context[output_key].
+    """
+
+    def __init__(
+        self,
+        project_path: str | Path,
+        files_key: str = "repo_files",
+        output_key: str = "repo_summary",
+        max_workers: int | None = None,
+        chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+        max_file_bytes: int = DEFAULT_MAX_FILE_BYTES,
+        cache: ResponseCache | None = None,
+    ) -> None:
+        super().__init__(name="SummarizeRepositoryStep")
+        self.project_path = Path(project_path)
+        self.files_key = files_key
+        self.output_key = output_key
+        self.max_workers = max_workers or int(os.getenv("ORCHESTRATOR_SUMMARY_WORKERS", str(DEFAULT_SUMMARY_WORKERS)))
+        self.chunk_tokens = chunk_tokens
+        self.max_file_bytes = max_file_bytes
+        self._cache = cache or ResponseCache(
+            cache_dir=os.getenv("ORCHESTRATOR_SUMMARY_CACHE_DIR", DEFAULT_SUMMARY_CACHE_DIR)
+        )
+        self._file_llm = LLMStep(FILE_PROMPT, chunk_tokens=chunk_tokens, reduce_prompt=MERGE_PROMPT)
+        self._dir_llm = LLMStep(DIRECTORY_PROMPT, chunk_tokens=chunk_tokens, reduce_prompt=MERGE_PROMPT)
+        self._project_llm = LLMStep(PROJECT_PROMPT, chunk_tokens=chunk_tokens, reduce_prompt=MERGE_PROMPT)
+
+    def reads(self) -> Set[str]:
+        return {self.files_key}
+
+    def writes(self) -> Set[str]:
+        return {self.output_key}
+
+    # --- content hashes ---
+
+    def _digests_path(self, root: Path) -> Path:
+        return root / INDEX_DIR_NAME / DIGESTS_FILE_NAME
+
+    def _file_digests(self, root: Path, paths: List[str]) -> Tuple[Dict[str, str], List[str]]:
+        """
+        SHA-256 of every summarizable file, reusing the stored hash of files
+        whose size and mtime are unchanged. Returns (path -> digest, skipped).
+        """
+        try:
+            stored = json.loads(self._digests_path(root).read_text(encoding="utf-8"))
+            known: Dict[str, List[Any]] = stored["files"] if stored.get("version") == SUMMARY_VERSION else {}
+        except (OSError, ValueError, KeyError):
+            known = {}
+
+        digests: Dict[str, str] = {}
+        skipped: List[str] = []
+        fresh: Dict[str, List[Any]] = {}
+        changed = False
+        for rel_path in paths:
+            try:
+                st = os.stat(root / rel_path)
+            except OSError:
+                continue
+            if st.st_size > self.max_file_bytes or st.st_size == 0:
+                skipped.append(rel_path)
+                continue
+            entry = known.get(rel_path)
+            if entry is None or entry[0] != st.st_size or entry[1] != st.st_mtime_ns:
+                try:
+                    data = (root / rel_path).read_bytes()
+                except OSError:
+                    continue
+                record_bytes_read(len(data))
+                # None marks a binary file
+                digest = None if b"\0" in data[:8192] else hashlib.sha256(data).hexdigest()
+                entry = [st.st_size, st.st_mtime_ns, digest]
+                changed = True
+            fresh[rel_path] = entry
+            if entry[2] is None:
+                skipped.append(rel_path)
+            else:
+                digests[rel_path] = entry[2]
+
+        if changed or fresh.keys() != known.keys():
+            try:
+                path = self._digests_path(root)
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tmp_path = path.with_name(path.name + ".tmp")
+                tmp_path.write_text(json.dumps({"version": SUMMARY_VERSION, "files": fresh}), encoding="utf-8")
+                os.replace(tmp_path, path)
+            except OSError:
+                pass
+        return digests, skipped
+
+    # --- summaries ---
+
+    def _key(self, llm: LLMStep, label: str, digest: str) -> str:
+        raw = json.dumps(
+            [SUMMARY_VERSION, DEFAULT_MODEL_NAME, llm.system_prompt, self.chunk_tokens, label, digest],
+            separators=(",", ":"),
+        )
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def _summarize(self, llm: LLMStep, label: str, digest: str, load_text: Callable[[], str]) -> Tuple[str, bool]:
+        """
+        (summary, cached) for one node; load_text() builds the prompt on a miss.
+        """
+        key = self._key(llm, label, digest)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached, True
+        with span("repo.summarize", "repo", {"node": label}):
+            summary = llm.run({"input_text": load_text()})["output_text"].strip()
+        self._cache.put(key, summary)
+        return summary, False
+
+    def _file_job(self, root: Path, rel_path: str, digest: str) -> Tuple[str, bool]:
+        def load() -> str:
+            data = (root / rel_path).read_bytes()
+            record_bytes_read(len(data))
+            return f"File: {rel_path}\n\n{data.decode('utf-8', errors='replace')}"
+
+        return self._summarize(self._file_llm, rel_path, digest, load)
+
+    def _dir_job(self, rel_dir: str, children: List[Tuple[str, str]]) -> Tuple[str, bool]:
+        text = f"Directory: {rel_dir or '.'}\n\n" + "\n\n".join(f"### {name}\n{summary}" for name, summary in children)
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        llm = self._dir_llm if rel_dir else self._project_llm
+        return self._summarize(llm, rel_dir or ".", digest, lambda: text)
+
+    def run(self, context: Context) -> Context:
+        if self.files_key not in context:
+            raise KeyError(
+                f"Expected '{self.files_key}' in context. "
+                f"Available keys: {list(context.keys())}"
+            )
+        root = self.project_path.resolve()
+        digests, skipped = self._file_digests(root, list(context[self.files_key]))
+        if not digests:
+            raise ValueError(f"No text files to summarize under {root}")
+
+        # Tree: directory -> direct files / subdirectories ("" is the project root)
+        files_in: Dict[str, List[str]] = {}
+        subdirs_in: Dict[str, Set[str]] = {}
+        for rel_path in digests:
+            parent = PurePosixPath(rel_path).parent.as_posix()
+            parent = "" if parent == "." else parent
+            files_in.setdefault(parent, []).append(rel_path)
+            while parent:
+                grand = PurePosixPath(parent).parent.as_posix()
+                grand = "" if grand == "." else grand
+                subdirs_in.setdefault(grand, set()).add(parent)
+                parent = grand
+        dirs = set(files_in) | set(subdirs_in)
+        remaining = {d: len(files_in.get(d, ())) + len(subdirs_in.get(d, ())) for d in dirs}
+
+        file_summaries: Dict[str, str] = {}
+        dir_summaries: Dict[str, str] = {}
+        counts = {"files": 0, "files_cached": 0, "dirs": 0, "dirs_cached": 0}
+
+        def dir_children(rel_dir: str) -> List[Tuple[str, str]]:
+            children = [(f"file {PurePosixPath(p).name}", file_summaries[p]) for p in sorted(files_in.get(rel_dir, ()))]
+            children += [(f"directory {PurePosixPath(d).name}/", dir_summaries[d]) for d in sorted(subdirs_in.get(rel_dir, ()))]
+            return children
+
+        with ThreadPoolExecutor(max_workers=max(1, self.max_workers), thread_name_prefix="repo") as pool:
+            running: Dict[Future, Tuple[str, str]] = {}
+
+            def submit(kind: str, node: str) -> None:
+                call = contextvars.copy_context().run
+                if kind == "file":
+                    future = pool.submit(call, self._file_job, root, node, digests[node])
+                else:
+                    future = pool.submit(call, self._dir_job, node, dir_children(node))
+                running[future] = (kind, node)
+
+            for rel_path in sorted(digests):
+                submit("file", rel_path)
+
+            while running:
+                done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in done:
+                    kind, node = running.pop(future)
+                    summary, cached = future.result()
+                    if kind == "file":
+                        file_summaries[node] = summary
+                        counts["files_cached" if cached else "files"] += 1
+                        parent = PurePosixPath(node).parent.as_posix()
+                    else:
+                        dir_summaries[node] = summary
+                        counts["dirs_cached" if cached else "dirs"] += 1
+                        if not node:
+                            continue
+                        parent = PurePosixPath(node).parent.as_posix()
+                    parent = "" if parent == "." else parent
+                    remaining[parent] -= 1
+                    if remaining[parent] == 0:
+                        submit("dir", parent)
+
+        print(
+            f"[repo] Files: {counts['files']} summarized, {counts['files_cached']} cached, {len(skipped)} skipped; "
+            f"directories: {counts['dirs']} summarized, {counts['dirs_cached']} cached"
+        )
+        context[self.output_key] = {
+            "project": dir_summaries[""],
+            "directories": {d: dir_summaries[d] for d in sorted(dir_summaries) if d},
+            "files": {p: file_summaries[p] for p in sorted(file_summaries)},
+            "skipped": sorted(skipped),
+        }
+        return context
+
+
+class RenderRepoSummaryStep(Step):
+    """
+    Formats context[input_key] (see SummarizeRepositoryStep) as Markdown into
+    context[output_key].
+    """
+
+    def __init__(self, input_key: str = "repo_summary", output_key: str = "output_text") -> None:
+        super().__init__(name="RenderRepoSummaryStep")
+        self.input_key = input_key
+        self.output_key = output_key
+
+    def reads(self) -> Set[str]:
+        return {self.input_key}
+
+    def writes(self) -> Set[str]:
+        return {self.output_key}
+
+    def run(self, context: Context) -> Context:
+        summary = context[self.input_key]
+        parts = ["# Project Overview", summary["project"], "## Directories"]
+        for rel_dir, text in summary["directories"].items():
+            parts += [f"### `{rel_dir}/`", text]
+        parts.append("## Files")
+        for rel_path, text in summary["files"].items():
+            parts += [f"### `{rel_path}`", text]
+        if summary["skipped"]:
+            parts += ["## Not Summarized", "\n".join(f"- `{p}`" for p in summary["skipped"])]
+        context[self.output_key] = "\n\n".join(parts) + "\n"
+        return context
+
+
+def build_repo_explainer_engine(
+    project_path: str | Path = ".",
+    output_path: str | Path = "examples/repo_explainer_output.md",
+    max_workers: int | None = None,
+    chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+) -> Engine:
+    """
+    Engine for the 'repo_explainer' task: scan -> summarize files and roll
+    up per directory / project -> render Markdown -> write.
+    """
+    steps = [
+        # The output usually lives inside the project (examples/ by default)
+        ScanRepositoryStep(project_path, context_key="repo_files", exclude=[output_path]),
+        SummarizeRepositoryStep(
+            project_path,
+            files_key="repo_files",
+            output_key="repo_summary",
+            max_workers=max_workers,
+            chunk_tokens=chunk_tokens,
+        ),
+        RenderRepoSummaryStep(input_key="repo_summary", output_key="output_text"),
+        WriteFile(output_path, context_key="output_text"),
+    ]
+
+    return Engine(steps)